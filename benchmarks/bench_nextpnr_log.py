@@ -0,0 +1,48 @@
+"""Throughput of parsing nextpnr logs.
+
+Usage: python benchmarks/bench_nextpnr_log.py [LOG ...] [--repeat 50]
+Without arguments, the recorded log in tests/resources/nextpnr is replicated to form a large log.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from xeda.flows.nextpnr import parse_nextpnr_logfile
+
+RECORDED_LOG = Path(__file__).parent.parent / "tests" / "resources" / "nextpnr" / "nextpnr.log"
+
+
+def bench(log_path: Path) -> None:
+    t0 = time.perf_counter()
+    data = parse_nextpnr_logfile(log_path)
+    elapsed = time.perf_counter() - t0
+    size_mb = log_path.stat().st_size / 2**20
+    print(
+        f"{log_path.name}: {size_mb:.1f} MiB in {elapsed:.3f} s ({size_mb / elapsed:.1f} MiB/s), "
+        f"{len(data['_clocks'])} clock reports, "
+        f"{len(data['_critical_path_reports'])} critical path reports"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("logs", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+    if args.logs:
+        for log_path in args.logs:
+            bench(log_path)
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = Path(tmpdir) / "nextpnr_large.log"
+        recorded = RECORDED_LOG.read_text()
+        with open(log_path, "w") as f:
+            for _ in range(args.repeat):
+                f.write(recorded)
+        bench(log_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Micro-benchmarks of report parsing on large synthetic timing reports.
+
+Usage: python benchmarks/bench_report_parsing.py [--size-mb 100] [--repeat 3]
+"""
+
+import argparse
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from xeda.utils import parse_patterns, parse_patterns_in_file
+
+PATTERNS = [
+    r"Design Timing Summary.*?WNS\(ns\)\s+TNS\(ns\).*?\n\s*(?P<wns>\-?\d+\.\d+)\s+(?P<tns>\-?\d+\.\d+)",
+    r"Slack \((?:VIOLATED|MET)\)\s*:\s*(?P<worst_slack>\-?\d+\.\d+)ns",
+    r"Data Path Delay:\s*(?P<data_path_delay>\d+\.\d+)ns",
+    r"Timing constraints are (?P<_constraints_met>not )?met",
+]
+
+PATH_BLOCK = """
+Slack (MET) :             {slack:.3f}ns  (required time - arrival time)
+  Source:                 u_core/reg_{i}/C
+  Destination:            u_core/reg_{j}/D
+  Data Path Delay:        {delay:.3f}ns  (logic 0.804ns (31.4%)  route 1.757ns (68.6%))
+  Logic Levels:           3  (LUT4=1 LUT6=2)
+    Location             Delay type                Incr(ns)  Path(ns)    Netlist Resource(s)
+  -------------------------------------------------------------------    -------------------
+    SLICE_X12Y34         FDRE (Prop_fdre_C_Q)      0.456     5.123 r     u_core/reg_{i}/Q
+    SLICE_X13Y34         LUT6 (Prop_lut6_I0_O)     0.124     5.247 r     u_core/n_{j}
+"""
+
+
+def generate_report(path: Path, size_mb: int) -> None:
+    target = size_mb * 1024 * 1024
+    with open(path, "w") as f:
+        f.write("Timing Report\n\nDesign Timing Summary\n| -----\n")
+        f.write("    WNS(ns)      TNS(ns)  TNS Failing Endpoints\n    -------      -------\n")
+        f.write("      0.214        0.000                      0\n\n")
+        written = 0
+        i = 0
+        while written < target:
+            block = PATH_BLOCK.format(slack=0.2 + i % 97 / 10, i=i, j=i + 1, delay=2.5 + i % 13)
+            f.write(block)
+            written += len(block)
+            i += 1
+        f.write("\nTiming constraints are met.\n")
+
+
+def legacy_parse(path: Path, *patterns, sequential: bool) -> dict:
+    """read() + slicing, the previous implementation"""
+    flags = re.MULTILINE | re.IGNORECASE | re.DOTALL
+    results = {}
+    with open(path) as f:
+        content = f.read()
+    for pat in patterns:
+        match = re.search(pat, content, flags)
+        if match is None:
+            continue
+        results.update(match.groupdict())
+        if sequential:
+            content = content[match.span(0)[1] :]
+    return results
+
+
+def bench(name, fn, repeat):
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{name:<40} {best:8.3f} s   peak Python memory: {peak / 2**20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report = Path(tmpdir) / "timing_summary.rpt"
+        generate_report(report, args.size_mb)
+        print(f"Synthetic report: {report.stat().st_size / 2**20:.1f} MiB")
+        # a sequential pattern list that walks through the whole report
+        seq_patterns = PATTERNS[:1] + [r"Slack \(MET\)\s*:\s*(?P<slack>\S+)ns"] * 200 + PATTERNS[3:]
+
+        for sequential, patterns in ((False, PATTERNS), (True, seq_patterns)):
+            mode = "sequential" if sequential else "independent"
+            bench(
+                f"legacy read+slice ({mode})",
+                lambda: legacy_parse(report, *patterns, sequential=sequential),
+                args.repeat,
+            )
+            bench(
+                f"parse_patterns_in_file ({mode})",
+                lambda: parse_patterns_in_file(report, *patterns, sequential=sequential),
+                args.repeat,
+            )
+        content = report.read_text()
+        bench(
+            "parse_patterns (str, independent)",
+            lambda: parse_patterns(
+                content, *PATTERNS, flags=re.MULTILINE | re.IGNORECASE | re.DOTALL
+            ),
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
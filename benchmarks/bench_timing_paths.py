@@ -0,0 +1,78 @@
+"""Runtime and memory of extracting all paths from a large (synthetic) Vivado timing report.
+
+Usage: python benchmarks/bench_timing_paths.py [--paths 1000000]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from xeda.timing_paths import parse_vivado_timing_paths
+
+PATH = """
+Slack ({status}) :        {slack:.3f}ns  (required time - arrival time)
+  Source:                 u_core/stage{s}/acc_reg[{i}]/C
+                            (rising edge-triggered cell FDRE clocked by {clock}  {{rise@0.000ns fall@2.500ns period=5.000ns}})
+  Destination:            u_core/stage{d}/sum_reg[{j}]/D
+                            (rising edge-triggered cell FDRE clocked by {clock}  {{rise@0.000ns fall@2.500ns period=5.000ns}})
+  Path Group:             {clock}
+  Path Type:              Setup (Max at Slow Process Corner)
+  Requirement:            5.000ns  (clock rise@5.000ns - clock rise@0.000ns)
+  Data Path Delay:        {delay:.3f}ns  (logic 1.500ns (41.073%)  route {route:.3f}ns (58.927%))
+  Logic Levels:           {levels}  (LUT3=2 LUT6=1)
+
+    Location             Delay type                Incr(ns)  Path(ns)    Netlist Resource(s)
+  -------------------------------------------------------------------    -------------------
+    SLICE_X12Y34         FDRE (Prop_fdre_C_Q)         0.456     5.123 r  u_core/acc_reg[{i}]/Q
+                         net (fo=3, routed)           0.807     5.930    u_core/acc[{i}]
+"""
+
+
+def generate_report(path: Path, num_paths: int) -> None:
+    with open(path, "w") as f:
+        for k in range(num_paths):
+            slack = 1.0 - (k % 1000) / 500
+            f.write(
+                PATH.format(
+                    status="MET" if slack >= 0 else "VIOLATED",
+                    slack=slack,
+                    s=k % 64,
+                    d=(k + 1) % 64,
+                    i=k % 32,
+                    j=k // 64 % 32,
+                    clock=("clk_a", "clk_b", "clk_c")[k % 3],
+                    delay=5 - slack,
+                    route=3.5 - slack,
+                    levels=k % 12,
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report = Path(tmpdir) / "timing.rpt"
+        generate_report(report, args.paths)
+        print(f"Synthetic report: {report.stat().st_size / 2**20:.1f} MiB, {args.paths} paths")
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        paths = parse_vivado_timing_paths(report)
+        t1 = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"parse: {t1 - t0:.2f} s  peak Python memory: {peak / 2**20:.1f} MiB")
+        t0 = time.perf_counter()
+        paths.slack_histogram(bins=50)
+        paths.worst_endpoints(n=10)
+        print(f"summaries: {time.perf_counter() - t0:.2f} s")
+        t0 = time.perf_counter()
+        npz = paths.save(Path(tmpdir) / "timing_paths.npz")
+        print(f"save: {time.perf_counter() - t0:.2f} s, {npz.stat().st_size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory and runtime of parsing large (synthetic) Vivado hierarchical utilization XML reports.
+
+Usage: python benchmarks/bench_xml_reports.py [--instances 200000]
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from xeda.flows.vivado import Vivado
+from xeda.flows.vivado.vivado_synth import parse_hier_util
+from xeda.utils import parse_xml
+
+HEADERS = ["Instance", "Module", "Total LUTs", "Logic LUTs", "LUTRAMs", "SRLs", "FFs", "RAMB36"]
+
+
+def generate_report(path: Path, instances: int) -> None:
+    def row(tag, values):
+        cells = "".join(
+            f'\n        <{tag} class="" contents="{v}" halign="3" width="-1"/>' for v in values
+        )
+        return (
+            f'\n      <tablerow class="" suppressoutput="0" wordwrap="0">{cells}\n      </tablerow>'
+        )
+
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n<RptDoc title="x">\n')
+        f.write('  <section class="" title="Utilization by Hierarchy">\n')
+        f.write('    <table class="" style="2" title="" useFootnoteNumbers="0">')
+        f.write(row("tableheader", HEADERS))
+        f.write(row("tablecell", ["top", "(top)", 99999, 99999, 0, 0, 99999, 0]))
+        for i in range(instances):
+            depth = 1 + i % 4
+            name = "  " * depth + f"u_{i}"
+            f.write(row("tablecell", [name, f"mod_{i % 37}", i % 1000, i % 900, 0, i % 3, i, 0]))
+        f.write("\n    </table>\n  </section>\n</RptDoc>\n")
+
+
+def bench(name, fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<40} {elapsed:8.3f} s   peak Python memory: {peak / 2**20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=200000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report = Path(tmpdir) / "hierarchical_utilization.xml"
+        generate_report(report, args.instances)
+        print(f"Synthetic report: {report.stat().st_size / 2**20:.1f} MiB")
+        bench("parse_xml (full tree to dict)", lambda: parse_xml(report))
+        bench("parse_hier_util (iterparse)", lambda: parse_hier_util(report))
+        bench("Vivado.parse_xml_report (iterparse)", lambda: Vivado.parse_xml_report(report))
+
+
+if __name__ == "__main__":
+    main()
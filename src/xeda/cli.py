@@ -1,6 +1,7 @@
 # © 2022-2025 [Kamyar Mohajerani](mailto:kammoh@gmail.com)
 """Xeda Command-line interface"""
 import inspect
+import json
 import logging
 import os
 import re
@@ -31,13 +32,17 @@ from .flow_runner import (
     DIR_NAME_HASH_LEN,
     DefaultRunner,
     FlowNotFoundError,
+    ResultsDB,
     XedaOptions,
     add_file_logger,
     get_flow_class,
     scrub_runs,
 )
+from .flow_runner.compare import compare_runs, load_rules, load_runs
 from .flow_runner.dse import Dse
-from .flows import __builtin_flows__
+from .flow_runner.export import EXPORT_FORMATS, export_records, iter_dse_records, iter_run_records
+from .flows import GhdlSim, __builtin_flows__
+from .flows.ghdl.backends import GhdlInstallation
 from .tool import ExecutableNotFound, NonZeroExitCode
 from .utils import XedaException, removeprefix, settings_to_dict
 
@@ -280,6 +285,25 @@ def list_settings(ctx: click.Context, flow):
     is_flag=True,
     help="Remove all previous flow directories of the same flow withing the current 'xeda_run_dir' _before_ running the flow. Requires user confirmation.",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Total number of CPU job tokens shared by the flow, its dependencies, and their tools (make-style jobserver).",
+)
+@click.option(
+    "--profile-trace",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    default=None,
+    help="Record profiling spans (design loading, flow stages, tool executions, etc) to this file in the Chrome trace event format, viewable in Perfetto (https://ui.perfetto.dev).",
+)
+@click.option(
+    "--run-tag",
+    type=str,
+    default=None,
+    help="Label the runs (e.g., with the version of the tools), for selecting them in `xeda compare` (as tag:<RUN_TAG>).",
+)
 @click.option(
     "--remote",
     type=str,
@@ -320,6 +344,9 @@ def run(
     post_cleanup: bool = False,
     post_cleanup_purge: bool = False,
     scrub: bool = False,
+    jobs: Optional[int] = None,
+    profile_trace: Optional[Path] = None,
+    run_tag: Optional[str] = None,
     remote: Optional[str] = None,
     cwd: bool = False,
     debug: bool = False,
@@ -374,6 +401,9 @@ def run(
         launcher = DefaultRunner(
             xeda_run_dir,
             cached_dependencies=cached_dependencies,
+            jobs=jobs,
+            profile_trace=profile_trace,
+            run_tag=run_tag,
         )
         launcher.settings.cleanup_before_run = clean
         if cwd:
@@ -568,6 +598,20 @@ def run(
     help="Maximum number of concurrent flow executions.",
     show_envvar=True,
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Total number of CPU job tokens shared by all concurrent flow executions (make-style jobserver). Default: number of CPUs. 0 disables the jobserver.",
+    show_envvar=True,
+)
+@click.option(
+    "--profile-trace",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    default=None,
+    help="Record profiling spans (design loading, flow stages, tool executions, etc) to this file in the Chrome trace event format, viewable in Perfetto (https://ui.perfetto.dev).",
+)
 @click.option(
     "--init_freq_low",
     "--init-freq-low",
@@ -594,6 +638,8 @@ def dse(
     optimizer_settings: Tuple[str, ...],
     dse_settings: Tuple[str, ...],
     max_workers: Optional[int],
+    jobs: Optional[int],
+    profile_trace: Optional[Path],
     init_freq_low: float,
     init_freq_high: float,
     xeda_run_dir: Optional[Path],
@@ -623,6 +669,10 @@ def dse(
     dse_settings_dict = settings_to_dict(dse_settings, hierarchical_keys=True)
     if max_workers:
         dse_settings_dict["max_workers"] = max_workers  # overrides
+    if jobs is not None:
+        dse_settings_dict["jobs"] = jobs
+    if profile_trace is not None:
+        dse_settings_dict["profile_trace"] = profile_trace
 
     # will deprecate options and only use optimizer_settings
     opt_settings = {
@@ -701,6 +751,357 @@ def scrub(ctx: click.Context, flow, design_name, xeda_run_dir, incremental):
         scrub_runs(flow_class.name, dd)
 
 
+xeda_run_dir_option = click.option(
+    "--xeda-run-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_RUN_DIR",
+    help="Parent folder for execution of xeda commands.",
+    default="xeda_run",
+    show_default=True,
+    show_envvar=True,
+)
+
+
+@cli.group(
+    cls=XedaHelpGroup,
+    context_settings=CONTEXT_SETTINGS,
+    no_args_is_help=True,
+    short_help="Query the index of results of previous runs",
+)
+def results():
+    """Index and query the results of all flow runs in xeda_run_dir"""
+
+
+@results.command(
+    name="index",
+    context_settings=CONTEXT_SETTINGS,
+    short_help="(Re-)index all runs in xeda_run_dir",
+)
+@xeda_run_dir_option
+def results_index(xeda_run_dir: Path):
+    db = ResultsDB.of_run_dir(xeda_run_dir)
+    count = db.index(xeda_run_dir)
+    console.print(f"Indexed {count} run(s) in {db.path}")
+
+
+@results.command(
+    name="query",
+    context_settings=CONTEXT_SETTINGS,
+    short_help="List indexed runs, filtered and sorted",
+)
+@xeda_run_dir_option
+@click.option("--design", help="Design name (glob pattern)")
+@click.option("--flow", help="Flow name (glob pattern)")
+@click.option(
+    "--success/--failed", "success", default=None, help="Only successful (or failed) runs."
+)
+@click.option("--tag", help="Only runs labeled with this tag (see `xeda run --run-tag`).")
+@click.option("--tool", help="Only runs which used this tool (executable name).")
+@click.option("--tool-version", help="Only runs which used this version of a tool (glob pattern).")
+@click.option(
+    "--sort",
+    "sort_by",
+    metavar="METRIC",
+    help="Sort by the value of this metric (e.g., Fmax), largest first. Runs without it are excluded.",
+)
+@click.option("--ascending", is_flag=True, help="Sort in ascending order.")
+@click.option("--limit", type=int, default=20, show_default=True, help="Maximum number of runs.")
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    help="Results to include in the listing. Can be repeated.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the full records as JSON.")
+def results_query(
+    xeda_run_dir: Path,
+    design: Optional[str],
+    flow: Optional[str],
+    success: Optional[bool],
+    tag: Optional[str],
+    tool: Optional[str],
+    tool_version: Optional[str],
+    sort_by: Optional[str],
+    ascending: bool,
+    limit: int,
+    metrics: Tuple[str, ...],
+    as_json: bool,
+):
+    db = ResultsDB.of_run_dir(xeda_run_dir)
+    if not db.path.exists():
+        console.print(f"[yellow]No results index in {xeda_run_dir}. Run `xeda results index`.[/]")
+        return
+    records = db.query(
+        design=design,
+        flow=flow,
+        success=success,
+        tag=tag,
+        tool=tool,
+        tool_version=tool_version,
+        order_by=sort_by,
+        descending=not ascending,
+        limit=limit,
+    )
+    if as_json:
+        print(json.dumps(records, indent=1))
+        return
+    columns = list(metrics) or ["runtime"]
+    if sort_by and sort_by not in columns:
+        columns.insert(0, sort_by)
+    table = Table(box=box.SIMPLE_HEAD, show_lines=False)
+    for col in ["design", "flow", "timestamp", "success", *columns, "run_path"]:
+        table.add_column(col, no_wrap=col != "run_path")
+    for r in records:
+        values = [r["results"].get(c) for c in columns]
+        table.add_row(
+            r["design"],
+            r["flow"],
+            r["timestamp"],
+            "[green]OK[/]" if r["success"] else "[red]FAILED[/]",
+            *("" if v is None else f"{v:,.3f}" if isinstance(v, float) else str(v) for v in values),
+            r["run_path"],
+        )
+    console.print(table)
+
+
+@cli.command(
+    context_settings=CONTEXT_SETTINGS,
+    short_help="Export the results of all runs as a table (Parquet, Arrow, or CSV)",
+)
+@click.argument(
+    "output",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+)
+@xeda_run_dir_option
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(list(EXPORT_FORMATS)),
+    help="Output format. Default: from the extension of OUTPUT.",
+)
+@click.option("--design", help="Design name (glob pattern)")
+@click.option("--flow", help="Flow name (glob pattern)")
+@click.option(
+    "--dse-results",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    multiple=True,
+    help="Also export the successful results in these DSE result files (fmax_*.json).",
+)
+@click.option(
+    "--chunk-size", type=int, default=10000, show_default=True, help="Rows per written chunk."
+)
+def export(
+    output: Path,
+    xeda_run_dir: Path,
+    fmt: Optional[str],
+    design: Optional[str],
+    flow: Optional[str],
+    dse_results: Tuple[Path, ...],
+    chunk_size: int,
+):
+    """Export the (flattened) results and settings of all runs in xeda_run_dir as a columnar table"""
+
+    def records():
+        yield from iter_run_records(xeda_run_dir, design=design, flow=flow)
+        for dse_json in dse_results:
+            yield from iter_dse_records(dse_json)
+
+    try:
+        num_rows = export_records(records, output, fmt, chunk_size=chunk_size)
+    except XedaException as e:
+        log.critical("%s", e)
+        sys.exit(1)
+    console.print(f"Exported {num_rows} row(s) to {output}")
+
+
+def parse_threshold(_ctx, _param, value: Tuple[str, ...]) -> Dict[str, float]:
+    thresholds = {}
+    for v in value:
+        pattern, _, rel = v.partition("=")
+        match = re.fullmatch(r"(\d+(?:\.\d*)?)(%?)", rel)
+        if not pattern or not match:
+            raise click.BadParameter(f"'{v}' should be METRIC=THRESHOLD, e.g., Fmax=5%")
+        thresholds[pattern] = float(match.group(1)) / (100 if match.group(2) else 1)
+    return thresholds
+
+
+@cli.command(
+    context_settings=CONTEXT_SETTINGS,
+    short_help="Compare the QoR and runtime of two sets of runs",
+)
+@click.argument("baseline")
+@click.argument("candidate")
+@xeda_run_dir_option
+@click.option("--design", help="Only compare these designs (glob pattern)")
+@click.option("--flow", help="Only compare these flows (glob pattern)")
+@click.option(
+    "--rules",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="TOML file of comparison rules: a table per metric pattern, with the keys 'higher_is_better', 'rel' and 'abs' (tolerated relative and absolute changes for the worse). These precede the default rules.",
+)
+@click.option(
+    "--threshold",
+    "thresholds",
+    metavar="METRIC=THRESHOLD",
+    multiple=True,
+    callback=parse_threshold,
+    help="Tolerated relative change for the worse of metrics (pattern), e.g., 'runtime=20%'. Can be repeated.",
+)
+@click.option("--all", "show_all", is_flag=True, help="Also list the unchanged metrics.")
+@click.option("--json", "as_json", is_flag=True, help="Print the differences as JSON.")
+def compare(
+    baseline: str,
+    candidate: str,
+    xeda_run_dir: Path,
+    design: Optional[str],
+    flow: Optional[str],
+    rules: Optional[Path],
+    thresholds: Dict[str, float],
+    show_all: bool,
+    as_json: bool,
+):
+    """Compare the latest run of each design and flow in CANDIDATE with the one in BASELINE, and exit
+    with a non-zero status if any metric has regressed. BASELINE and CANDIDATE can be a run
+    directory, a directory of runs (e.g., a xeda_run), a results database (results.db), or
+    tag:<TAG> for the runs tagged with `--run-tag` in the results database of xeda_run_dir."""
+    try:
+        baseline_runs = load_runs(baseline, xeda_run_dir, design, flow)
+        candidate_runs = load_runs(candidate, xeda_run_dir, design, flow)
+        diffs = compare_runs(baseline_runs, candidate_runs, load_rules(rules, thresholds))
+    except XedaException as e:
+        log.critical("%s", e)
+        sys.exit(2)
+    regressions = [d for d in diffs if d.status == "regressed"]
+    if not show_all:
+        diffs = [d for d in diffs if d.status != "unchanged"]
+    if as_json:
+        print(json.dumps([dict(vars(d), change=d.change) for d in diffs], indent=1))
+    else:
+        styles = dict(regressed="red", improved="green", missing="yellow", unchanged="dim")
+        table = Table(box=box.SIMPLE_HEAD)
+        for col in ("design", "flow", "metric", "baseline", "candidate", "change", "status"):
+            numeric = col in ("baseline", "candidate", "change")
+            table.add_column(col, justify="right" if numeric else "left")
+
+        def fmt(v) -> str:
+            return f"{v:,.4g}" if isinstance(v, float) else str(v)
+
+        for d in diffs:
+            change = d.change
+            table.add_row(
+                d.design,
+                d.flow,
+                d.metric,
+                fmt(d.baseline),
+                fmt(d.candidate),
+                "" if change is None else f"{change:+.1%}",
+                f"[{styles[d.status]}]{d.status}[/]",
+            )
+        console.print(table)
+        console.print(
+            f"Compared {len(baseline_runs)} baseline with {len(candidate_runs)} candidate run(s): "
+            f"{len(regressions)} regression(s)"
+        )
+    if regressions:
+        sys.exit(1)
+
+
+def parse_installation(_ctx, _param, value: Tuple[str, ...]) -> list:
+    return [
+        (
+            GhdlInstallation(docker=removeprefix(v, "docker:"))
+            if v.startswith("docker:")
+            else GhdlInstallation(executable=v)
+        )
+        for v in value
+    ]
+
+
+@cli.command(
+    context_settings=CONTEXT_SETTINGS,
+    short_help="Benchmark the GHDL backends and optimization levels on a testbench",
+)
+@click.argument(
+    "design",
+    type=click.Path(exists=True, dir_okay=False, resolve_path=True, path_type=Path),
+)
+@click.option(
+    "--installation",
+    "installations",
+    metavar="EXECUTABLE|docker:IMAGE",
+    multiple=True,
+    callback=parse_installation,
+    help="GHDL installation to benchmark: an executable, or docker:<IMAGE>. Can be repeated. Default: ghdl",
+)
+@click.option(
+    "--opt-level",
+    "opt_levels",
+    multiple=True,
+    default=("-O0", "-O2", "-O3"),
+    show_default=True,
+    help="Optimization flag to benchmark. Can be repeated.",
+)
+@click.option("--stop-time", help="Simulation stop time, e.g., 100us")
+@click.option("--repeat", type=click.IntRange(min=1), default=1, show_default=True)
+@xeda_run_dir_option
+def ghdl_benchmark(
+    design: Path,
+    installations: list,
+    opt_levels: Tuple[str, ...],
+    stop_time: Optional[str],
+    repeat: int,
+    xeda_run_dir: Path,
+):
+    """Measure the elaboration and simulation time of the testbench of DESIGN with each GHDL
+    installation (i.e., backend) and optimization level. The measurements are recorded in the
+    runtime history of the design, which the auto_backend setting of the ghdl_sim flow uses."""
+    table = Table(box=box.SIMPLE_HEAD)
+    for col in ("installation", "backend", "optimization", "elaboration", "simulation", "total"):
+        numeric = col in ("elaboration", "simulation", "total")
+        table.add_column(col, justify="right" if numeric else "left")
+    failed = False
+    for installation in installations or [GhdlInstallation()]:
+        for level in opt_levels:
+            for _ in range(repeat):
+                runner = DefaultRunner(xeda_run_dir, display_results=False)
+                settings: Dict[str, Any] = dict(
+                    installation=installation.dict(),
+                    optimization_flags=[level],
+                    auto_backend=False,
+                    record_runtime=True,
+                )
+                if stop_time:
+                    settings["stop_time"] = stop_time
+                try:
+                    flow = runner.run(GhdlSim, design, flow_settings=settings)
+                except XedaException as e:
+                    log.error("GHDL %s %s failed: %s", installation.label, level, e)
+                    flow = None
+                if not flow or not flow.succeeded:
+                    failed = True
+                    table.add_row(installation.label, "", level, "", "", "[red]failed[/]")
+                    continue
+                elaboration = flow.results["elaboration_time"]
+                simulation = flow.results["simulation_time"]
+                table.add_row(
+                    installation.label,
+                    flow.results.get("ghdl_backend") or "",
+                    level,
+                    f"{elaboration:.2f}s",
+                    f"{simulation:.2f}s",
+                    f"{elaboration + simulation:.2f}s",
+                )
+    console.print(table)
+    if failed:
+        sys.exit(1)
+
+
 SHELLS: Dict[str, Dict[str, Any]] = {
     "bash": {
         "eval_file": "~/.bashrc",
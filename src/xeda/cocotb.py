@@ -1,15 +1,18 @@
+import ast
 import logging
 import os
+import re
 import sys
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Mapping, Optional, Sequence, Union
 from xml.etree import ElementTree
 
 from .dataclass import Field, XedaBaseModel, validator
 from .design import Design, SourceType
 from .tool import Tool
+from .utils import cache_dir, load_cache_file, save_cache_file
 
 log = logging.getLogger(__name__)
 
@@ -40,6 +43,11 @@ class CocotbSettings(XedaBaseModel):
         [],
         description="A comma-separated list of extra libraries that are dynamically loaded at runtime.",
     )
+    shards: int = Field(
+        1,
+        ge=0,
+        description="Run the tests in this many concurrent simulator processes (0: number of CPUs), each running a subset of the tests. Shards are balanced using the runtime of each test in previous runs.",
+    )
 
     @validator("testcase", "gpi_extra", pre=True, always=True)
     def str_to_list(cls, value):
@@ -70,6 +78,45 @@ class TestSuite:
     total_sim_time_ns: float
 
 
+@dataclass
+class ShardResult:
+    index: int
+    tests: List[str]
+    time: float  # wall-clock time of the simulator process
+    success: bool  # the simulator process completed successfully
+    seed: Optional[int] = None
+
+
+@dataclass
+class SeedResult:
+    seed: int
+    success: bool
+    tests: int
+    errors: int
+    failures: int
+    time: float
+    total_sim_time_ns: float
+    ratio_time: float
+
+    @staticmethod
+    def from_results_files(seed: int, results_xml_files: Sequence[Path]) -> "SeedResult":
+        test_suites = []
+        for results_xml in results_xml_files:
+            if results_xml.exists():
+                test_suites += TestResults.parse_results(results_xml).test_suites
+        results = TestResults.from_test_suites(test_suites)
+        return SeedResult(
+            seed,
+            success=results.success and results.tests > 0,
+            tests=results.tests,
+            errors=results.errors,
+            failures=results.failures,
+            time=results.time,
+            total_sim_time_ns=results.total_sim_time_ns,
+            ratio_time=results.ratio_time,
+        )
+
+
 @dataclass
 class TestResults:
     tests: int
@@ -79,11 +126,18 @@ class TestResults:
     time: float
     total_sim_time_ns: float
     test_suites: List[TestSuite]
+    shards: List[ShardResult] = field(default_factory=list)
+    seeds: List[SeedResult] = field(default_factory=list)
 
     @property
     def success(self):
         return not self.errors and not self.failures
 
+    @property
+    def ratio_time(self) -> float:
+        """simulated time (ns) per second"""
+        return self.total_sim_time_ns / self.time if self.time > 0 else 0.0
+
     @staticmethod
     def from_test_suites(test_suites: List[TestSuite]) -> "TestResults":
         tests = 0
@@ -109,6 +163,9 @@ class TestResults:
         results = []
         for ts in tree.iter("testsuite"):
             random_seed = ts.get("random_seed")
+            for prop in ts.iter("property"):
+                if random_seed is None and prop.get("name") == "random_seed":
+                    random_seed = prop.get("value")
             test_cases = []
             num_errors = 0
             num_failures = 0
@@ -117,7 +174,7 @@ class TestResults:
             for tc in ts.iter("testcase"):
                 sim_time_ns_ = tc.get("sim_time_ns")
                 sim_time_ns: Optional[float] = None
-                if sim_time_ns is None:
+                if sim_time_ns_ is None:
                     sim_time_ps = tc.get("sim_time_ps")
                     if sim_time_ps is not None:
                         try:
@@ -162,6 +219,78 @@ class TestResults:
         return TestResults.from_test_suites(results)
 
 
+def merge_results_xml(
+    results_xml_files: Sequence[Union[str, os.PathLike]], merged_xml: Union[str, os.PathLike]
+) -> None:
+    """Merge the test suites of several results files (e.g., of test shards) into one file"""
+    root = ElementTree.Element("testsuites", name="results")
+    for results_xml in results_xml_files:
+        if Path(results_xml).exists():
+            root.extend(ElementTree.parse(results_xml).getroot().iter("testsuite"))
+    ElementTree.ElementTree(root).write(merged_xml, encoding="utf-8", xml_declaration=True)
+
+
+def discover_tests(module_file: Union[str, os.PathLike]) -> List[str]:
+    """Names of the tests (functions decorated with `cocotb.test`) of a cocotb test module.
+    Tests generated at runtime (e.g., using a TestFactory) are not discovered."""
+    with open(module_file) as f:
+        tree = ast.parse(f.read(), str(module_file))
+    tests = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorator = decorator.func
+            name: Optional[str] = None
+            if isinstance(decorator, ast.Attribute):
+                name = decorator.attr
+            elif isinstance(decorator, ast.Name):
+                name = decorator.id
+            if name == "test":
+                tests.append(node.name)
+                break
+    return tests
+
+
+def balance_shards(
+    tests: Sequence[str], times: Mapping[str, float], num_shards: int
+) -> List[List[str]]:
+    """Split the tests into at most `num_shards` (non-empty) shards with similar total runtimes:
+    the longest remaining test is added to the shard with the least total runtime.
+    Tests without a known runtime are assumed to take the average runtime of the others.
+    Each shard keeps the original order of its tests."""
+    known = [times[t] for t in tests if t in times]
+    default_time = sum(known) / len(known) if known else 1.0
+    shards: List[List[str]] = [[] for _ in range(min(num_shards, len(tests)))]
+    if not shards:
+        return []
+    totals = [0.0] * len(shards)
+    for test in sorted(tests, key=lambda t: times.get(t, default_time), reverse=True):
+        i = totals.index(min(totals))
+        shards[i].append(test)
+        totals[i] += times.get(test, default_time)
+    order = {t: i for i, t in enumerate(tests)}
+    return [sorted(shard, key=order.__getitem__) for shard in shards]
+
+
+class CocotbTestTimes:
+    """Runtimes of the tests of a cocotb test module in the previous runs of a design"""
+
+    def __init__(self, design: str, module: str, root: Optional[Path] = None) -> None:
+        if root is None:
+            root = cache_dir("cocotb")
+        self.path = root / re.sub(r"[^\w.-]+", "_", f"{design}__{module}.json")
+        times = load_cache_file(self.path, "test runtimes")
+        self.times: Dict[str, float] = times if isinstance(times, dict) else {}
+
+    def update(self, results: TestResults) -> None:
+        for suite in results.test_suites:
+            for tc in suite.test_cases:
+                self.times[tc.name] = tc.time
+        save_cache_file(self.path, self.times, "test runtimes")
+
+
 class Cocotb(CocotbSettings, Tool):
     """Cocotb support for a SimFlow"""
 
@@ -300,6 +429,20 @@ class Cocotb(CocotbSettings, Tool):
             log.debug("Cocotb env: %s", environ)
         return environ
 
+    @staticmethod
+    def test_module_files(env: Mapping[str, Any]) -> Dict[str, Path]:
+        """Source files of the test modules of a cocotb environment (see `env`), by module name"""
+        modules = str(env.get("COCOTB_TEST_MODULES") or env.get("MODULE") or "")
+        py_path = str(env.get("PYTHONPATH") or "").split(os.pathsep)
+        files = {}
+        for module in filter(None, (m.strip() for m in modules.split(","))):
+            rel_path = Path(*module.split(".")).with_suffix(".py")
+            for d in py_path:
+                if d and (Path(d) / rel_path).exists():
+                    files[module] = Path(d) / rel_path
+                    break
+        return files
+
     @cached_property
     def results(self) -> Optional[TestResults]:
         results_xml = Path(self.results_xml)
@@ -318,12 +461,26 @@ class Cocotb(CocotbSettings, Tool):
             flow_results[prefix + "skipped"] = results.skipped
             flow_results[prefix + "time"] = results.time
             flow_results[prefix + "sim_time_ns"] = results.total_sim_time_ns
+            flow_results[prefix + "ratio_time"] = results.ratio_time
+            if results.shards:
+                flow_results[prefix + "shards"] = [asdict(shard) for shard in results.shards]
+            failing_seeds = [r.seed for r in results.seeds if not r.success]
+            if results.seeds:
+                flow_results[prefix + "seeds"] = [asdict(seed) for seed in results.seeds]
+                flow_results[prefix + "failing_seeds"] = failing_seeds
+                log.info(
+                    "Cocotb: %d of %d seed(s) passed",
+                    len(results.seeds) - len(failing_seeds),
+                    len(results.seeds),
+                )
             if results.errors:
                 log.error("Cocotb: %d error(s)", results.errors)
                 return False
             if results.failures:
                 log.critical("Cocotb: %d failure(s)", results.failures)
                 return False
+            if failing_seeds:
+                return False
             flow_results["success"] = True
             return True
         else:
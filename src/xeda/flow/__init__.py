@@ -10,13 +10,14 @@ from .flow import (
 
 # from .decorators import define_flow, sim_flow, synth_flow
 from .fpga import FPGA
-from .sim import SimFlow
+from .sim import SimFlow, SimRun
 from .synth import AsicSynthFlow, FpgaSynthFlow, PhysicalClock, SynthFlow
 
 __all__ = [
     "Flow",
     "FPGA",
     "SimFlow",
+    "SimRun",
     "SynthFlow",
     "FpgaSynthFlow",
     "AsicSynthFlow",
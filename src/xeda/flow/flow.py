@@ -19,6 +19,8 @@ from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
 
 from ..dataclass import Field, ValidationError, XedaBaseModel, validation_errors, validator
 from ..design import Design
+from ..limits import parse_size
+from ..tracing import span
 from ..utils import (
     XedaException,
     camelcase_to_snakecase,
@@ -67,6 +69,14 @@ class Flow(metaclass=ABCMeta):
     aliases: List[str] = []  # list of alternative names for the flow
     incremental: bool = False
     copied_resources_dir: str = "copied_resources"
+    # How the flow uses the job tokens of a jobserver (see xeda.jobserver):
+    #  "threads": tools are multithreaded, `settings.nthreads` is sized from the tokens held
+    #  "make": tools are GNU make jobserver clients and acquire their own additional tokens
+    #  None: tools are single-threaded
+    parallelism: Optional[str] = None
+    # stages of the flow, in order, mapped to regular expressions matching the line of tool output
+    # which marks the start of the stage (see xeda.progress)
+    stage_markers: Dict[str, str] = {}
 
     class Settings(XedaBaseModel):
         """Settings that can affect flow's behavior"""
@@ -112,6 +122,20 @@ class Flow(metaclass=ABCMeta):
         dockerized: bool = Field(False, description="Run tools from docker")
         print_commands: bool = Field(True, description="Print executed commands")
         console_colors: bool = Field(True, description="Print executed commands")
+        memory_limit: Optional[int] = Field(
+            None,
+            description="Maximum memory of each tool process, in bytes or with a K/M/G/T suffix, e.g., '16G'.",
+        )
+        cpu_quota: Optional[float] = Field(
+            None,
+            description="Maximum CPU bandwidth of each tool process, in number of CPUs (requires cgroup v2).",
+        )
+        cpu_time_limit: Optional[int] = Field(
+            None, description="Maximum CPU time of each tool process, in seconds."
+        )
+        max_open_files: Optional[int] = Field(
+            None, description="Maximum number of open files of each tool process."
+        )
 
         @validator("*", pre=True, always=False)
         def _all_fields_validator_subs_env_vars(
@@ -144,6 +168,10 @@ class Flow(metaclass=ABCMeta):
                     )
             return value
 
+        @validator("memory_limit", pre=True)
+        def _validate_memory_limit(cls, value):
+            return parse_size(value)
+
         @validator("verbose", pre=True, always=True)
         def _validate_verbose(cls, value):
             if not isinstance(value, int):
@@ -349,12 +377,13 @@ class Flow(metaclass=ABCMeta):
         script_path = Path(script_filename) if script_filename else self.run_path / resource_name
 
         log.debug("generating %s from template.", str(script_path.resolve()))
-        rendered_content = template.render(
-            settings=self.settings,
-            design=self.design,
-            artifacts=self.artifacts,
-            **kwargs,
-        )
+        with span("copy_from_template", template=resource_name):
+            rendered_content = template.render(
+                settings=self.settings,
+                design=self.design,
+                artifacts=self.artifacts,
+                **kwargs,
+            )
         with open(script_path, "w") as f:
             f.write(rendered_content)
         return script_path.resolve().relative_to(self.run_path)
@@ -2,27 +2,65 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import os
+import random
+import time
 from abc import ABCMeta
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
-from ..cocotb import Cocotb, CocotbSettings
-from ..dataclass import Field, validator
+from ..cocotb import (
+    Cocotb,
+    CocotbSettings,
+    CocotbTestTimes,
+    SeedResult,
+    ShardResult,
+    balance_shards,
+    discover_tests,
+    merge_results_xml,
+)
+from ..dataclass import Field, XedaBaseModel, validator
 from ..design import Design
+from ..limits import process_limiter
+from ..proc_utils import run_process_async, unlocked
+from ..tool import Tool
 from .flow import Flow
 
 log = logging.getLogger(__name__)
 
 __all__ = [
     "SimFlow",
+    "SimRun",
 ]
 
 
+class SimRun(XedaBaseModel):
+    """A simulation run in a batch of runs of the same compiled model (see `SimFlow.Settings.runs`)"""
+
+    name: Optional[str] = Field(
+        None, description="Name of the run, used as the name of its log file. Default: run<INDEX>"
+    )
+    args: List[str] = Field([], description="Additional arguments, e.g., plusargs")
+    env: Dict[str, str] = Field({}, description="Additional environment variables")
+    stop_time: Union[None, str, int, float] = None
+    seed: Optional[int] = None
+
+
+class _SimJob(NamedTuple):
+    tag: str
+    seed: Optional[int]
+    tests: Optional[List[str]]
+    run: Optional[SimRun]
+
+
 class SimFlow(Flow, metaclass=ABCMeta):
     """superclass of all simulation flows"""
 
     cocotb_sim_name: Optional[str] = None
+    failing_seeds_file = "failing_seeds.json"
 
     class Settings(Flow.Settings):
         vcd: Union[None, str, Path] = Field(
@@ -31,6 +69,14 @@ class SimFlow(Flow, metaclass=ABCMeta):
         stop_time: Union[None, str, int, float] = None
         cocotb: CocotbSettings = CocotbSettings()  # type: ignore
         optimization_flags: List[str] = Field([], description="Optimization flags")
+        seeds: Union[None, int, List[int]] = Field(
+            None,
+            description="Run the cocotb tests with each of these random seeds, or with this number of random seeds, in concurrent simulator processes using the same compiled model. Failing seeds are saved to failing_seeds.json.",
+        )
+        runs: List[SimRun] = Field(
+            [],
+            description="Build the simulation model once, then run it with each of these run specifications (arguments, environment, stop_time, seed), in up to `nthreads` concurrent processes. The output of each run is written to <NAME>.log",
+        )
 
         @validator("vcd", pre=True)
         def _validate_vcd(cls, vcd):  # pylint: disable=no-self-argument
@@ -44,6 +90,14 @@ class SimFlow(Flow, metaclass=ABCMeta):
                         vcd += ".vcd"
             return vcd
 
+        @validator("seeds")
+        def _validate_seeds(cls, seeds):  # pylint: disable=no-self-argument
+            # runs with the same seed would write the same results files
+            if isinstance(seeds, list) and len(set(seeds)) != len(seeds):
+                log.warning("Ignoring duplicate seeds: %s", seeds)
+                seeds = list(dict.fromkeys(seeds))
+            return seeds
+
     def __init__(
         self,
         settings: Union[Settings, Dict],
@@ -64,3 +118,203 @@ class SimFlow(Flow, metaclass=ABCMeta):
             if self.cocotb_sim_name and self.design.tb.cocotb
             else None
         )
+
+    def cocotb_shards(self, env: Dict[str, Any]) -> List[List[str]]:
+        """Tests of each shard, if the cocotb tests are to be run in multiple simulator processes"""
+        assert isinstance(self.settings, self.Settings)
+        num_shards = self.settings.cocotb.shards or os.cpu_count() or 1
+        if not self.cocotb or num_shards <= 1:
+            return []
+        if self.settings.vcd or self.cocotb.coverage:
+            log.warning(
+                "cocotb tests are not sharded when dumping waveforms or collecting coverage"
+            )
+            return []
+        tb_cocotb = self.design.tb.cocotb
+        assert tb_cocotb is not None
+        tests = list(self.cocotb.testcase or tb_cocotb.testcase)
+        module_files = Cocotb.test_module_files(env)
+        if not tests:
+            for module_file in module_files.values():
+                tests += discover_tests(module_file)
+        if len(tests) <= 1:
+            return []
+        times: Dict[str, float] = {}
+        for module in module_files:
+            times.update(CocotbTestTimes(self.design.name, module).times)
+        return balance_shards(tests, times, num_shards)
+
+    def record_test_times(self, env: Dict[str, Any]) -> None:
+        if self.cocotb and self.cocotb.results:
+            for module in Cocotb.test_module_files(env):
+                CocotbTestTimes(self.design.name, module).update(self.cocotb.results)
+
+    def sim_seeds(self) -> List[int]:
+        """Random seeds of the simulation runs (`seeds` setting), or an empty list"""
+        assert isinstance(self.settings, self.Settings)
+        seeds = self.settings.seeds
+        if seeds is None or not self.cocotb:
+            return []
+        if isinstance(seeds, int):
+            return random.sample(range(1, 1 << 31), seeds)
+        return list(seeds)
+
+    def sim_run_args(self, run: SimRun) -> List[str]:
+        """Simulator arguments implementing the `stop_time` and `seed` of a batch run. Flows which
+        support them override this method."""
+        if run.stop_time is not None or (run.seed is not None and not self.cocotb):
+            log.warning("%s does not support the stop_time or seed of simulation runs", self.name)
+        return []
+
+    def run_sim(self, tool: Tool, *args: Any, env: Optional[Dict[str, Any]] = None) -> None:
+        """Run the simulation: `tool` with `args`. If the cocotb tests are sharded (see
+        `cocotb.shards`), run with multiple random seeds (see `seeds`), or a batch of `runs` is
+        specified, a simulator process runs each shard (of each seed, of each run) concurrently,
+        using the same compiled model, and their results are merged."""
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        env = env or {}
+        seeds = self.sim_seeds()
+        shards = self.cocotb_shards(env) if self.cocotb else []
+        if not shards and not seeds and not ss.runs:
+            tool.run(*args, env=env)
+            self.record_test_times(env)
+            return
+        jobs: List[_SimJob] = []
+        job_seeds: List[Optional[int]] = [*seeds] or [None]
+        for r, run in enumerate(ss.runs or [None]):
+            for seed in job_seeds:
+                for i, tests in enumerate(shards or [None]):
+                    tag = ".".join(
+                        ([run.name or f"run{r}"] if run is not None else [])
+                        + ([f"seed{seed}"] if seed is not None else [])
+                        + ([f"shard{i}"] if tests is not None else [])
+                    )
+                    jobs.append(_SimJob(tag, seed, tests, run))
+        log.info(
+            "Running %d simulator processes (runs: %d, seeds: %s, shards: %d)",
+            len(jobs),
+            len(ss.runs),
+            ", ".join(map(str, seeds)) or "-",
+            len(shards),
+        )
+        if self.cocotb:
+            for job in jobs:
+                (self.run_path / f"results_{job.tag}.xml").unlink(missing_ok=True)
+            (self.run_path / self.failing_seeds_file).unlink(missing_ok=True)
+        shard_results: List[ShardResult] = []
+        run_results: List[Dict[str, Any]] = []
+        dockerized = bool(tool.docker and tool.dockerized)
+        if dockerized:
+            log.warning("Dockerized simulations run one after another")
+
+        def job_args(job: _SimJob) -> List[Any]:
+            if job.run is None:
+                return list(args)
+            return [*args, *job.run.args, *self.sim_run_args(job.run)]
+
+        def job_env(job: _SimJob) -> Dict[str, Any]:
+            overrides: Dict[str, Any] = {}
+            seed = job.seed
+            if job.run is not None:
+                overrides.update(job.run.env)
+                if job.run.seed is not None and seed is None:
+                    seed = job.run.seed
+            if self.cocotb:
+                overrides.update(COCOTB_RESULTS_FILE=f"results_{job.tag}.xml")
+                if job.tests is not None:
+                    tests = ",".join(job.tests)
+                    overrides.update(TESTCASE=tests, COCOTB_TESTCASE=tests)
+                if seed is not None:
+                    overrides.update(RANDOM_SEED=seed, COCOTB_RANDOM_SEED=seed)
+            return {**env, **overrides}
+
+        def job_stdout(job: _SimJob) -> Optional[Path]:
+            return self.run_path / f"{job.tag}.log" if job.run is not None else None
+
+        def add_job_result(i: int, start: float, success: bool) -> None:
+            job = jobs[i]
+            elapsed = time.monotonic() - start
+            if job.tests is not None:
+                index = i % len(shards)
+                shard_results.append(ShardResult(index, job.tests, elapsed, success, job.seed))
+            if job.run is not None:
+                run_results.append(
+                    dict(name=job.tag, success=success, time=elapsed, log=f"{job.tag}.log")
+                )
+
+        async def run_job(i: int, semaphore: asyncio.Semaphore) -> None:
+            job = jobs[i]
+            async with semaphore:
+                start = time.monotonic()
+                success = False
+                try:
+                    await run_process_async(
+                        tool.executable,
+                        [*tool.default_args, *job_args(job)],
+                        env={**os.environ, **job_env(job)},
+                        stdout=job_stdout(job),
+                        cwd=self.run_path,
+                        print_command=tool.print_command,
+                        tag=job.tag,
+                        limiter=process_limiter(),
+                    )
+                    success = True
+                finally:
+                    add_job_result(i, start, success)
+
+        async def run_jobs() -> List[Any]:
+            semaphore = asyncio.Semaphore(ss.nthreads or os.cpu_count() or 1)
+            return await asyncio.gather(
+                *(run_job(i, semaphore) for i in range(len(jobs))), return_exceptions=True
+            )
+
+        outcomes: List[Any] = []
+        if dockerized:
+            for i, job in enumerate(jobs):
+                start = time.monotonic()
+                try:
+                    tool.run(*job_args(job), env=job_env(job), stdout=job_stdout(job))
+                    add_job_result(i, start, True)
+                except Exception as e:  # pylint: disable=broad-except
+                    add_job_result(i, start, False)
+                    outcomes.append(e)
+        else:
+            with unlocked():
+                outcomes = asyncio.run(run_jobs())
+        if run_results:
+            order = {job.tag: i for i, job in enumerate(jobs)}
+            self.results["runs"] = sorted(run_results, key=lambda r: order[r["name"]])
+            failed_runs = [r["name"] for r in self.results["runs"] if not r["success"]]
+            if failed_runs:
+                log.error("Failed simulation runs: %s", ", ".join(failed_runs))
+        if self.cocotb:
+            self.merge_cocotb_results(jobs, seeds, shard_results)
+        self.record_test_times(env)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+    def merge_cocotb_results(
+        self, jobs: List[_SimJob], seeds: List[int], shard_results: List[ShardResult]
+    ) -> None:
+        assert self.cocotb
+        results_files = [self.run_path / f"results_{job.tag}.xml" for job in jobs]
+        merge_results_xml(results_files, self.run_path / self.cocotb.results_xml)
+        self.cocotb.invalidate_cached_properties()
+        results = self.cocotb.results
+        if results:
+            results.shards = sorted(shard_results, key=lambda r: (r.seed or 0, r.index))
+            for seed in seeds:
+                seed_files = [f for f, job in zip(results_files, jobs) if job.seed == seed]
+                results.seeds.append(SeedResult.from_results_files(seed, seed_files))
+            failing_seeds = [r.seed for r in results.seeds if not r.success]
+            if failing_seeds:
+                log.error(
+                    "Failed with seed(s) %s. Rerun with the setting cocotb.random_seed=<SEED> to"
+                    " reproduce. Saved to %s",
+                    ", ".join(map(str, failing_seeds)),
+                    self.failing_seeds_file,
+                )
+                with open(self.run_path / self.failing_seeds_file, "w") as f:
+                    json.dump(failing_seeds, f)
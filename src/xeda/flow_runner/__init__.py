@@ -10,6 +10,7 @@ from .default_runner import (
     scrub_runs,
 )
 from .dse import Dse
+from .results_db import ResultsDB
 
 __all__ = [
     "dse",
@@ -22,4 +23,5 @@ __all__ = [
     "add_file_logger",
     "DIR_NAME_HASH_LEN",
     "scrub_runs",
+    "ResultsDB",
 ]
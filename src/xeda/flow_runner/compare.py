@@ -0,0 +1,218 @@
+"""Detection of QoR and runtime regressions between two sets of flow runs (e.g., before and after
+upgrading a tool). Runs are aligned by their design and flow, and their (flattened) metrics are
+compared according to rules, which define the better direction and the tolerated changes."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from ..utils import XedaException, toml_load
+from .export import iter_run_records, run_record
+from .results_db import ResultsDB
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_RULES",
+    "MetricDiff",
+    "MetricRule",
+    "compare_runs",
+    "load_rules",
+    "load_runs",
+]
+
+RunKey = Tuple[str, str]  # (design, flow)
+
+
+@dataclass
+class MetricRule:
+    """Metrics (fnmatch pattern of flattened result names) and how to compare them.
+    A change for the worse is a regression if it exceeds both `rel` (relative to the baseline value)
+    and `abs` (in the units of the metric)."""
+
+    pattern: str
+    higher_is_better: bool = False
+    rel: float = 0.0
+    abs: float = 0.0
+
+    def is_regression(self, baseline: float, candidate: float) -> bool:
+        worse = baseline - candidate if self.higher_is_better else candidate - baseline
+        return worse > max(self.rel * abs(baseline), self.abs)
+
+    def is_improvement(self, baseline: float, candidate: float) -> bool:
+        return self.is_regression(candidate, baseline)
+
+
+# first matching rule applies; metrics not matching any rule are not compared
+DEFAULT_RULES: List[MetricRule] = [
+    MetricRule("Fmax", higher_is_better=True, rel=0.02),
+    MetricRule("f_max", higher_is_better=True, rel=0.02),
+    MetricRule("wns", higher_is_better=True, abs=0.05),
+    MetricRule("whs", higher_is_better=True, abs=0.05),
+    MetricRule("tns", higher_is_better=True, abs=0.5),
+    MetricRule("worst_slack", higher_is_better=True, abs=0.05),
+    *(
+        MetricRule(p, rel=0.02)
+        for p in ("lut", "LUT", "ff", "FF", "slice", "bram*", "dsp", "DSP", "latch")
+    ),
+    MetricRule("*area", rel=0.02),
+    MetricRule("utilization", rel=0.02),
+    MetricRule("power", rel=0.05),
+    MetricRule("runtime", rel=0.1, abs=5.0),
+    MetricRule("steps.*.elapsed", rel=0.15, abs=5.0),
+    MetricRule("steps.*.cpu_time", rel=0.15, abs=5.0),
+    MetricRule("steps.*.peak_memory", rel=0.1, abs=50.0),
+]
+
+
+@dataclass
+class MetricDiff:
+    design: str
+    flow: str
+    metric: str
+    baseline: Any
+    candidate: Any
+    status: str  # "regressed", "improved", "unchanged", "missing"
+
+    @property
+    def change(self) -> Optional[float]:
+        """relative change"""
+        if isinstance(self.baseline, (int, float)) and isinstance(self.candidate, (int, float)):
+            if self.baseline:
+                return (self.candidate - self.baseline) / abs(self.baseline)
+        return None
+
+
+def load_rules(
+    path: Union[None, str, os.PathLike] = None, thresholds: Mapping[str, float] = {}
+) -> List[MetricRule]:
+    """Rules from a TOML file (tables of metric patterns with the keys higher_is_better, rel, and
+    abs), followed by DEFAULT_RULES. `thresholds` (pattern -> relative threshold) overrides `rel`
+    of the matching rules, or adds a lower-is-better rule."""
+    rules: List[MetricRule] = []
+    if path:
+        for pattern, attrs in toml_load(path).items():
+            if not isinstance(attrs, dict):
+                raise XedaException(f"Invalid rule for '{pattern}' in {path}")
+            rules.append(MetricRule(pattern, **attrs))
+    rules += [MetricRule(r.pattern, r.higher_is_better, r.rel, r.abs) for r in DEFAULT_RULES]
+    for pattern, rel in thresholds.items():
+        matched = [r for r in rules if r.pattern == pattern]
+        for r in matched:
+            r.rel = rel
+        if not matched:
+            rules.insert(0, MetricRule(pattern, rel=rel))
+    return rules
+
+
+def _latest(records: Iterable[Dict[str, Any]]) -> Dict[RunKey, Dict[str, Any]]:
+    runs: Dict[RunKey, Dict[str, Any]] = {}
+    for record in records:
+        key = (str(record.get("design")), str(record.get("flow")))
+        prev = runs.get(key)
+        if prev is None or str(record.get("timestamp") or "") > str(prev.get("timestamp") or ""):
+            runs[key] = record
+    return runs
+
+
+def load_runs(
+    spec: Union[str, os.PathLike],
+    xeda_run_dir: Union[str, os.PathLike] = "xeda_run",
+    design: Optional[str] = None,
+    flow: Optional[str] = None,
+) -> Dict[RunKey, Dict[str, Any]]:
+    """Latest run of each (design, flow) of a set of runs, as flat records. `spec` is either
+    "tag:<TAG>" (runs with this tag in the results database of `xeda_run_dir`), a results database
+    file, a run directory (or its results.json), or a directory of runs (e.g., a xeda_run)."""
+    spec_str = str(spec)
+    if spec_str.startswith("tag:"):
+        db = ResultsDB.of_run_dir(xeda_run_dir)
+        if not db.path.exists():
+            raise XedaException(f"No results database in {xeda_run_dir} for selecting {spec_str}")
+        records = (
+            run_record(r["results"], r["settings"])
+            for r in db.iter_query(design=design, flow=flow, tag=spec_str[4:])
+        )
+        return _latest(records)
+    path = Path(spec)
+    if path.is_file() and path.suffix == ".db":
+        db = ResultsDB(path)
+        return _latest(
+            run_record(r["results"], r["settings"]) for r in db.iter_query(design=design, flow=flow)
+        )
+    if path.name == "results.json":
+        path = path.parent
+    if (path / "results.json").exists():
+        return _latest([_read_run(path)])
+    if path.is_dir():
+        return _latest(iter_run_records(path, design=design, flow=flow))
+    raise XedaException(f"Could not find any runs in {spec_str}")
+
+
+def _read_run(run_path: Path) -> Dict[str, Any]:
+    """Record of a single run directory"""
+    try:
+        with open(run_path / "results.json") as f:
+            results = json.load(f)
+        settings = None
+        if (run_path / "settings.json").exists():
+            with open(run_path / "settings.json") as f:
+                settings = json.load(f)
+    except (OSError, ValueError) as e:
+        raise XedaException(f"Failed to read the results of {run_path}: {e}") from e
+    return run_record(results, settings)
+
+
+def _numeric(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def compare_runs(
+    baseline: Mapping[RunKey, Mapping[str, Any]],
+    candidate: Mapping[RunKey, Mapping[str, Any]],
+    rules: Sequence[MetricRule] = DEFAULT_RULES,
+) -> List[MetricDiff]:
+    """Differences of the metrics of runs (of the same design and flow) in `baseline` and
+    `candidate`. A successful baseline run which failed in the candidates is reported as a
+    regression of "success", and metrics (or runs) which are missing in the candidates as "missing".
+    """
+    diffs: List[MetricDiff] = []
+    rule_cache: Dict[str, Optional[MetricRule]] = {}
+
+    def rule_of(metric: str) -> Optional[MetricRule]:
+        if metric not in rule_cache:
+            rule_cache[metric] = next((r for r in rules if fnmatchcase(metric, r.pattern)), None)
+        return rule_cache[metric]
+
+    for key in sorted(baseline):
+        base = baseline[key]
+        design, flow = key
+        cand = candidate.get(key)
+        if cand is None:
+            diffs.append(MetricDiff(design, flow, "success", base.get("success"), None, "missing"))
+            continue
+        if base.get("success") and not cand.get("success"):
+            diffs.append(
+                MetricDiff(design, flow, "success", True, cand.get("success"), "regressed")
+            )
+            continue
+        for metric, b in base.items():
+            rule = rule_of(metric)
+            if rule is None or not _numeric(b):
+                continue
+            c = cand.get(metric)
+            if c is None or not _numeric(c):
+                diffs.append(MetricDiff(design, flow, metric, b, c, "missing"))
+            elif rule.is_regression(b, c):
+                diffs.append(MetricDiff(design, flow, metric, b, c, "regressed"))
+            elif rule.is_improvement(b, c):
+                diffs.append(MetricDiff(design, flow, metric, b, c, "improved"))
+            else:
+                diffs.append(MetricDiff(design, flow, metric, b, c, "unchanged"))
+    return diffs
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import importlib
 import json
 import logging
@@ -9,7 +11,9 @@ import os
 from pprint import PrettyPrinter
 import re
 import shutil
+import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime, timedelta
 from glob import glob
@@ -24,10 +28,15 @@ from rich.table import Table
 from rich.text import Text
 
 from ..console import console
-from ..dataclass import XedaBaseModel
+from ..dataclass import Field, XedaBaseModel
 from ..design import Design, DesignFileParseError, AnyDesignValidationException
 from ..flow import Flow, FlowDependencyFailure, registered_flows
+from ..jobserver import Jobserver
+from ..limits import ResourceLimits
+from ..progress import ProgressCallback, ProgressMonitor, RuntimeHistory
+from ..proc_utils import EventLoopBridge, unlocked
 from ..tool import NonZeroExitCode
+from ..tracing import PhaseTimer, active_tracer, span, start_tracing, stop_tracing
 from ..utils import (
     WorkingDirectory,
     backup_existing,
@@ -39,6 +48,7 @@ from ..utils import (
 )
 from ..version import __version__
 from ..xedaproject import XedaProject
+from .results_db import ResultsDB
 
 __all__ = [
     "get_flow_class",
@@ -53,6 +63,8 @@ log = logging.getLogger(__name__)
 
 DIR_NAME_HASH_LEN = 16
 
+_thread_state = threading.local()
+
 
 def print_results(
     flow: Optional[Flow] = None,
@@ -83,6 +95,7 @@ def print_results(
         "tools",
         "run_path",
         "artifacts",
+        "timing",
     ]
     for k, v in results.items():
         skipable = skip_if_false and (isinstance(skip_if_false, bool) or k in skip_if_false)
@@ -236,6 +249,26 @@ class FlowLauncher:
         # remove previous flow directories _before_ running the flow:
         scrub_old_runs: bool = False
         run_path: Optional[Union[str, os.PathLike]] = None
+        jobs: Optional[int] = Field(
+            None,
+            description="Total number of CPU job tokens shared by all flows (and their tools) launched by this launcher, using a make-style jobserver. Disabled if not set.",
+        )
+        progress_events: bool = Field(
+            True,
+            description="Write progress events of flows (stage, elapsed time, and estimated remaining time) to 'progress.jsonl' in the run directory of each flow.",
+        )
+        run_tag: Optional[str] = Field(
+            None,
+            description="Label of the launched runs (e.g., a tool version or a release), saved in their settings.json and the results database, and used for selecting runs to compare. Runs with different tags get separate run directories.",
+        )
+        results_db: bool = Field(
+            True,
+            description="Index the results and settings of all runs in an SQLite database ('results.db' in xeda_run_dir), which is also used for looking up previous results.",
+        )
+        profile_trace: Optional[Path] = Field(
+            None,
+            description="Record profiling spans of the runner, flows, and tools to this file, in the Chrome trace event format (viewable in Perfetto).",
+        )
 
     def __init__(self, xeda_run_dir: Union[None, str, Path] = None, **kwargs) -> None:
         if "xeda_run_dir" in kwargs:
@@ -256,6 +289,23 @@ class FlowLauncher:
             self.settings.incremental = True
             self.settings.post_cleanup = False
             self.settings.scrub_old_runs = False
+        if self.settings.profile_trace is not None:
+            self.settings.profile_trace = self.settings.profile_trace.resolve()
+        self.results_db: Optional[ResultsDB] = (
+            ResultsDB.of_run_dir(xeda_run_dir) if self.settings.results_db else None
+        )
+        self.jobserver: Optional[Jobserver] = (
+            Jobserver(self.settings.jobs) if self.settings.jobs else None
+        )
+        # expected number of flows running concurrently, used for sharing job tokens
+        self.concurrency: int = 1
+        self._flows_in_flight = 0
+        # called with each progress event of the launched flows (see xeda.progress)
+        self.progress_callbacks: List[ProgressCallback] = []
+
+    def add_progress_callback(self, callback: ProgressCallback) -> None:
+        """`callback` will be called with each progress event (a dict) of the launched flows"""
+        self.progress_callbacks.append(callback)
 
     def get_flow_run_path(
         self,
@@ -271,6 +321,9 @@ class FlowLauncher:
                 design_subdir += f"_{design_hash[:DIR_NAME_HASH_LEN]}"
             if flowrun_hash:
                 flow_subdir += f"_{flowrun_hash[:DIR_NAME_HASH_LEN]}"
+        elif self.settings.run_tag:
+            # otherwise the tag is part of flowrun_hash
+            flow_subdir += f"_{sanitize_filename(self.settings.run_tag)}"
 
         run_path: Path = self.xeda_run_dir / sanitize_filename(design_subdir) / flow_subdir
         return run_path
@@ -288,18 +341,46 @@ class FlowLauncher:
         """
         Low-level interface for launching flows.
         """
-        self.debug |= self.settings.debug
         if isinstance(flow_class, str):
             flow_class = get_flow_class(flow_class)
+        with span(flow_class.name, "flow", design=design.name):
+            return self._launch_flow(
+                flow_class,
+                design,
+                flow_settings,
+                depender,
+                copy_resources,
+                run_path,
+                all_flows_settings,
+            )
+
+    def _launch_flow(
+        self,
+        flow_class: Type[Flow],
+        design: Design,
+        flow_settings: Union[None, Dict[str, Any], Flow.Settings],
+        depender: Optional[Flow],
+        copy_resources: List[str],
+        run_path: Optional[Path],
+        all_flows_settings: Union[None, Dict],
+    ) -> Flow:
+        self.debug |= self.settings.debug
+        timer = PhaseTimer()
+        # time spent loading the design by `run`, only for the top-level flow
+        load_design_time = getattr(_thread_state, "load_design_time", None)
+        _thread_state.load_design_time = None
+        if load_design_time is not None:
+            timer.add("load_design", load_design_time)
         flow_name = flow_class.name
         if flow_settings is None:
             flow_settings = {}
         runner_cwd = Path.cwd()
-        if isinstance(flow_settings, dict):
-            flow_settings["runner_cwd_"] = runner_cwd
-            flow_settings = flow_class.Settings(**flow_settings)
-        elif isinstance(flow_settings, Flow.Settings):
-            flow_settings.runner_cwd_ = runner_cwd
+        with timer.phase("validation"):
+            if isinstance(flow_settings, dict):
+                flow_settings["runner_cwd_"] = runner_cwd
+                flow_settings = flow_class.Settings(**flow_settings)
+            elif isinstance(flow_settings, Flow.Settings):
+                flow_settings.runner_cwd_ = runner_cwd
         assert isinstance(flow_settings, Flow.Settings)
         if self.debug:
             log.debug(
@@ -314,22 +395,25 @@ class FlowLauncher:
             res for res in copy_resources if os.path.exists(res) and os.path.isfile(res)
         ]
 
-        # GOTCHA: design contains tb settings even for simulation flows
-        # OTOH removing tb from hash for sim flows creates a mismatch for different flows of the same design
-        design_hash = semantic_hash(
-            dict(
-                rtl_hash=design.rtl_hash,
-                tb_hash=design.tb_hash,
+        with timer.phase("hash"):
+            # GOTCHA: design contains tb settings even for simulation flows
+            # OTOH removing tb from hash for sim flows creates a mismatch for different flows of the same design
+            design_hash = semantic_hash(
+                dict(
+                    rtl_hash=design.rtl_hash,
+                    tb_hash=design.tb_hash,
+                )
             )
-        )
-        flowrun_hash = semantic_hash(
-            dict(
+            flowrun_hash_data: Dict[str, Any] = dict(
                 flow_name=flow_name,
                 flow_settings=flow_settings,
                 # copied_resources=[FileResource(res) for res in copy_resources],
                 # xeda_version=__version__,
-            ),
-        )
+            )
+            if self.settings.run_tag:
+                # tagged runs (e.g., of different tool versions) never replace each other
+                flowrun_hash_data["run_tag"] = self.settings.run_tag
+            flowrun_hash = semantic_hash(flowrun_hash_data)
         if run_path is None:
             run_path = self.get_flow_run_path(
                 design.name,
@@ -347,58 +431,65 @@ class FlowLauncher:
         results_json = run_path / "results.json"
 
         previous_results = None
-        if (
-            (depender or self.settings.skip_if_previous_run_exists)
-            and self.settings.cached_dependencies
-            and run_path.exists()
-            and settings_json.exists()
-            and results_json.exists()
-        ):
-            prev_results, prev_settings = None, None
-            try:
-                with open(settings_json) as f:
-                    prev_settings = json.load(f)
-                with open(results_json) as f:
-                    prev_results = json.load(f)
-            except TypeError:
-                pass
-            except ValueError:
-                pass
-            if prev_results and prev_results.get("success") and prev_settings:
-                if (
-                    prev_settings.get("flow_name") == flow_name
-                    and prev_settings.get("design_hash") == design_hash
-                    and prev_settings.get("flowrun_hash") == flowrun_hash
-                ):
-                    previous_results = Box(prev_results)
+        with timer.phase("cache_lookup"):
+            if (
+                (depender or self.settings.skip_if_previous_run_exists)
+                and self.settings.cached_dependencies
+                and run_path.exists()
+                and settings_json.exists()
+                and results_json.exists()
+            ):
+                prev_results, prev_settings = None, None
+                record = self.results_db.get(run_path, up_to_date=True) if self.results_db else None
+                if record is not None:
+                    prev_results, prev_settings = record["results"], record["settings"]
+                else:
+                    try:
+                        with open(settings_json) as f:
+                            prev_settings = json.load(f)
+                        with open(results_json) as f:
+                            prev_results = json.load(f)
+                    except TypeError:
+                        pass
+                    except ValueError:
+                        pass
+                if prev_results and prev_results.get("success") and prev_settings:
+                    if (
+                        prev_settings.get("flow_name") == flow_name
+                        and prev_settings.get("design_hash") == design_hash
+                        and prev_settings.get("flowrun_hash") == flowrun_hash
+                    ):
+                        previous_results = Box(prev_results)
+                    else:
+                        log.warning(
+                            "%s does not contain the expected flow and/or design hash.",
+                            str(settings_json.absolute()),
+                        )
                 else:
                     log.warning(
-                        "%s does not contain the expected flow and/or design hash.",
-                        str(settings_json.absolute()),
+                        "No valid previous results found in %s. Running %s from scratch.",
+                        run_path,
+                        flow_name,
                     )
-            else:
-                log.warning(
-                    "No valid previous results found in %s. Running %s from scratch.",
-                    run_path,
-                    flow_name,
-                )
-        if self.settings.scrub_old_runs:
-            scrub_runs(flow_name, run_path.parent, [run_path])
-        if not previous_results and run_path.exists():
-            if not self.settings.incremental and self.settings.run_path is None:
-                if self.settings.backups:
-                    backup_existing(run_path)
-                else:
-                    rmtree(run_path)
-        if not run_path.exists():
-            run_path.mkdir(parents=True)
+        with timer.phase("setup"):
+            if self.settings.scrub_old_runs:
+                scrub_runs(flow_name, run_path.parent, [run_path])
+            if not previous_results and run_path.exists():
+                if not self.settings.incremental and self.settings.run_path is None:
+                    if self.settings.backups:
+                        backup_existing(run_path)
+                    else:
+                        rmtree(run_path)
+            if not run_path.exists():
+                run_path.mkdir(parents=True)
 
-        with WorkingDirectory(run_path):
-            log.debug("Instantiating flow from %s", flow_class)
-            flow = flow_class(flow_settings, design, run_path, runner_cwd=runner_cwd)
+            with WorkingDirectory(run_path):
+                log.debug("Instantiating flow from %s", flow_class)
+                flow = flow_class(flow_settings, design, run_path, runner_cwd=runner_cwd)
 
         flow.design_hash = design_hash
         flow.flow_hash = flowrun_hash
+        all_settings: Optional[Dict[str, Any]] = None  # unchanged, if using previous results
 
         flow.incremental = self.settings.incremental
         if flow.runner_cwd is None:  # redundant, but OK
@@ -422,20 +513,23 @@ class FlowLauncher:
             with WorkingDirectory(run_path):
                 if flow.settings.clean:
                     flow.clean()
-                flow.init()
+                with timer.phase("init"):
+                    flow.init()
 
+            all_settings = dict(
+                design=design,
+                design_hash=design_hash,
+                rtl_fingerprint=design.rtl_fingerprint,
+                rtl_hash=design.rtl_hash,
+                flow_name=flow_name,
+                flow_settings=flow_settings,
+                xeda_version=__version__,
+                flowrun_hash=flowrun_hash,
+            )
+            if self.settings.run_tag:
+                all_settings["tag"] = self.settings.run_tag
             if self.settings.dump_settings_json:
                 log.info("writing effective settings to %s", settings_json)
-                all_settings = dict(
-                    design=design,
-                    design_hash=design_hash,
-                    rtl_fingerprint=design.rtl_fingerprint,
-                    rtl_hash=design.rtl_hash,
-                    flow_name=flow_name,
-                    flow_settings=flow_settings,
-                    xeda_version=__version__,
-                    flowrun_hash=flowrun_hash,
-                )
                 dump_json(all_settings, settings_json, backup=self.settings.backups)
 
             copied_res_dir = run_path / flow_class.copied_resources_dir
@@ -444,6 +538,7 @@ class FlowLauncher:
             for res in copy_resources:
                 log.info("Copying %s to %s", str(res), str(copied_res_dir))
                 shutil.copy(res, copied_res_dir)
+            dependencies_timing: Dict[str, Any] = {}
             for dep_cls, dep_settings, dep_resources in flow.dependencies:
                 # NOTE this allows dependency flow to make changes to 'design'
                 # merge with existing self.flows[dep].settings
@@ -490,19 +585,25 @@ class FlowLauncher:
                     if not os.path.isabs(res):
                         res_path = os.path.join(flow.run_path.absolute(), res)
                         resources += glob(res_path)
-                completed_dep = self.launch_flow(
-                    dep_cls,
-                    design,
-                    dep_settings,
-                    depender=flow,
-                    copy_resources=resources,
-                    run_path=run_path / dep_cls.name if run_path else None,
-                    all_flows_settings=all_flows_settings,
-                )
+                with timer.phase("dependencies"):
+                    completed_dep = self.launch_flow(
+                        dep_cls,
+                        design,
+                        dep_settings,
+                        depender=flow,
+                        copy_resources=resources,
+                        run_path=run_path / dep_cls.name if run_path else None,
+                        all_flows_settings=all_flows_settings,
+                    )
                 if not completed_dep.succeeded:
                     log.critical("Dependency flow: %s failed!", dep_cls.name)
                     raise FlowDependencyFailure()
                 flow.completed_dependencies.append(completed_dep)
+                # a flow can depend on more than one run of the same flow
+                dep_key = completed_dep.name
+                if dep_key in dependencies_timing or dep_key == "total":
+                    dep_key = f"{dep_key}#{len(flow.completed_dependencies)}"
+                dependencies_timing[dep_key] = completed_dep.results.get("timing")
 
             flow.results["design"] = flow.design.name
             flow.results["design_hash"] = flow.design_hash
@@ -515,8 +616,16 @@ class FlowLauncher:
             with WorkingDirectory(run_path):
                 if flow.settings.reports_dir:
                     flow.settings.reports_dir.mkdir(exist_ok=True, parents=True)
+                limits = self.resource_limits(flow)
+                violations: List[Dict[str, Any]] = []
+                monitor = self.progress_monitor(flow, run_path)
                 try:
-                    flow.run()
+                    with self.job_tokens(flow), contextlib.ExitStack() as stack:
+                        if limits.is_set:
+                            violations = stack.enter_context(limits.activate())
+                        stack.enter_context(monitor.activate())
+                        stack.enter_context(timer.phase("run"))
+                        flow.run()
                 except NonZeroExitCode as e:
                     log.error(
                         "Execution of '%s' returned %d",
@@ -528,10 +637,18 @@ class FlowLauncher:
                         e.exit_code,
                     )
                     success = False
+                except BaseException:
+                    monitor.finish(success=False)
+                    raise
+                if violations:
+                    # can be used by the caller to retry with fewer concurrent flows
+                    flow.results["resource_limit_exceeded"] = violations
+                    success = False
                 if flow.init_time is not None:
                     flow.results.runtime = time.monotonic() - flow.init_time
                 try:
-                    success &= flow.parse_reports()
+                    with timer.phase("parse_reports"):
+                        success &= flow.parse_reports()
                 except Exception as e:  # pylint: disable=broad-except
                     log.critical("parse_reports threw an exception: %s", e)
                     if success:  # if so far so good this is a bug!
@@ -540,80 +657,151 @@ class FlowLauncher:
                     log.debug("Failure was reported in the parsed results.")
                 flow.results.success = success
                 flow.results.timestamp = flow.timestamp
+                monitor.finish(success)
+            if dependencies_timing:
+                timer.phases["dependencies"] = dict(
+                    total=timer.phases["dependencies"], **dependencies_timing
+                )
 
         for k, v in flow.artifacts.items():
             if not flow.results.artifacts.get(k):
                 flow.results.artifacts[k] = v
 
+        def record_timing():
+            flow.results["timing"] = dict(timer.phases, total=round(timer.elapsed, 6))
+
         if self.settings.display_results and flow.artifacts and flow.succeeded:
-            table = Table(
-                box=box.SIMPLE,
-                show_header=True,
-                show_edge=False,
-                show_footer=True,
-                collapse_padding=True,
-                pad_edge=False,
-            )
-            table.add_column(
-                "Artifacts:", justify="left", style="cyan", header_style="blue", no_wrap=False
-            )
-            table.add_column("", justify="left", style="green", no_wrap=False)
-
-            for k, v in flow.artifacts.items():
-                if isinstance(v, list) and v:
-                    v = [str(i) for i in v]
-                    table.add_row(v[0], end_section=len(v) == 1)
-                    for vi in v[1:-1]:
-                        table.add_row("", vi, end_section=False)
-                    if len(v) > 1:
-                        table.add_row("", v[-1], end_section=True)
-                else:
-                    table.add_row(str(v), end_section=True)
+            with timer.phase("artifacts_table"):
+                table = Table(
+                    box=box.SIMPLE,
+                    show_header=True,
+                    show_edge=False,
+                    show_footer=True,
+                    collapse_padding=True,
+                    pad_edge=False,
+                )
+                table.add_column(
+                    "Artifacts:", justify="left", style="cyan", header_style="blue", no_wrap=False
+                )
+                table.add_column("", justify="left", style="green", no_wrap=False)
 
-            console.print("")
-            console.print(table)
-            console.print("")
+                for k, v in flow.artifacts.items():
+                    if isinstance(v, list) and v:
+                        v = [str(i) for i in v]
+                        table.add_row(v[0], end_section=len(v) == 1)
+                        for vi in v[1:-1]:
+                            table.add_row("", vi, end_section=False)
+                        if len(v) > 1:
+                            table.add_row("", v[-1], end_section=True)
+                    else:
+                        table.add_row(str(v), end_section=True)
+
+                console.print("")
+                console.print(table)
+                console.print("")
 
         if self.settings.dump_results_json:
-            dump_json(flow.results, results_json, backup=self.settings.backups)
+            # the time of dumping, printing, and cleaning up is only included in the returned results
+            record_timing()
+            with timer.phase("dump_results"):
+                dump_json(flow.results, results_json, backup=self.settings.backups)
             log.info("Results written to %s", results_json)
 
+        if self.results_db is not None:
+            with timer.phase("index_results"):
+                try:
+                    self.results_db.upsert(run_path, flow.results, all_settings)
+                except sqlite3.Error as e:
+                    log.warning("Failed to index the results in %s: %s", self.results_db.path, e)
+
         if self.settings.display_results:
-            print_results(
-                flow,
-                title=f"Results of flow:{flow.name} design:{design.name}",
-                skip_if_false={"artifacts", "reports"},
-            )
+            with timer.phase("print_results"):
+                print_results(
+                    flow,
+                    title=f"Results of flow:{flow.name} design:{design.name}",
+                    skip_if_false={"artifacts", "reports"},
+                )
 
         if self.settings.post_cleanup:
-            if self.settings.post_cleanup_purge:
-                log.warning("Deleting flow run path %s", flow.run_path)
-                rmtree(flow.run_path)
-            else:
-                log.warning("Cleaning up %s", flow.run_path)
-                exclude = [settings_json, results_json]
-                exclude += [
-                    Path(p) if os.path.isabs(p) else flow.run_path / p
-                    for p in flow.artifacts
-                    if p and isinstance(p, (str, Path))
-                ]
-                paths_to_rm = unique(
-                    [
-                        p
-                        for p in flow.run_path.glob("*")
-                        if p not in exclude and self.xeda_run_dir.resolve() in p.resolve().parents
+            with timer.phase("post_cleanup"):
+                if self.settings.post_cleanup_purge:
+                    log.warning("Deleting flow run path %s", flow.run_path)
+                    rmtree(flow.run_path)
+                    if self.results_db is not None:
+                        try:
+                            self.results_db.remove(flow.run_path)
+                        except sqlite3.Error as e:
+                            log.warning("Failed to update %s: %s", self.results_db.path, e)
+                else:
+                    log.warning("Cleaning up %s", flow.run_path)
+                    exclude = [settings_json, results_json]
+                    exclude += [
+                        Path(p) if os.path.isabs(p) else flow.run_path / p
+                        for p in flow.artifacts
+                        if p and isinstance(p, (str, Path))
                     ]
-                )
-                log.warning(
-                    "Removing the following files: %s", " ".join(str(p) for p in paths_to_rm)
-                )
-                for p in paths_to_rm:
-                    if os.path.isfile(p):
-                        os.remove(p)
-                    elif os.path.isdir(p):
-                        rmtree(p)
+                    paths_to_rm = unique(
+                        [
+                            p
+                            for p in flow.run_path.glob("*")
+                            if p not in exclude
+                            and self.xeda_run_dir.resolve() in p.resolve().parents
+                        ]
+                    )
+                    log.warning(
+                        "Removing the following files: %s", " ".join(str(p) for p in paths_to_rm)
+                    )
+                    for p in paths_to_rm:
+                        if os.path.isfile(p):
+                            os.remove(p)
+                        elif os.path.isdir(p):
+                            rmtree(p)
+        record_timing()
         return flow
 
+    @staticmethod
+    def resource_limits(flow: Flow) -> ResourceLimits:
+        """Resource limits of the tool processes of `flow`"""
+        return ResourceLimits(
+            memory=flow.settings.memory_limit,
+            cpu_quota=flow.settings.cpu_quota,
+            cpu_time=flow.settings.cpu_time_limit,
+            open_files=flow.settings.max_open_files,
+        )
+
+    def progress_monitor(self, flow: Flow, run_path: Path) -> ProgressMonitor:
+        """ProgressMonitor of `flow`, with ETA estimated from previous runs of the flow on the design"""
+        events_file = None
+        if self.settings.progress_events:
+            events_file = run_path / "progress.jsonl"
+            events_file.unlink(missing_ok=True)
+        return ProgressMonitor(
+            flow.name,
+            flow.design.name,
+            list(flow.stage_markers.items()),
+            callbacks=self.progress_callbacks,
+            events_file=events_file,
+            history=RuntimeHistory(flow.name, flow.design.name),
+        )
+
+    @contextlib.contextmanager
+    def job_tokens(self, flow: Flow):
+        """Hold job tokens of the jobserver (if enabled) while running `flow`"""
+        if self.jobserver is None:
+            yield None
+            return
+        max_tokens = 1
+        if flow.parallelism == "threads":
+            fair_share = self.jobserver.jobs // max(1, self.concurrency, self._flows_in_flight)
+            max_tokens = flow.settings.nthreads or max(1, fair_share)
+        with unlocked():
+            tokens = self.jobserver.acquire(max_tokens)
+        with tokens, tokens.activate():
+            if flow.parallelism == "threads":
+                log.info("Running %s with %d thread(s)", flow.name, tokens.count)
+                flow.settings.nthreads = tokens.count
+            yield tokens
+
     def run_flow(
         self,
         flow_class: Union[str, Type[Flow]],
@@ -635,7 +823,115 @@ class FlowLauncher:
             all_flows_settings=all_flows_settings,
         )
 
+    async def launch_flow_async(
+        self,
+        flow_class: Union[str, Type[Flow]],
+        design: Design,
+        flow_settings: Union[None, Dict[str, Any], Flow.Settings],
+        tag: Optional[str] = None,
+        **kwargs,
+    ) -> Flow:
+        """
+        asyncio interface for launching flows.
+        The flow is launched from a worker thread, while all of its tool processes are executed and
+        supervised by the running event loop. The output of the tools is tagged with `tag`
+        (default: "<design>:<flow>"). Any number of flows can run concurrently, e.g., using
+        `asyncio.gather`, limited only by the default executor of the loop.
+        """
+        if isinstance(flow_class, str):
+            flow_class = get_flow_class(flow_class)
+        if tag is None:
+            tag = f"{design.name}:{flow_class.name}"
+        bridge = EventLoopBridge(asyncio.get_running_loop(), tag)
+        load_design_time = getattr(_thread_state, "load_design_time", None)
+        _thread_state.load_design_time = None
+
+        def launch() -> Flow:
+            _thread_state.load_design_time = load_design_time
+            with bridge.attached():
+                return self.launch_flow(flow_class, design, flow_settings, **kwargs)
+
+        self._flows_in_flight += 1
+        try:
+            return await asyncio.to_thread(launch)
+        except asyncio.CancelledError:
+            bridge.cancel()
+            raise
+        finally:
+            self._flows_in_flight -= 1
+
     def run(
+        self,
+        flow: Union[Type[Flow], str],
+        design: Union[str, Path, Design, Dict[str, Any], None] = None,
+        **kwargs,
+    ) -> Optional[Flow]:
+        """
+        Flexible API for launching flows.
+        """
+        with self.tracing():
+            start = time.monotonic()
+            prepared = self._prepare_run(flow, design, **kwargs)
+            if prepared is None:
+                return None
+            flow_class, design, flow_settings, run_path, flows_settings = prepared
+            # reported as the "load_design" phase in the results.timing of the launched flow
+            _thread_state.load_design_time = time.monotonic() - start
+            try:
+                return self.run_flow(
+                    flow_class,
+                    design,
+                    flow_settings,
+                    run_path=run_path,
+                    all_flows_settings=flows_settings,
+                )
+            finally:
+                _thread_state.load_design_time = None
+
+    async def run_async(
+        self,
+        flow: Union[Type[Flow], str],
+        design: Union[str, Path, Design, Dict[str, Any], None] = None,
+        tag: Optional[str] = None,
+        **kwargs,
+    ) -> Optional[Flow]:
+        """
+        asyncio counterpart of `run`. See `launch_flow_async`.
+        """
+        with self.tracing():
+            start = time.monotonic()
+            prepared = self._prepare_run(flow, design, **kwargs)
+            if prepared is None:
+                return None
+            flow_class, design, flow_settings, run_path, flows_settings = prepared
+            # picked up synchronously by launch_flow_async, before it yields to the event loop
+            _thread_state.load_design_time = time.monotonic() - start
+            return await self.launch_flow_async(
+                flow_class,
+                design,
+                flow_settings,
+                tag=tag,
+                run_path=run_path,
+                all_flows_settings=flows_settings,
+            )
+
+    @contextlib.contextmanager
+    def tracing(self):
+        """Record profiling spans to `settings.profile_trace` (if set)"""
+        trace_path = self.settings.profile_trace
+        if trace_path is None or active_tracer() is not None:
+            yield
+            return
+        start_tracing("xeda")
+        try:
+            yield
+        finally:
+            tracer = stop_tracing()
+            if tracer is not None:
+                tracer.save(trace_path)
+                log.info("Profiling trace written to %s", trace_path)
+
+    def _prepare_run(
         self,
         flow: Union[Type[Flow], str],
         design: Union[str, Path, Design, Dict[str, Any], None] = None,
@@ -655,9 +951,9 @@ class FlowLauncher:
         design_overrides: Union[None, Iterable[str], Dict[str, Any]] = None,
         design_allow_extra: bool = False,
         design_remove_fields: List[str] = [],
-    ) -> Optional[Flow]:
+    ) -> Optional[Tuple[Type[Flow], Design, Dict[str, Any], Optional[Path], Dict[str, Any]]]:
         """
-        Flexible API for launching flows.
+        Resolve the design, the flow class, and the final flow settings for `run`.
         """
         # get default flow configs from xedaproject even if a design-file is specified
         xeda_project = None
@@ -683,13 +979,14 @@ class FlowLauncher:
                     design = p
         if Path(xedaproject).exists():
             try:
-                xeda_project = XedaProject.from_file(
-                    xedaproject,
-                    skip_designs=design_not_in_project,
-                    design_overrides=design_overrides,
-                    design_allow_extra=design_allow_extra,
-                    design_remove_extra=design_remove_fields,
-                )
+                with span("load_project"):
+                    xeda_project = XedaProject.from_file(
+                        xedaproject,
+                        skip_designs=design_not_in_project,
+                        design_overrides=design_overrides,
+                        design_allow_extra=design_allow_extra,
+                        design_remove_extra=design_remove_fields,
+                    )
             except FileNotFoundError:
                 log.critical(
                     f"Cannot open project file: {xedaproject}. Try specifing the correct path using the --xedaproject <path-to-file>."
@@ -699,12 +996,13 @@ class FlowLauncher:
         if design and design_not_in_project:
             if isinstance(design, (str, Path)):
                 try:
-                    design = Design.from_file(
-                        design,
-                        overrides=design_overrides,
-                        allow_extra=design_allow_extra,
-                        remove_extra=design_remove_fields,
-                    )
+                    with span("load_design"):
+                        design = Design.from_file(
+                            design,
+                            overrides=design_overrides,
+                            allow_extra=design_allow_extra,
+                            remove_extra=design_remove_fields,
+                        )
                 except DesignFileParseError as e:
                     log.critical(f"Error parsing design file {design}: {e}")
                     if self.debug:
@@ -719,7 +1017,8 @@ class FlowLauncher:
             elif isinstance(design, dict):
                 if "design_root" not in design:
                     design["design_root"] = Path.cwd()
-                design = Design(**design)
+                with span("load_design"):
+                    design = Design(**design)
             flows_settings = {
                 **flows_settings,
                 **design.flow,
@@ -805,13 +1104,7 @@ class FlowLauncher:
         run_path = self.settings.run_path
         if run_path is not None and not isinstance(run_path, Path):
             run_path = Path(run_path)
-        return self.run_flow(
-            flow_class,
-            design,
-            final_flow_settings,
-            run_path=run_path,
-            all_flows_settings=flows_settings,
-        )
+        return flow_class, design, final_flow_settings, run_path, flows_settings
 
 
 class FlowRunner(FlowLauncher):
@@ -1,5 +1,6 @@
 import logging
 import multiprocessing
+import os
 import shutil
 import traceback
 from concurrent.futures import CancelledError, TimeoutError
@@ -18,6 +19,7 @@ from ...dataclass import Field, XedaBaseModel
 from ...design import Design
 from ...flow import Flow, FlowFatalError
 from ...tool import NonZeroExitCode
+from ...tracing import active_tracer, span, start_tracing
 from ...utils import (
     Timer,
     dump_json,
@@ -90,6 +92,11 @@ def linspace(a: float, b: float, n: int) -> Tuple[List[float], float]:
     return [step * i + a for i in range(n)], step
 
 
+def worker_trace_path(trace_path: Path, pid: Union[int, str]) -> Path:
+    """trace file of a single DSE worker process (`pid` can be a glob pattern)"""
+    return trace_path.with_name(f"{trace_path.stem}.worker-{pid}{trace_path.suffix}")
+
+
 class Executioner:
     def __init__(self, launcher: FlowLauncher, design: Design, flow_class):
         self.launcher = launcher
@@ -98,6 +105,18 @@ class Executioner:
 
     def __call__(self, args: Tuple[int, Dict[str, Any]]) -> Tuple[Optional[FlowOutcome], int]:
         idx, flow_settings = args
+        trace_path = self.launcher.settings.profile_trace
+        if trace_path is None:
+            return self.execute(idx, flow_settings)
+        # each worker process records its own trace, to be merged by the main process
+        tracer = start_tracing(f"dse worker {os.getpid()}")
+        try:
+            with span("execution", "dse", idx=idx):
+                return self.execute(idx, flow_settings)
+        finally:
+            tracer.save(worker_trace_path(trace_path, os.getpid()))
+
+    def execute(self, idx: int, flow_settings: Dict[str, Any]) -> Tuple[Optional[FlowOutcome], int]:
         try:
             flow = self.launcher.launch_flow(self.flow_class, self.design, flow_settings)
             return (
@@ -142,6 +161,10 @@ class Dse(FlowLauncher):
         )
         timeout: int = 90 * 60  # in seconds
         variations: Optional[Dict[str, List[Any]]] = None
+        jobs: Optional[int] = Field(
+            psutil.cpu_count() or multiprocessing.cpu_count(),
+            description="Total number of CPU job tokens shared by all parallel executions. Set to 0 to disable the jobserver.",
+        )
 
     def __init__(
         self,
@@ -155,6 +178,7 @@ class Dse(FlowLauncher):
             **kwargs,
         )
         assert isinstance(self.settings, self.Settings)
+        self.concurrency = self.settings.max_workers
 
         # update settings
         if self.settings.keep_optimal_run_dirs:
@@ -174,6 +198,20 @@ class Dse(FlowLauncher):
             max_workers=self.settings.max_workers, settings=optimizer_settings
         )
 
+    def merge_worker_traces(self, discard: bool = False) -> None:
+        """add the traces of the worker processes to the trace of this process"""
+        trace_path = self.settings.profile_trace
+        if trace_path is None:
+            return
+        tracer = active_tracer()
+        for worker_trace in trace_path.parent.glob(worker_trace_path(trace_path, "*").name):
+            if tracer is not None and not discard:
+                try:
+                    tracer.load(worker_trace)
+                except (OSError, ValueError) as e:
+                    log.warning("Failed to load trace %s: %s", worker_trace, e)
+            worker_trace.unlink()
+
     def run_flow(
         self,
         flow_class: Union[str, Type[Flow]],
@@ -246,7 +284,8 @@ class Dse(FlowLauncher):
         base_settings.redirect_stdout = True
         base_settings.print_commands = False
 
-        if base_settings.nthreads and base_settings.nthreads > 1:
+        # with a jobserver, nthreads is sized from the job tokens available to each execution
+        if self.jobserver is None and base_settings.nthreads and base_settings.nthreads > 1:
             max_nthreads = max(2, multiprocessing.cpu_count() // self.settings.max_workers)
             base_settings.nthreads = min(base_settings.nthreads, max_nthreads)
 
@@ -265,6 +304,7 @@ class Dse(FlowLauncher):
         log.info("Best results are saved to %s", best_json_path)
 
         flow_setting_hashes = set()
+        self.merge_worker_traces(discard=True)  # left over from a previous run
 
         num_cpus = psutil.cpu_count() or multiprocessing.cpu_count() or 1
         iterate = True
@@ -306,7 +346,8 @@ class Dse(FlowLauncher):
                             self.settings.max_runtime_minutes,
                         )
                         break
-                    batch_settings = optimizer.next_batch()
+                    with span("next_batch", "dse"):
+                        batch_settings = optimizer.next_batch()
                     if not batch_settings:
                         break
 
@@ -322,13 +363,13 @@ class Dse(FlowLauncher):
                                 hash_value,
                             )
                     batch_len = len(batch_settings)
-                    batch_len = min(batch_len, self.settings.max_workers)
+                    batch_len = min(batch_len, optimizer.max_workers)
                     batch_settings = batch_settings[:batch_len]
-                    if batch_len < self.settings.max_workers:
+                    if batch_len < optimizer.max_workers:
                         log.warning(
                             "Only %d (out of %d) workers will be utilized.",
                             batch_len,
-                            self.settings.max_workers,
+                            optimizer.max_workers,
                         )
 
                     log.info(
@@ -345,6 +386,7 @@ class Dse(FlowLauncher):
 
                     have_success = False
                     improved = False
+                    limits_exceeded = False
                     try:
                         iterator = future.result()
                         if not iterator:
@@ -359,7 +401,13 @@ class Dse(FlowLauncher):
                                     log.error("Flow outcome is None!")
                                     iterate = False
                                     continue
-                                improved = optimizer.process_outcome(outcome, idx)
+                                if outcome.results.get("resource_limit_exceeded"):
+                                    limits_exceeded = True
+                                    if optimizer.max_workers > 1:
+                                        # allow these settings to be retried with fewer workers
+                                        flow_setting_hashes.discard(deep_hash(this_batch[idx]))
+                                with span("process_outcome", "dse"):
+                                    improved = optimizer.process_outcome(outcome, idx)
                                 if improved:
                                     log.info("Writing improved result to %s", best_json_path)
                                     dump_json(
@@ -408,7 +456,21 @@ class Dse(FlowLauncher):
                         pool.join()
                         raise e from None
 
-                    if not have_success:
+                    if self.jobserver is not None:
+                        # tokens of killed (e.g., timed out) workers are lost
+                        # (no flows are running between batches, as replenish requires)
+                        self.jobserver.replenish()
+
+                    # with a single worker, exceeding the limits is a failure like any other
+                    reduce_workers = limits_exceeded and optimizer.max_workers > 1
+                    if reduce_workers:
+                        optimizer.max_workers -= 1
+                        self.concurrency = optimizer.max_workers
+                        log.warning(
+                            "Resource limits were exceeded. Reducing the number of parallel executions to %d.",
+                            optimizer.max_workers,
+                        )
+                    if not have_success and not reduce_workers:
                         consecutive_failed_iters += 1
                     else:
                         consecutive_failed_iters = 0
@@ -436,6 +498,7 @@ class Dse(FlowLauncher):
             if pool:
                 pool.close()
                 pool.join()
+            self.merge_worker_traces()
             if optimizer.best:
                 print_results(
                     results=optimizer.best.results,
@@ -0,0 +1,240 @@
+"""Export of the history of flow runs (and DSE results) as a typed columnar table (Parquet, Arrow IPC,
+or CSV), for analysis with pandas, DuckDB, etc.
+
+Nested results (e.g., utilization, timing, or cocotb results) are flattened into dot-separated
+columns. Records are streamed twice: once to infer a stable schema (the union of all columns, each
+with a single type), and once to write them in chunks of `chunk_size` rows, so the memory use does
+not grow with the number of runs.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+from ..utils import XedaException
+from .results_db import ResultsDB
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "export_format",
+    "export_records",
+    "flatten",
+    "infer_schema",
+    "iter_dse_records",
+    "iter_run_records",
+    "run_record",
+]
+
+EXPORT_FORMATS = {
+    "parquet": (".parquet", ".pq"),
+    "arrow": (".arrow", ".feather", ".ipc"),
+    "csv": (".csv",),
+}
+
+RecordsFactory = Callable[[], Iterable[Mapping[str, Any]]]
+
+
+def flatten(data: Mapping[str, Any], prefix: str = "", sep: str = ".") -> Dict[str, Any]:
+    """Flatten nested mappings into a single level with `sep`-joined keys.
+    Lists are converted to JSON strings."""
+    flat: Dict[str, Any] = {}
+    for k, v in data.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, Mapping):
+            flat.update(flatten(v, key + sep, sep))
+        elif isinstance(v, (list, tuple)):
+            flat[key] = json.dumps(v, default=str)
+        else:
+            flat[key] = v
+    return flat
+
+
+def run_record(
+    results: Mapping[str, Any], settings: Optional[Mapping[str, Any]] = None
+) -> Dict[str, Any]:
+    """Flat record of a run, from its results and (optionally) its settings.json contents.
+    Tool versions are in "tools.<executable>" columns and flow settings in "settings.*" columns."""
+    results = dict(results)
+    record: Dict[str, Any] = {
+        k: results.pop(k, None) for k in ("design", "flow", "timestamp", "success", "run_path")
+    }
+    for tool in results.pop("tools", None) or []:
+        if isinstance(tool, Mapping) and tool.get("executable"):
+            record[f"tools.{os.path.basename(tool['executable'])}"] = tool.get("version")
+    results.pop("artifacts", None)
+    record.update(flatten(results))
+    if settings:
+        record["xeda_version"] = settings.get("xeda_version")
+        record["tag"] = settings.get("tag")
+        flow_settings = settings.get("flow_settings")
+        if isinstance(flow_settings, Mapping):
+            record.update(flatten(flow_settings, "settings."))
+    return record
+
+
+def iter_run_records(
+    xeda_run_dir: Union[str, os.PathLike],
+    design: Optional[str] = None,
+    flow: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Records of the runs in `xeda_run_dir` (optionally filtered by design and flow glob patterns),
+    from its results database, or else from the results.json (and settings.json) of each run"""
+    db = ResultsDB.of_run_dir(xeda_run_dir)
+    if db.path.exists():
+        for rec in db.iter_query(design=design, flow=flow, descending=False):
+            yield run_record(rec["results"], rec["settings"])
+        return
+    for results_json in sorted(Path(xeda_run_dir).glob("**/results.json")):
+        try:
+            with open(results_json) as f:
+                results = json.load(f)
+            settings = None
+            settings_json = results_json.with_name("settings.json")
+            if settings_json.exists():
+                with open(settings_json) as f:
+                    settings = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Skipping %s: %s", results_json, e)
+            continue
+        if not isinstance(results, dict) or not results.get("flow"):
+            continue
+        if design and not fnmatchcase(str(results.get("design")), design):
+            continue
+        if flow and not fnmatchcase(str(results["flow"]), flow):
+            continue
+        yield run_record(results, settings)
+
+
+def iter_dse_records(dse_json: Union[str, os.PathLike]) -> Iterator[Dict[str, Any]]:
+    """Records of the successful results in a DSE results file (fmax_<design>_<flow>_<time>.json)"""
+    with open(dse_json) as f:
+        data = json.load(f)
+    best = data.get("best") or {}
+    best_results = best.get("results") or {}
+    design = data.get("design")
+    common = dict(
+        design=design.get("name") if isinstance(design, Mapping) else best_results.get("design"),
+        flow=best_results.get("flow"),
+        dse_results=str(dse_json),
+    )
+    for results in data.get("successful_results") or []:
+        yield dict(common, success=True, **flatten(results))
+
+
+def _value_type(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return "bool"
+    if isinstance(v, int):
+        return "int" if -(2**63) <= v < 2**63 else "float"
+    if isinstance(v, float):
+        return "float"
+    return "string"
+
+
+def infer_schema(records: Iterable[Mapping[str, Any]]) -> Dict[str, str]:
+    """Columns (in the order of first appearance) and their types ("bool", "int", "float", or
+    "string"). Columns with mixed types are "float" if all values are numeric, else "string"."""
+    types: Dict[str, Optional[str]] = {}
+    for record in records:
+        for k, v in record.items():
+            t = _value_type(v)
+            prev = types.get(k)
+            if prev is None:
+                types[k] = t
+            elif t is not None and t != prev:
+                types[k] = "float" if {prev, t} <= {"int", "float"} else "string"
+    return {k: t or "string" for k, t in types.items()}
+
+
+def _convert(v: Any, typ: str) -> Any:
+    if v is None:
+        return None
+    if typ == "float":
+        return float(v)
+    if typ == "string" and not isinstance(v, str):
+        return json.dumps(v) if isinstance(v, bool) else str(v)
+    return v
+
+
+def _chunks(
+    records: Iterable[Mapping[str, Any]], schema: Dict[str, str], chunk_size: int
+) -> Iterator[Dict[str, List[Any]]]:
+    columns: Dict[str, List[Any]] = {k: [] for k in schema}
+    n = 0
+    for record in records:
+        for k, typ in schema.items():
+            columns[k].append(_convert(record.get(k), typ))
+        n += 1
+        if n == chunk_size:
+            yield columns
+            columns = {k: [] for k in schema}
+            n = 0
+    if n:
+        yield columns
+
+
+def export_format(path: Union[str, os.PathLike], fmt: Optional[str] = None) -> str:
+    if fmt:
+        if fmt not in EXPORT_FORMATS:
+            raise XedaException(f"Unsupported export format: {fmt}")
+        return fmt
+    suffix = Path(path).suffix.lower()
+    for name, suffixes in EXPORT_FORMATS.items():
+        if suffix in suffixes:
+            return name
+    raise XedaException(f"Unknown export format of '{path}'. Specify the format explicitly.")
+
+
+def export_records(
+    records: RecordsFactory,
+    path: Union[str, os.PathLike],
+    fmt: Optional[str] = None,
+    chunk_size: int = 10000,
+) -> int:
+    """Write the records as a table to `path`, in the format `fmt` (parquet, arrow, or csv; default:
+    from the extension of `path`). `records` is called twice and should return a new iterable of the
+    same records each time. Parquet and Arrow require pyarrow. Returns the number of rows."""
+    fmt = export_format(path, fmt)
+    schema = infer_schema(records())
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    num_rows = 0
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(schema)
+            for chunk in _chunks(records(), schema, chunk_size):
+                rows = list(zip(*chunk.values()))
+                writer.writerows(rows)
+                num_rows += len(rows)
+        return num_rows
+
+    try:
+        import pyarrow as pa  # type: ignore[import-not-found]  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise XedaException(f"Exporting to {fmt} requires the 'pyarrow' package") from e
+
+    pa_types = dict(bool=pa.bool_(), int=pa.int64(), float=pa.float64(), string=pa.string())
+    pa_schema = pa.schema([(k, pa_types[t]) for k, t in schema.items()])
+    if fmt == "parquet":
+        import pyarrow.parquet as pq  # type: ignore[import-not-found]  # pylint: disable=import-outside-toplevel
+
+        writer = pq.ParquetWriter(path, pa_schema)
+    else:
+        writer = pa.ipc.new_file(path, pa_schema)
+    with writer:
+        for chunk in _chunks(records(), schema, chunk_size):
+            table = pa.Table.from_pydict(chunk, schema=pa_schema)
+            writer.write_table(table)
+            num_rows += table.num_rows
+    return num_rows
@@ -0,0 +1,283 @@
+"""SQLite index of the flow runs (results and settings) under a xeda_run directory"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "ResultsDB",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_path TEXT PRIMARY KEY,
+    design TEXT NOT NULL,
+    flow TEXT NOT NULL,
+    design_hash TEXT,
+    flow_hash TEXT,
+    timestamp TEXT,
+    success INTEGER,
+    runtime REAL,
+    xeda_version TEXT,
+    indexed_at TEXT,
+    results_mtime REAL,
+    results TEXT NOT NULL,
+    settings TEXT,
+    tag TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_design_flow ON runs (design, flow, timestamp);
+CREATE INDEX IF NOT EXISTS runs_hashes ON runs (design_hash, flow_hash);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_path TEXT NOT NULL REFERENCES runs (run_path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_path, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_name_value ON metrics (name, value);
+CREATE TABLE IF NOT EXISTS tools (
+    run_path TEXT NOT NULL REFERENCES runs (run_path) ON DELETE CASCADE,
+    executable TEXT NOT NULL,
+    version TEXT
+);
+CREATE INDEX IF NOT EXISTS tools_executable_version ON tools (executable, version);
+"""
+
+
+def _to_json(data: Any) -> str:
+    # same conversions as utils.dump_json
+    return json.dumps(data, default=lambda x: x.__dict__ if hasattr(x, "__dict__") else str(x))
+
+
+class ResultsDB:
+    """Index of flow runs, keyed by their run_path, with the design, flow, hashes, timestamp, success,
+    and numeric (headline) metrics of each run as indexed columns, and the full results and settings
+    stored as JSON. Each operation uses its own connection, so an instance can be shared by threads,
+    and the database by concurrent processes."""
+
+    filename = "results.db"
+
+    def __init__(self, path: Union[str, os.PathLike], timeout: float = 60.0) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self._initialized = False
+
+    @classmethod
+    def of_run_dir(cls, xeda_run_dir: Union[str, os.PathLike]) -> ResultsDB:
+        return cls(Path(xeda_run_dir) / cls.filename)
+
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection (in a transaction) to the database, which is created if it doesn't exist"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(SCHEMA)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+                if "tag" not in columns:  # created by an earlier version
+                    conn.execute("ALTER TABLE runs ADD COLUMN tag TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS runs_tag ON runs (tag)")
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert(
+        self,
+        run_path: Union[str, os.PathLike],
+        results: Mapping[str, Any],
+        settings: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Add or update the record of the run in `run_path`. Existing settings are kept if `settings`
+        is None."""
+        run_path = str(Path(run_path).absolute())
+        results = json.loads(_to_json(results))  # plain JSON types
+        metrics = {
+            k: float(v)
+            for k, v in results.items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and not k.startswith("_")
+        }
+        tools = [
+            t for t in results.get("tools") or [] if isinstance(t, dict) and t.get("executable")
+        ]
+        runtime = results.get("runtime")
+        results_json = Path(run_path) / "results.json"
+        results_mtime = results_json.stat().st_mtime if results_json.exists() else None
+        with self.connect() as conn:
+            conn.execute(
+                """INSERT INTO runs (run_path, design, flow, design_hash, flow_hash, timestamp, success,
+                    runtime, xeda_version, indexed_at, results_mtime, results, settings, tag)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (run_path) DO UPDATE SET
+                    design = excluded.design, flow = excluded.flow,
+                    design_hash = excluded.design_hash, flow_hash = excluded.flow_hash,
+                    timestamp = excluded.timestamp, success = excluded.success,
+                    runtime = excluded.runtime,
+                    xeda_version = COALESCE(excluded.xeda_version, xeda_version),
+                    indexed_at = excluded.indexed_at, results_mtime = excluded.results_mtime,
+                    results = excluded.results,
+                    settings = COALESCE(excluded.settings, settings),
+                    tag = COALESCE(excluded.tag, tag)""",
+                (
+                    run_path,
+                    results.get("design"),
+                    results.get("flow"),
+                    results.get("design_hash"),
+                    results.get("flow_hash"),
+                    results.get("timestamp"),
+                    None if results.get("success") is None else bool(results["success"]),
+                    runtime if isinstance(runtime, (int, float)) else None,
+                    settings.get("xeda_version") if settings else None,
+                    datetime.now().isoformat(),
+                    results_mtime,
+                    json.dumps(results),
+                    None if settings is None else _to_json(settings),
+                    settings.get("tag") if settings else None,
+                ),
+            )
+            conn.execute("DELETE FROM metrics WHERE run_path = ?", (run_path,))
+            conn.executemany(
+                "INSERT INTO metrics (run_path, name, value) VALUES (?, ?, ?)",
+                [(run_path, k, v) for k, v in metrics.items()],
+            )
+            conn.execute("DELETE FROM tools WHERE run_path = ?", (run_path,))
+            conn.executemany(
+                "INSERT INTO tools (run_path, executable, version) VALUES (?, ?, ?)",
+                [(run_path, t["executable"], t.get("version")) for t in tools],
+            )
+
+    def remove(self, run_path: Union[str, os.PathLike]) -> None:
+        with self.connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_path = ?", (str(Path(run_path).absolute()),))
+
+    def get(
+        self, run_path: Union[str, os.PathLike], up_to_date: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Record of the run in `run_path`, if indexed. If `up_to_date`, only if its results.json
+        has not been modified since it was indexed."""
+        run_path = Path(run_path).absolute()
+        with self.connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_path = ?", (str(run_path),)).fetchone()
+        if row is None:
+            return None
+        if up_to_date:
+            try:
+                if row["results_mtime"] != (run_path / "results.json").stat().st_mtime:
+                    return None
+            except OSError:
+                return None
+        return self._record(row)
+
+    def index(self, xeda_run_dir: Union[str, os.PathLike]) -> int:
+        """(Re-)index all runs with a valid results.json under `xeda_run_dir` and drop the records of
+        any other runs. Returns the number of indexed runs."""
+        xeda_run_dir = Path(xeda_run_dir).absolute()
+        indexed = set()
+        for results_json in sorted(xeda_run_dir.glob("**/results.json")):
+            run_path = results_json.parent
+            try:
+                with open(results_json) as f:
+                    results = json.load(f)
+                settings = None
+                if (run_path / "settings.json").exists():
+                    with open(run_path / "settings.json") as f:
+                        settings = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning("Skipping %s: %s", results_json, e)
+                continue
+            if not isinstance(results, dict) or not results.get("flow"):
+                continue
+            self.upsert(run_path, results, settings)
+            indexed.add(str(run_path))
+        with self.connect() as conn:
+            stale = [
+                (row["run_path"],)
+                for row in conn.execute("SELECT run_path FROM runs")
+                if row["run_path"] not in indexed and xeda_run_dir in Path(row["run_path"]).parents
+            ]
+            conn.executemany("DELETE FROM runs WHERE run_path = ?", stale)
+        return len(indexed)
+
+    def query(self, **kwargs: Any) -> List[Dict[str, Any]]:
+        """List of the records of matching runs. See `iter_query`."""
+        return list(self.iter_query(**kwargs))
+
+    def iter_query(
+        self,
+        design: Optional[str] = None,
+        flow: Optional[str] = None,
+        success: Optional[bool] = None,
+        tag: Optional[str] = None,
+        tool: Optional[str] = None,
+        tool_version: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Records of the runs matching all of the specified conditions, fetched as they are consumed.
+        `design`, `flow`, and `tool_version` can be glob patterns. Runs are sorted by the value of
+        the `order_by` metric (runs without it are excluded), or else by their timestamp, most
+        recent first."""
+        conditions: List[str] = []
+        params: List[Any] = []
+        if design:
+            conditions.append("runs.design GLOB ?")
+            params.append(design)
+        if flow:
+            conditions.append("runs.flow GLOB ?")
+            params.append(flow)
+        if success is not None:
+            conditions.append("runs.success = ?")
+            params.append(success)
+        if tag is not None:
+            conditions.append("runs.tag = ?")
+            params.append(tag)
+        if tool or tool_version:
+            tool_conditions = ["tools.run_path = runs.run_path"]
+            if tool:
+                tool_conditions.append("tools.executable = ?")
+                params.append(tool)
+            if tool_version:
+                tool_conditions.append("tools.version GLOB ?")
+                params.append(tool_version)
+            conditions.append(f"EXISTS (SELECT 1 FROM tools WHERE {' AND '.join(tool_conditions)})")
+        order = "DESC" if descending else "ASC"
+        if order_by:
+            sql = "SELECT runs.* FROM runs JOIN metrics ON metrics.run_path = runs.run_path"
+            conditions.insert(0, "metrics.name = ?")
+            params.insert(0, order_by)
+            order_clause = f"metrics.value {order}, runs.timestamp DESC"
+        else:
+            sql = "SELECT runs.* FROM runs"
+            order_clause = f"runs.timestamp {order}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order_clause}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.connect() as conn:
+            for row in conn.execute(sql, params):
+                yield self._record(row)
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["success"] = None if record["success"] is None else bool(record["success"])
+        record["results"] = json.loads(record["results"])
+        if record["settings"] is not None:
+            record["settings"] = json.loads(record["settings"])
+        return record
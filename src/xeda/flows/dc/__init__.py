@@ -9,6 +9,7 @@ from box import Box
 from ...dataclass import Field, validator
 from ...flow import AsicSynthFlow
 from ...platforms import AsicsPlatform
+from ...timing_paths import parse_dc_timing_paths
 from ...tool import Tool
 from ...utils import try_convert, try_convert_to_primitives
 
@@ -36,6 +37,8 @@ def get_hier(dct, dotted_path, default=None):
 class Dc(AsicSynthFlow):
     """Synopsys Design Compiler (R) synthesis flow"""
 
+    parallelism = "threads"
+
     class Settings(AsicSynthFlow.Settings):
         log_file: Optional[Path] = Field(
             Path("dc.log"),
@@ -316,6 +319,12 @@ class Dc(AsicSynthFlow):
             if isinstance(wns, float) and (clock_period - wns) > 0:
                 self.results["Fmax"] = 1000.0 / (clock_period - wns)
 
+        reports = [p for p in (max_report_path, min_report_path) if p.exists()]
+        if reports:
+            paths = parse_dc_timing_paths(*reports)
+            timing_paths = paths.save(self.settings.reports_dir / "timing_paths.npz")
+            self.artifacts["timing_paths"] = timing_paths
+            self.results["_timing_paths"] = paths.summary()
         return not failed
 
     def parse_reports(self) -> bool:
@@ -4,16 +4,19 @@ import inspect
 import logging
 import platform
 import re
+import time
 from abc import ABCMeta
 from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 from ...dataclass import Field, validator
 from ...design import Design, DesignSource, SourceType, Tuple012, VhdlSettings
-from ...flow import Flow, FlowException, FlowSettingsError, SimFlow, SynthFlow
+from ...flow import Flow, FlowException, FlowSettingsError, SimFlow, SimRun, SynthFlow
 from ...tool import Docker, Tool
 from ...utils import SDF, common_root, setting_flag
+from .backends import BackendHistory, GhdlInstallation, parse_time_ns
+from .library_cache import LibraryCache
 
 log = logging.getLogger(__name__)
 
@@ -156,6 +159,10 @@ class Ghdl(Flow, metaclass=ABCMeta):
         psl_in_comments: bool = Field(
             False, description="Parse PSL assertions within comments (for VHDL-2002 and earlier)"
         )
+        library_cache: bool = Field(
+            True,
+            description="Reuse the libraries analyzed in previous runs with the same GHDL version, analysis flags, and sources (cached in the xeda cache directory). Only the sources which have changed, and the ones following them, are re-analyzed.",
+        )
 
         def common_flags(self, vhdl: VhdlSettings) -> List[str]:
             cf: List[str] = []
@@ -251,6 +258,17 @@ class Ghdl(Flow, metaclass=ABCMeta):
                     tops = (entities[-1],)
         return tops
 
+    def analyze_cached(self, flags: List[str], sources: List[DesignSource]) -> None:
+        """Analyze the sources, reusing the cached libraries of previous runs"""
+        cache = LibraryCache(
+            dict(ghdl=self.ghdl.info, flags=flags, sources=[str(src.path) for src in sources])
+        )
+        start = cache.restore(self.run_path, sources)
+        if start == len(sources):
+            return
+        self.ghdl.run("analyze", *flags, *[str(s) for s in sources[start:]])
+        cache.save(self.run_path, sources)
+
     def elaborate(
         self,
         sources: List[DesignSource],
@@ -277,6 +295,9 @@ class Ghdl(Flow, metaclass=ABCMeta):
         backend = self.ghdl.info.get("backend", None)
         for step in steps:
             args = ss.get_flags(vhdl, step, backend=backend)
+            if step == "analyze" and ss.library_cache:
+                self.analyze_cached(args, sources)
+                continue
             if step in ("import", "analyze"):
                 args += [str(s) for s in sources]
             elif step in ("make", "elaborate"):
@@ -492,6 +513,26 @@ class GhdlSim(Ghdl, SimFlow):
             None,
             description="Load VPI library (or multiple libraries)",
         )
+        installation: Optional[GhdlInstallation] = Field(
+            None,
+            description="GHDL installation (executable and/or docker image) to use. Default: ghdl",
+        )
+        installations: List[GhdlInstallation] = Field(
+            [],
+            description="Other GHDL installations, e.g., with different backends (mcode, llvm, gcc), which auto_backend can choose from.",
+        )
+        auto_backend: bool = Field(
+            False,
+            description="Choose the GHDL installation (i.e., backend) and optimization level (auto_optimization_levels) with the shortest expected elaboration plus simulation time, according to the runtimes of previous simulations of the design (see `xeda ghdl-benchmark`), scaled to the expected simulation length (stop_time).",
+        )
+        auto_optimization_levels: List[str] = Field(
+            ["-O0", "-O2", "-O3"],
+            description="Optimization flags which auto_backend can choose from",
+        )
+        record_runtime: bool = Field(
+            False,
+            description="Record the elaboration and simulation times in the runtime history of the design, which auto_backend uses. Always enabled with auto_backend.",
+        )
         # TODO workdir?
 
         @validator("wave", "fst", pre=True)
@@ -506,11 +547,54 @@ class GhdlSim(Ghdl, SimFlow):
                     pass
             return value
 
+    def installation_tool(self, installation: GhdlInstallation) -> GhdlTool:
+        tool = GhdlTool(executable=installation.executable)  # pyright: ignore[reportCallIssue]
+        if installation.docker:
+            native_info = tool.info
+            tool.docker = Docker(image=installation.docker)  # type: ignore
+            tool.docker.mounts[str(self.design_root)] = str(self.design_root)
+            tool.dockerized = True
+            tool.invalidate_cached_properties()
+            if native_info in self.results.tools:
+                self.results.tools.remove(native_info)
+            self.results.tools.append(tool.info)
+        return tool
+
+    def backend_candidates(self) -> Dict[str, Tuple[GhdlInstallation, List[str]]]:
+        """installation and optimization flags of each candidate of auto_backend"""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        candidates = {}
+        for installation in [ss.installation or GhdlInstallation(), *ss.installations]:
+            for level in ss.auto_optimization_levels or [""]:
+                flags = [level] if level else []
+                candidates[BackendHistory.candidate(installation, flags)] = (installation, flags)
+        return candidates
+
+    def select_backend(self, history: BackendHistory) -> None:
+        """Use the GHDL installation and optimization flags with the shortest expected runtime"""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        candidates = self.backend_candidates()
+        best = history.best(list(candidates), parse_time_ns(ss.stop_time))
+        if best is None:
+            log.info(
+                "No runtime history of the GHDL backends for %s yet. Run `xeda ghdl-benchmark`.",
+                self.design.name,
+            )
+            return
+        log.info("Selected GHDL backend: %s", best)
+        ss.installation, ss.optimization_flags = candidates[best]
+
     def run(self) -> None:
         design = self.design
         assert design.tb
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
+        if ss.auto_backend:
+            self.select_backend(BackendHistory.of_design(design))
+        if ss.installation:
+            self.ghdl = self.installation_tool(ss.installation)
         cf = ss.common_flags(design.language.vhdl)
         run_flags = self.settings.run_flags
         sdf_root = ss.sdf.root if ss.sdf.root else design.tb.uut
@@ -610,14 +694,39 @@ class GhdlSim(Ghdl, SimFlow):
 
         run_flags.extend(ss.generics_flags(design.tb.generics))
 
+        start = time.monotonic()
         design.tb.top = self.elaborate(design.sim_sources, design.tb.top, design.language.vhdl)
-        self.ghdl.run(
+        elaboration_time = time.monotonic() - start
+        self.run_sim(
+            self.ghdl,
             "run",
             *cf,
             *design.sim_tops,
             *run_flags,
             env=self.cocotb.env(design) if self.cocotb else {},
         )
+        simulation_time = time.monotonic() - start - elaboration_time
+        self.results["ghdl_backend"] = self.ghdl.info.get("backend")
+        self.results["elaboration_time"] = elaboration_time
+        self.results["simulation_time"] = simulation_time
+        record = ss.auto_backend or ss.record_runtime
+        if record and not ss.runs and not ss.seeds and ss.cocotb.shards == 1:
+            results = self.cocotb.results if self.cocotb else None
+            # (re-)load the history just before updating it, as it can be shared by other runs
+            BackendHistory.of_design(design).record(
+                BackendHistory.candidate(
+                    ss.installation or GhdlInstallation(), ss.optimization_flags
+                ),
+                self.results["ghdl_backend"],
+                elaboration_time,
+                simulation_time,
+                results.total_sim_time_ns if results else parse_time_ns(ss.stop_time),
+            )
+
+    def sim_run_args(self, run: SimRun) -> List[str]:
+        if run.seed is not None and not self.cocotb:
+            log.warning("GHDL does not support the seed of simulation runs")
+        return setting_flag(run.stop_time, name="stop_time")
 
     def parse_reports(self) -> bool:
         success = True
@@ -0,0 +1,141 @@
+"""Selection of the GHDL installation (backend) and optimization level of simulations"""
+
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from ...dataclass import Field, XedaBaseModel
+from ...design import Design
+from ...utils import cache_dir, load_cache_file, save_cache_file, semantic_hash
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "BackendHistory",
+    "GhdlInstallation",
+    "parse_time_ns",
+]
+
+_TIME_UNITS_NS = {
+    "fs": 1e-6,
+    "ps": 1e-3,
+    "ns": 1.0,
+    "us": 1e3,
+    "ms": 1e6,
+    "sec": 1e9,
+    "s": 1e9,
+    "min": 60e9,
+    "hr": 3600e9,
+}
+
+
+def parse_time_ns(value: Union[None, str, int, float]) -> Optional[float]:
+    """Simulation time (e.g., a stop_time of '100us' or '2 ms') in nanoseconds. Numbers are in ns."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?(?:e[+-]?\d+)?)\s*([a-z]*)\s*", value.lower())
+    if not match or match.group(2) not in (*_TIME_UNITS_NS, ""):
+        return None
+    return float(match.group(1)) * _TIME_UNITS_NS.get(match.group(2), 1.0)
+
+
+class GhdlInstallation(XedaBaseModel):
+    """A GHDL installation: its executable, which can be in a docker image"""
+
+    executable: str = Field("ghdl", description="GHDL executable (name or path)")
+    docker: Optional[str] = Field(None, description="Run GHDL from this docker image")
+
+    @property
+    def label(self) -> str:
+        return f"docker:{self.docker}" if self.docker else self.executable
+
+
+class BackendHistory:
+    """Elaboration and simulation times of the previous simulations of a design (keyed by the hashes
+    of its RTL and testbench), for each GHDL installation (and its backend) and optimization flags
+    (a 'candidate')"""
+
+    max_runs = 5
+
+    def __init__(self, key: Dict[str, Any], root: Optional[Path] = None) -> None:
+        if root is None:
+            root = cache_dir("ghdl", "backends")
+        self.path = root / f"{semantic_hash(key)[:32]}.json"
+        candidates = load_cache_file(self.path, "GHDL backend history")
+        self.candidates: Dict[str, Dict[str, Any]] = (
+            candidates if isinstance(candidates, dict) else {}
+        )
+
+    @classmethod
+    def of_design(cls, design: Design, root: Optional[Path] = None) -> BackendHistory:
+        return cls(dict(design=design.name, rtl=design.rtl_hash, tb=design.tb_hash), root)
+
+    @staticmethod
+    def candidate(installation: GhdlInstallation, optimization_flags: Sequence[str]) -> str:
+        return " ".join([installation.label, *optimization_flags])
+
+    def record(
+        self,
+        candidate: str,
+        backend: Optional[str],
+        elaboration: float,
+        simulation: float,
+        sim_time_ns: Optional[float],
+    ) -> None:
+        entry = self.candidates.setdefault(candidate, {})
+        entry["backend"] = backend
+        run = dict(elaboration=elaboration, simulation=simulation, sim_time_ns=sim_time_ns)
+        entry["runs"] = (entry.get("runs", []) + [run])[-self.max_runs :]
+        save_cache_file(self.path, self.candidates, "GHDL backend history")
+
+    def averages(self, candidate: str) -> Optional[Dict[str, Optional[float]]]:
+        """average elaboration and simulation times, and simulated time, of `candidate`"""
+        runs = self.candidates.get(candidate, {}).get("runs", [])
+        if not runs:
+            return None
+
+        def average(key: str) -> Optional[float]:
+            values = [r[key] for r in runs if r.get(key) is not None]
+            return sum(values) / len(values) if values else None
+
+        return {k: average(k) for k in ("elaboration", "simulation", "sim_time_ns")}
+
+    def expected_time(self, candidate: str, sim_time_ns: Optional[float]) -> Optional[float]:
+        """Expected elaboration + simulation time of `candidate`, with the simulation time scaled to
+        `sim_time_ns` of simulated time (if both it and the simulated time of the history are
+        known). None if the candidate has no history."""
+        avg = self.averages(candidate)
+        if avg is None:
+            return None
+        elaboration = avg["elaboration"] or 0.0
+        simulation = avg["simulation"] or 0.0
+        if sim_time_ns and avg["sim_time_ns"]:
+            simulation *= sim_time_ns / avg["sim_time_ns"]
+        return elaboration + simulation
+
+    def expected_sim_time_ns(self) -> Optional[float]:
+        """average simulated time of all previous simulations"""
+        values = [
+            r["sim_time_ns"]
+            for entry in self.candidates.values()
+            for r in entry.get("runs", [])
+            if r.get("sim_time_ns")
+        ]
+        return sum(values) / len(values) if values else None
+
+    def best(self, candidates: List[str], sim_time_ns: Optional[float]) -> Optional[str]:
+        """The candidate with the shortest expected time, among those with a history"""
+        if sim_time_ns is None:
+            sim_time_ns = self.expected_sim_time_ns()
+        expected = {c: self.expected_time(c, sim_time_ns) for c in candidates}
+        known = [c for c in candidates if expected[c] is not None]
+        if not known:
+            return None
+        for c in known:
+            log.debug("Expected runtime of GHDL %s: %.2fs", c, expected[c])
+        return min(known, key=lambda c: expected[c])  # type: ignore
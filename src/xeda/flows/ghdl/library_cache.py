@@ -0,0 +1,94 @@
+"""Cache of analyzed GHDL libraries"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ...design import DesignSource
+from ...utils import CacheEntry, cache_dir
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "LibraryCache",
+]
+
+
+class LibraryCache(CacheEntry):
+    """Analyzed libraries (.cf and object files) of previous runs, keyed by the GHDL version and
+    backend, the analysis flags, and the (ordered) paths of the sources.
+    The content hash of each analyzed source is recorded, so that only the sources that have changed
+    since (and the ones following them, which may depend on them) need to be re-analyzed."""
+
+    manifest_file = "manifest.json"
+
+    def __init__(self, key: Dict[str, Any], root: Optional[Path] = None) -> None:
+        super().__init__(key, cache_dir("ghdl") if root is None else root)
+
+    @staticmethod
+    def library_files(work_dir: Path) -> List[Path]:
+        """library files generated by analysis (elaboration objects are named e~<unit>.o)"""
+        return sorted(
+            p
+            for pattern in ("*.cf", "*.o")
+            for p in work_dir.glob(pattern)
+            if p.is_file() and not p.name.startswith("e~")
+        )
+
+    def restore(self, work_dir: Path, sources: Sequence[DesignSource]) -> int:
+        """Copy the cached libraries to `work_dir`. Returns the index of the first source that needs
+        to be analyzed, i.e., the number of leading sources that are up to date in the cache."""
+        try:
+            with open(self.path / self.manifest_file) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring invalid GHDL library cache %s: %s", self.path, e)
+            return 0
+        hashes: List[str] = manifest.get("sources", [])
+        num_valid = 0
+        for src, content_hash in zip(sources, hashes):
+            if src.content_hash != content_hash:
+                break
+            num_valid += 1
+        if num_valid == 0:
+            return 0
+        for p in self.library_files(work_dir):
+            p.unlink()
+        try:
+            for name in manifest.get("files", []):
+                # keep the timestamps, as GHDL compares them with those of the sources
+                shutil.copy2(self.path / name, work_dir / name)
+        except OSError as e:
+            log.warning("Failed to restore GHDL libraries from %s: %s", self.path, e)
+            for p in self.library_files(work_dir):
+                p.unlink()
+            return 0
+        log.info(
+            "Reusing the analysis of %d of %d sources from %s", num_valid, len(sources), self.path
+        )
+        return num_valid
+
+    def save(self, work_dir: Path, sources: Sequence[DesignSource]) -> None:
+        """Replace the cached libraries with the ones in `work_dir`, where all `sources` have been
+        analyzed"""
+        try:
+            with self.replace() as tmp:
+                files = self.library_files(work_dir)
+                for p in files:
+                    shutil.copy2(p, tmp / p.name)
+                with open(tmp / self.manifest_file, "w") as f:
+                    json.dump(
+                        dict(
+                            sources=[src.content_hash for src in sources],
+                            files=[p.name for p in files],
+                        ),
+                        f,
+                    )
+        except OSError as e:
+            log.warning("Failed to cache GHDL libraries in %s: %s", self.path, e)
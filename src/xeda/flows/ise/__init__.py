@@ -72,6 +72,8 @@ def format_value(v) -> str:
 class IseSynth(FpgaSynthFlow):
     """FPGA synthesis using Xilinx ISE"""
 
+    parallelism = "threads"
+
     class Settings(FpgaSynthFlow.Settings):
         # see https://www.xilinx.com/support/documentation/sw_manuals/xilinx14_7/devref.pdf
         synthesis_options: OptionsType = {
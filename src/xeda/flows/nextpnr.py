@@ -1,5 +1,7 @@
 import logging
-from typing import List, Optional, Union
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
 from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import urlretrieve
@@ -11,7 +13,7 @@ from ..tool import Tool
 from ..utils import setting_flag
 from .yosys import YosysFpga
 
-__all__ = ["Nextpnr"]
+__all__ = ["Nextpnr", "NextpnrLogParser", "parse_nextpnr_logfile", "nextpnr_max_frequency"]
 
 log = logging.getLogger(__name__)
 
@@ -83,7 +85,174 @@ class EcpPLL(Tool):
         self.run(*args)
 
 
+def _try_convert(value: str, typ: type):
+    try:
+        return typ(value)
+    except ValueError:
+        return value
+
+
+class NextpnrLogParser:
+    """Single-pass, line-driven parser of nextpnr logs.
+    Gathers device utilization, the maximum frequency of clocks, and critical path reports.
+    Sections of the log end at the first empty line.
+    """
+
+    device_util_re = re.compile(
+        r"^\s*(\w+:)?\s*(?P<resource>[^:]+?)\s*:\s*"
+        r"(?P<used>\d+)\s*/\s*(?P<available>\d+)\s+"
+        r"(?P<percentage>\d[\d\.]*)\s*%"
+    )
+    clock_re = re.compile(
+        r"frequency for clock\s*'(?P<clock_name>\S+)':\s*(?P<max_freq>\d[\d\.]*)\s*(?P<max_freq_unit>\w+)\s*"
+        r"\(?(?P<status>\w+)\s+at\s*(?P<requested_freq>\d[\d\.]*)\s*(?P<requested_freq_unit>\w+)\s*\)?"
+    )
+    critical_path_re = re.compile(
+        r"Critical path report for clock\s+'(?P<clock_name>\S+)'\s*"
+        r"\(\s*(?P<from_edge>\S+)\s*->\s*(?P<to_edge>\S+)\s*\)"
+    )
+    # Info:  0.1  0.1  Source $auto$ff.cc:266:slice$5358.Q
+    source_re = re.compile(
+        r"^\s*(\w+:)?\s*(?P<delay>\d+(\.\d+)?)\s+(?P<slack>\d+(\.\d+)?)\s*Source\s+(?P<source>\S+)"
+    )
+    # Info:  0.3  0.4    Net breath_effect_inst.counter[0] budget 0.320000 ns (33,125) -> (33,125)
+    net_re = re.compile(
+        r"^\s*(\w+:)?\s+(?P<net_delay>\d+(\.\d+)?)\s+(?P<slack_delay>\d+(\.\d+)?)\s*Net\s+(?P<net>\S+)\s*"
+        r"budget\s+(?P<budget>\d+(\.\d+)?)\s*ns\s*\((?P<from>\d+,\d+)\)\s*->\s*\((?P<to>\d+,\d+)\)"
+    )
+    # Info: 0.7 ns logic, 2.1 ns routing
+    delay_breakdown_re = re.compile(
+        r"\s*(\w+:)?\s*(?P<logic_delay>\d+(\.\d+)?)\s*(?P<logic_delay_unit>\w+)\s+logic,?\s*"
+        r"(?P<routing_delay>\d+(\.\d+)?)\s*(?P<routing_delay_unit>\w+)\s*"
+    )
+
+    def __init__(self) -> None:
+        self.device_utilization: Dict[str, Dict[str, Any]] = {}
+        self.clocks: List[Dict[str, Any]] = []
+        self.critical_path_reports: List[Dict[str, Any]] = []
+        self._state: Optional[str] = None  # None, "utilization", or "critical_path"
+        self._seen_utilization = False
+        self._crit_path: Optional[Dict[str, Any]] = None
+        self._source: Optional[re.Match] = None
+        self._last_line = ""
+
+    def feed(self, line: str) -> None:
+        if self._state is not None:
+            if not line.strip():
+                self._end_section()
+                return
+            if self._state == "utilization":
+                self._utilization_line(line)
+            else:
+                self._critical_path_line(line)
+            return
+        if "device utili" in line.lower() and not self._seen_utilization:
+            self._seen_utilization = True
+            self._state = "utilization"
+        elif "Critical path report for" in line:
+            self._state = "critical_path"
+            match = self.critical_path_re.search(line)
+            if match:
+                self._crit_path = dict(match.groupdict(), paths=[])
+        elif "frequency for clock" in line:
+            match = self.clock_re.search(line)
+            if match:
+                self.clocks.append(
+                    {
+                        "clock_name": match.group("clock_name"),
+                        "max_freq": _try_convert(match.group("max_freq"), float),
+                        "max_freq_unit": match.group("max_freq_unit"),
+                        "status": match.group("status"),
+                        "requested_freq": _try_convert(match.group("requested_freq"), float),
+                        "requested_freq_unit": match.group("requested_freq_unit"),
+                    }
+                )
+
+    def _utilization_line(self, line: str) -> None:
+        match = self.device_util_re.match(line)
+        if match:
+            self.device_utilization[match.group("resource").strip()] = {
+                "used": _try_convert(match.group("used"), int),
+                "available": _try_convert(match.group("available"), int),
+                "percentage": _try_convert(match.group("percentage"), float),
+            }
+
+    def _critical_path_line(self, line: str) -> None:
+        if self._crit_path is None:
+            return
+        self._last_line = line
+        if self._source is not None:
+            # a Source line is followed by the Net line of the same hop
+            source, self._source = self._source, None
+            match = self.net_re.match(line)
+            if match:
+                self._crit_path["paths"].append(
+                    {
+                        "delay": _try_convert(source.group("delay"), float),
+                        "slack": _try_convert(source.group("slack"), float),
+                        "source": source.group("source"),
+                        "net_delay": _try_convert(match.group("net_delay"), float),
+                        "slack_delay": _try_convert(match.group("slack_delay"), float),
+                        "net": match.group("net"),
+                        "budget": _try_convert(match.group("budget"), float),
+                        "from": match.group("from"),
+                        "to": match.group("to"),
+                    }
+                )
+                return
+        if "Source" in line:
+            self._source = self.source_re.match(line)
+
+    def _end_section(self) -> None:
+        crit_path = self._crit_path
+        if crit_path is not None:
+            # the last line of the section is the delay breakdown
+            match = self.delay_breakdown_re.search(self._last_line)
+            if match:
+                crit_path["logic_delay"] = _try_convert(match.group("logic_delay"), float)
+                crit_path["logic_delay_unit"] = match.group("logic_delay_unit")
+                crit_path["routing_delay"] = _try_convert(match.group("routing_delay"), float)
+                crit_path["routing_delay_unit"] = match.group("routing_delay_unit")
+            self.critical_path_reports.append(crit_path)
+        self._state = None
+        self._crit_path = None
+        self._source = None
+        self._last_line = ""
+
+    def finish(self) -> Dict[str, Any]:
+        if self._state is not None:
+            self._end_section()
+        return {
+            "_device_utilization": self.device_utilization,
+            "_clocks": self.clocks,
+            "_critical_path_reports": self.critical_path_reports,
+        }
+
+
+def parse_nextpnr_logfile(log_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Parse the output log of nextpnr and return a hierarchical dictionary
+    """
+    parser = NextpnrLogParser()
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parser.feed(line)
+    return parser.finish()
+
+
+def nextpnr_max_frequency(parsed_data: Dict[str, Any]) -> Optional[float]:
+    """Highest reported maximum frequency among all clocks"""
+    f_max = None
+    for clock in parsed_data.get("_clocks", []):
+        clock_max_freq = clock.get("max_freq", 0)
+        if f_max is None or clock_max_freq > f_max:
+            f_max = clock_max_freq
+    return f_max
+
+
 class Nextpnr(FpgaSynthFlow):
+    parallelism = "threads"
+
     class Settings(WithFpgaBoardSettings):
         verbose: bool = False
         lpf_cfg: Optional[str] = None
@@ -232,3 +401,20 @@ class Nextpnr(FpgaSynthFlow):
         if ss.extra_args:
             args += ss.extra_args
         next_pnr.run(*args)
+
+    def parse_reports(self) -> bool:
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        if not ss.log:
+            log.warning("Logging was disabled, so cannot analyse Nextpnr reports!")
+            return True
+        log_path = Path(ss.log)
+        if not log_path.exists():
+            log.error("Nextpnr log file %s not found!", log_path)
+            return False
+        parsed_data = parse_nextpnr_logfile(log_path)
+        self.results.update(**parsed_data)
+        f_max = nextpnr_max_frequency(parsed_data)
+        if f_max:
+            self.results["f_max"] = f_max
+        return True
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from functools import cached_property
 from pathlib import Path
@@ -7,8 +8,18 @@ from typing import List, Literal, Optional, Union
 
 from ...dataclass import Field
 from ...design import DesignSource, SourceType, VhdlSettings
-from ...flow import SimFlow
+from ...flow import SimFlow, SimRun
+from ...limits import process_limiter
+from ...proc_utils import run_process_async, unlocked
 from ...tool import Tool
+from ...vhdl_deps import (
+    dependency_graph,
+    dependents,
+    parse_vhdl_units,
+    topological_levels,
+    topological_order,
+)
+from .library_cache import LibraryCache
 
 log = logging.getLogger(__name__)
 
@@ -34,6 +45,15 @@ class Nvc(SimFlow):
             False,
             description="Do not check the timestamps of source files when the corresponding design unit is loaded from a library.",
         )
+        incremental_analysis: bool = Field(
+            True,
+            description="Reuse the work library analyzed in previous runs of the design (kept in the xeda cache directory), and only analyze the sources which have changed and the sources which depend on their design units.",
+        )
+        analysis_jobs: int = Field(
+            1,
+            ge=1,
+            description="With incremental_analysis, analyze up to this many independent sources (with no dependencies between them) in concurrent nvc processes.",
+        )
         heap_size: Optional[str] = Field(
             None,
             description="Set the maximum size in bytes of the simulation heap. This area of memory is used for temporary allocations during process execution and dynamic allocations by the VHDL ‘new’ operator. The size parameter takes an optional k, m, or g suffix to indicate kilobytes, megabytes, and gigabytes respectively. The default size is 16 megabytes.",
@@ -199,7 +219,7 @@ class Nvc(SimFlow):
     def analyze_flags(self) -> list:
         ss = self.settings
         assert isinstance(ss, self.Settings)
-        flags = ss.analysis_flags
+        flags = list(ss.analysis_flags)
         if ss.psl_in_comments:
             flags.append("--psl")
         if ss.relaxed:
@@ -219,7 +239,87 @@ class Nvc(SimFlow):
         assert isinstance(ss, self.Settings)
         if sources is None:
             sources = self.design.sim_sources_of_type(SourceType.Vhdl)
-        self.nvc.run(*self.global_options(), "-a", *sources, *self.analyze_flags())
+        if ss.incremental_analysis:
+            self.analyze_incremental(sources)
+        else:
+            self.nvc.run(*self.global_options(), "-a", *sources, *self.analyze_flags())
+
+    def work_library_dir(self) -> Path:
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        name, _, path = (ss.work or "work").partition(":")
+        return self.run_path / (path or name.lower())
+
+    def analyze_incremental(self, sources: List[DesignSource]) -> None:
+        """Analyze the sources which have changed since they were analyzed into the cached work
+        library, and the sources which depend on them, in dependency order"""
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        global_options = self.global_options()
+        analyze_flags = self.analyze_flags()
+        lib_dir = self.work_library_dir()
+        cache = LibraryCache(
+            dict(
+                nvc=self.nvc.info,
+                options=global_options,
+                flags=analyze_flags,
+                # changes to the sources are detected from the stamps
+                design=self.design.name,
+                design_root=str(self.design.design_root),
+            )
+        )
+        stamps = cache.restore(lib_dir)
+        files = {str(src): src for src in sources}
+        graph = dependency_graph(
+            {f: parse_vhdl_units(src.path, ss.work or "work") for f, src in files.items()}
+        )
+        changed = [f for f, src in files.items() if stamps.get(f) != src.content_hash]
+        stale = dependents(graph, changed)
+        to_analyze = [f for f in files if f in stale]
+        log.info(
+            "Analyzing %d of %d VHDL sources (%d changed)",
+            len(to_analyze),
+            len(files),
+            len(changed),
+        )
+        if to_analyze:
+            if ss.analysis_jobs > 1 and not (self.nvc.docker and self.nvc.dockerized):
+                self.analyze_parallel(topological_levels(graph, to_analyze), global_options)
+            else:
+                ordered = topological_order(graph, to_analyze)
+                self.nvc.run(*global_options, "-a", *ordered, *analyze_flags)
+            cache.save(lib_dir, {f: src.content_hash for f, src in files.items()})
+
+    def analyze_parallel(self, levels: List[List[str]], global_options: List[str]) -> None:
+        """Analyze each level of sources in up to `analysis_jobs` concurrent nvc processes"""
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        analyze_flags = self.analyze_flags()
+
+        async def analyze_level(level: List[str]) -> None:
+            chunks = [
+                level[i :: ss.analysis_jobs] for i in range(min(ss.analysis_jobs, len(level)))
+            ]
+            await asyncio.gather(
+                *(
+                    run_process_async(
+                        self.nvc.executable,
+                        [*self.nvc.default_args, *global_options, "-a", *chunk, *analyze_flags],
+                        cwd=self.run_path,
+                        print_command=self.nvc.print_command,
+                        tag=f"nvc-a{i}" if len(chunks) > 1 else None,
+                        limiter=process_limiter(),
+                    )
+                    for i, chunk in enumerate(chunks)
+                )
+            )
+
+        async def analyze_levels() -> None:
+            for level in levels:
+                await analyze_level(level)
+
+        with unlocked():
+            asyncio.run(analyze_levels())
 
     def elaborate_flags(self) -> List[str]:
         ss = self.settings
@@ -253,8 +353,8 @@ class Nvc(SimFlow):
         """
         self.nvc.run(*self.global_options(), "-e", *self.design.sim_tops, *self.elaborate_flags())
 
-    def execute(self, one_shot=False) -> None:
-        """Run the simulation"""
+    def execute(self, one_shot=False, analyzed=False) -> None:
+        """Run the simulation. If `one_shot`, elaborate (and analyze, unless `analyzed`) as well."""
         ss = self.settings
         assert isinstance(ss, self.Settings)
         run_flags = ss.run_flags
@@ -306,12 +406,13 @@ class Nvc(SimFlow):
         run_flags += [f"--load={p}" for p in vhpi]
 
         if one_shot:
-            sources = self.design.sim_sources_of_type(SourceType.Vhdl)
+            analyze_args = []
+            if not analyzed:
+                sources = self.design.sim_sources_of_type(SourceType.Vhdl)
+                analyze_args = ["-a", *sources, *self.analyze_flags()]
             self.nvc.run(
                 *self.global_options(),
-                "-a",
-                *sources,
-                *self.analyze_flags(),
+                *analyze_args,
                 "-e",
                 *self.design.sim_tops,
                 *self.elaborate_flags(),
@@ -320,7 +421,8 @@ class Nvc(SimFlow):
                 env=self.cocotb.env(self.design) if self.cocotb else {},
             )
         else:
-            self.nvc.run(
+            self.run_sim(
+                self.nvc,
                 *self.global_options(),
                 "-r",
                 *self.design.sim_tops,
@@ -328,6 +430,11 @@ class Nvc(SimFlow):
                 env=self.cocotb.env(self.design) if self.cocotb else {},
             )
 
+    def sim_run_args(self, run: SimRun) -> List[str]:
+        if run.seed is not None and not self.cocotb:
+            log.warning("nvc does not support the seed of simulation runs")
+        return [] if run.stop_time is None else [f"--stop-time={run.stop_time}"]
+
     def gen_makefile(self, units: List[str]) -> None:
         self.nvc.run("--make", *units)
 
@@ -339,10 +446,16 @@ class Nvc(SimFlow):
         assert design.tb
         ss = self.settings
         assert isinstance(ss, self.Settings)
-        if not ss.one_shot:
+        one_shot = ss.one_shot
+        if one_shot and (ss.runs or (self.cocotb and (ss.cocotb.shards != 1 or ss.seeds))):
+            log.info("Not using one_shot, as the simulation processes share the elaborated design")
+            one_shot = False
+        analyzed = ss.incremental_analysis or not one_shot
+        if analyzed:
             self.analyze()
+        if not one_shot:
             self.elaborate()
-        self.execute(one_shot=ss.one_shot)
+        self.execute(one_shot=one_shot, analyzed=analyzed)
 
     def parse_reports(self) -> bool:
         success = True
@@ -0,0 +1,64 @@
+"""Cache of analyzed NVC libraries"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ...utils import CacheEntry, cache_dir
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "LibraryCache",
+]
+
+
+class LibraryCache(CacheEntry):
+    """A work library analyzed in a previous run, along with its stamps: the content hash of each
+    source file at the time it was analyzed. Keyed by the NVC version, the analysis options, and the
+    design (its name and root directory), so that the library of a design can be updated
+    incrementally, in any run directory."""
+
+    stamps_file = "stamps.json"
+
+    def __init__(self, key: Dict[str, Any], root: Optional[Path] = None) -> None:
+        super().__init__(key, cache_dir("nvc") if root is None else root)
+
+    def restore(self, lib_dir: Path) -> Dict[str, str]:
+        """Replace `lib_dir` with the cached library, if any. Returns the stamps of the library."""
+        try:
+            with open(self.path / self.stamps_file) as f:
+                stamps = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring invalid NVC library cache %s: %s", self.path, e)
+            return {}
+        try:
+            if lib_dir.exists():
+                shutil.rmtree(lib_dir)
+            shutil.copytree(self.path / "library", lib_dir)
+            # NVC rejects design units which are older than their sources. The restored units are
+            # up to date (their sources have the same content hash), even if a source file is newer
+            # (e.g., after a checkout), and units of changed sources are re-analyzed after this.
+            for unit_file in lib_dir.rglob("*"):
+                os.utime(unit_file)
+        except OSError as e:
+            log.warning("Failed to restore NVC library from %s: %s", self.path, e)
+            shutil.rmtree(lib_dir, ignore_errors=True)
+            return {}
+        return stamps
+
+    def save(self, lib_dir: Path, stamps: Dict[str, str]) -> None:
+        try:
+            with self.replace() as tmp:
+                shutil.copytree(lib_dir, tmp / "library")
+                with open(tmp / self.stamps_file, "w") as f:
+                    json.dump(stamps, f)
+        except OSError as e:
+            log.warning("Failed to cache NVC library in %s: %s", self.path, e)
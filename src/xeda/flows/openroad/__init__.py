@@ -15,7 +15,7 @@ from ...flows.yosys import HiLoMap, Yosys, preproc_libs
 from ...platforms import AsicsPlatform
 from ...tool import ExecutableNotFound, Tool
 from ...units import convert_unit
-from ...utils import try_convert, unique
+from ...utils import parse_step_metrics, try_convert, unique
 
 log = logging.getLogger(__name__)
 
@@ -65,8 +65,29 @@ def embrace(s):
 class Openroad(AsicSynthFlow):
     """OpenROAD open-source ASIC synthesis flow"""
 
+    parallelism = "threads"
+
     merged_lib_file = "merged.lib"  # used by Yosys and floorplan (restructure)
 
+    flow_steps = [
+        "load",
+        "floorplan",
+        "resynth",
+        "pre_place",
+        "io_place",
+        "global_place",
+        "resize",
+        "detailed_place",
+        "cts",
+        "filler",
+        "global_route",
+        "detailed_route",
+        "finalize",
+    ]
+    # banners printed by the `preamble` macro (templates/macros.tcl.j2)
+    stage_markers = {step: rf"Starting {step} \(\d+/\d+\)" for step in flow_steps}
+    step_metrics_file = "step_metrics.jsonl"
+
     class Settings(AsicSynthFlow.Settings):
         platform: AsicsPlatform
         corner: Optional[Union[str, List]] = None
@@ -292,6 +313,8 @@ class Openroad(AsicSynthFlow):
         ss = self.settings
         ss.results_dir.mkdir(exist_ok=True, parents=True)
         ss.checkpoints_dir.mkdir(exist_ok=True, parents=True)
+        step_metrics_file = self.run_path / self.step_metrics_file
+        step_metrics_file.unlink(missing_ok=True)
 
         yosys_dep = self.pop_dependency(Yosys)
         netlist = yosys_dep.artifacts.netlist_verilog
@@ -326,23 +349,10 @@ class Openroad(AsicSynthFlow):
             TAP_CELL_NAME=ss.platform.tapcell_name,  # needed by platform.tapcell_tcl
         )
 
-        flow_steps = [
-            "load",
-            "floorplan",
-            "resynth",
-            "pre_place",
-            "io_place",
-            "global_place",
-            "resize",
-            "detailed_place",
-            "cts",
-            "filler",
-            "global_route",
-            "detailed_route",
-            "finalize",
-        ]
         one_shot = True  # TODO
 
+        flow_steps = self.flow_steps
+
         def get_step_index(step_name):
             return flow_steps.index(step_name)
 
@@ -385,6 +395,7 @@ class Openroad(AsicSynthFlow):
             netlist=synth_netlist,
             merged_lib_file=self.merged_lib_file,  # used by resynth
             total_steps=len(flow_steps),
+            step_metrics_file=step_metrics_file,
         )
         self.artifacts.logs = []
 
@@ -522,6 +533,10 @@ class Openroad(AsicSynthFlow):
                 v = metrics.get(metr_name)
                 if v is not None:
                     results[res_name] = v
+        # wall time, CPU time, and peak memory of each step
+        steps = parse_step_metrics(self.run_path / self.step_metrics_file)
+        if steps:
+            results["steps"] = steps
         wns = results.get("wns")
         worst_slack = results.get("worst_slack")
         self.results.update(**results, success=True)
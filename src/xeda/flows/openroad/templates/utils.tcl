@@ -28,6 +28,50 @@ proc print_banner {header} {
   puts "--------------------------------------------------------------------------"
 }
 
+# user+system CPU time of this OpenROAD process, in seconds (only available on Linux)
+proc step_metrics_cpu_seconds {} {
+  if {[catch {set fp [open /proc/[pid]/stat r]; set stat [read $fp]; close $fp}]} {
+    return ""
+  }
+  if {[catch {set clk_tck [exec getconf CLK_TCK]}] || ![string is integer -strict $clk_tck]} {
+    set clk_tck 100
+  }
+  # fields following the (possibly space-containing) command name
+  set fields [string range $stat [expr {[string last ")" $stat] + 2}] end]
+  return [expr {([lindex $fields 11] + [lindex $fields 12]) / double($clk_tck)}]
+}
+
+proc step_metrics_begin {} {
+  # reset the peak resident memory (VmHWM), so it's measured per step
+  catch {set fp [open /proc/[pid]/clear_refs w]; puts -nonewline $fp 5; close $fp}
+  set ::xeda_step_start [clock milliseconds]
+  set ::xeda_step_cpu_start [step_metrics_cpu_seconds]
+}
+
+proc step_metrics_end {step metrics_file} {
+  set end [clock milliseconds]
+  set start null
+  set elapsed null
+  if {[info exists ::xeda_step_start]} {
+    set start $::xeda_step_start
+    set elapsed [expr {($end - $start) / 1000.0}]
+  }
+  set cpu_time null
+  set cpu_end [step_metrics_cpu_seconds]
+  if {$cpu_end != "" && [info exists ::xeda_step_cpu_start] && $::xeda_step_cpu_start != ""} {
+    set cpu_time [format %.3f [expr {$cpu_end - $::xeda_step_cpu_start}]]
+  }
+  set peak_memory null
+  if {![catch {set fp [open /proc/[pid]/status r]; set status [read $fp]; close $fp}]} {
+    if {[regexp {VmHWM:\s+(\d+)\s+kB} $status -> kb]} {
+      set peak_memory [expr {$kb / 1024.0}]
+    }
+  }
+  set fp [open $metrics_file a]
+  puts $fp "{\"step\": \"$step\", \"start\": $start, \"end\": $end, \"elapsed\": $elapsed, \"cpu_time\": $cpu_time, \"peak_memory\": $peak_memory}"
+  close $fp
+}
+
 proc report_metrics { when {include_erc true} {include_clock_skew true} } {
   print_banner "$when check_setup"
   check_setup
@@ -1,7 +1,6 @@
 import json
 import logging
 import os
-import re
 import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional, Union
@@ -12,6 +11,7 @@ from ...design import SourceType
 from ...flow import FPGA, FlowFatalError, FpgaSynthFlow
 from ...tool import Tool
 from ...utils import setting_flag
+from ..nextpnr import nextpnr_max_frequency, parse_nextpnr_logfile
 from ..yosys import YosysFpga
 
 __all__ = ["OpenXC7"]
@@ -425,11 +425,7 @@ class OpenXC7(FpgaSynthFlow):
                     self.results["RAMBFIFO36E1"] = get_used("RAMBFIFO36E1") or None
                     self.results["DSP48E1"] = get_used("DSP48E1") or None
 
-                    f_max = None
-                    for clock in parsed_data.get("_clocks", []):
-                        clock_max_freq = clock.get("max_freq", 0)
-                        if f_max is None or clock_max_freq > f_max:
-                            f_max = clock_max_freq
+                    f_max = nextpnr_max_frequency(parsed_data)
                     if f_max:
                         self.results["f_max"] = f_max
 
@@ -487,165 +483,3 @@ class OpenXC7(FpgaSynthFlow):
             log.info("Chip database generated: %s", bin_path)
             return bin_path
         return None
-
-
-def parse_nextpnr_logfile(log_path: Path) -> Dict:
-    """
-    Parse the output log of nextpnr and return a hierarchical dictionary
-    """
-
-    # Read the entire file as lines
-    with log_path.open("r", encoding="utf-8") as f:
-        lines = f.read().splitlines()
-
-    # Prepare the data structures to hold results
-    device_utilization = {}
-    critical_path_reports = []
-    clocks_reports = []
-
-    # Helper functions find the section(s) between two regex patterns
-    # end_section_re is NOT part of the section, it's the first line after
-    def find_section_bounds(lines_list, start_section_re, end_section_re, re_flags=re.IGNORECASE):
-        start_line = None
-        end_line = None
-        for idx, text in enumerate(lines_list):
-            if re.search(start_section_re, text, re_flags):
-                start_line = idx
-            elif start_line is not None and re.search(end_section_re, text, re_flags):
-                end_line = idx
-                break
-        return start_line, end_line
-
-    def find_all_sections(
-        lines, start_section_re, end_section_re=r"^\s*$", re_flags=re.IGNORECASE
-    ) -> list[list[str]]:
-
-        sections = []
-        # fist occurence
-        while True:
-            start_line, end_line = find_section_bounds(
-                lines, start_section_re, end_section_re, re_flags
-            )
-            if start_line is None:
-                break
-            if end_line is None:
-                sections.append(lines[start_line:])
-                break
-            sections.append(lines[start_line:end_line])
-            lines = lines[end_line:]
-
-        return sections
-
-    def find_section(lines_list, start_section_re, end_section_re=r"^\s*$", re_flags=re.IGNORECASE):
-        start_line, end_line = find_section_bounds(
-            lines_list, start_section_re, end_section_re, re_flags
-        )
-        if start_line is not None:
-            if end_line is None:
-                end_line = -1
-            return lines[start_line:end_line]
-        return None
-
-    def try_convert(value: str, typ: type):
-        try:
-            return typ(value)
-        except ValueError:
-            return value
-
-    ## device utilization
-    device_util_re = re.compile(
-        r"^\s*(\w+:)?\s*(?P<resource>[^:]+?)\s*:\s*"
-        r"(?P<used>\d+)\s*/\s*(?P<available>\d+)\s+"
-        r"(?P<percentage>\d[\d\.]*)\s*%"
-    )
-
-    section = find_section(lines, r"Device utili.ation:")
-    if section is not None:
-        for line in section:
-            match = device_util_re.match(line)
-            if match:
-                res_name = match.group("resource").strip()
-                used_val = try_convert(match.group("used"), int)
-                avail_val = try_convert(match.group("available"), int)
-                perc_val = try_convert(match.group("percentage"), float)
-
-                device_utilization[res_name] = {
-                    "used": used_val,
-                    "available": avail_val,
-                    "percentage": perc_val,
-                }
-
-    with log_path.open("r", encoding="utf-8") as f:
-        full_text = f.read()
-
-    clock_regex = re.compile(
-        r"frequency for clock\s*'(?P<clock_name>\S+)':\s*(?P<max_freq>\d[\d\.]*)\s*(?P<max_freq_unit>\w+)\s*\(?(?P<status>\w+)\s+at\s*(?P<requested_freq>\d[\d\.]*)\s*(?P<requested_freq_unit>\w+)\s*\)?"
-    )
-    for match in clock_regex.finditer(full_text):
-        clocks_reports.append(
-            {
-                "clock_name": match.group("clock_name"),
-                "max_freq": try_convert(match.group("max_freq"), float),
-                "max_freq_unit": match.group("max_freq_unit"),
-                "status": match.group("status"),
-                "requested_freq": try_convert(match.group("requested_freq"), float),
-                "requested_freq_unit": match.group("requested_freq_unit"),
-            }
-        )
-
-    cp_re = r"Critical path report for clock"
-    critical_path_re = re.compile(
-        cp_re + r"\s+'(?P<clock_name>\S+)'\s*"
-        r"\(\s*(?P<from_edge>\S+)\s*->\s*(?P<to_edge>\S+)\s*\)"
-    )
-    # process all matches of:
-    # Info:  0.1  0.1  Source $auto$ff.cc:266:slice$5358.Q
-    # Info:  0.3  0.4    Net breath_effect_inst.counter[0] budget 0.320000 ns (33,125) -> (33,125)
-    # Info:                Sink $abc$32698$lut$not$aiger32697$13.A1
-    path_re = re.compile(
-        r"\s*(\w+:)?\s*(?P<delay>\d+(\.\d+)?)\s+(?P<slack>\d+(\.\d+)?)\s*Source\s+(?P<source>\S+)\s*"
-        r"\s*(\w+:)?\s+(?P<net_delay>\d+(\.\d+)?)\s+(?P<slack_delay>\d+(\.\d+)?)\s*Net\s+(?P<net>\S+)\s*budget\s+(?P<budget>\d+(\.\d+)?)\s*ns\s*\((?P<from>\d+,\d+)\)\s*->\s*\((?P<to>\d+,\d+)\)"
-    )
-    delay_breakdown_re = re.compile(
-        r"\s*(\w+:)?\s*(?P<logic_delay>\d+(\.\d+)?)\s*(?P<logic_delay_unit>\w+)\s+logic,?\s*(?P<routing_delay>\d+(\.\d+)?)\s*(?P<routing_delay_unit>\w+)\s*"
-    )
-
-    for cp_section in find_all_sections(lines, cp_re):
-        match = critical_path_re.search(cp_section[0])
-        if match:
-            crit_path = {
-                "clock_name": match.group("clock_name"),
-                "from_edge": match.group("from_edge"),
-                "to_edge": match.group("to_edge"),
-            }
-
-            paths = []
-            secs = "\n".join(cp_section[2:])
-            for match in path_re.finditer(secs, re.MULTILINE | re.DOTALL):
-                paths.append(
-                    {
-                        "delay": try_convert(match.group("delay"), float),
-                        "slack": try_convert(match.group("slack"), float),
-                        "source": match.group("source"),
-                        "net_delay": try_convert(match.group("net_delay"), float),
-                        "slack_delay": try_convert(match.group("slack_delay"), float),
-                        "net": match.group("net"),
-                        "budget": try_convert(match.group("budget"), float),
-                        "from": match.group("from"),
-                        "to": match.group("to"),
-                    }
-                )
-            crit_path["paths"] = paths
-            match = delay_breakdown_re.search(cp_section[-1])
-            if match:
-                crit_path["logic_delay"] = try_convert(match.group("logic_delay"), float)
-                crit_path["logic_delay_unit"] = match.group("logic_delay_unit")
-                crit_path["routing_delay"] = try_convert(match.group("routing_delay"), float)
-                crit_path["routing_delay_unit"] = match.group("routing_delay_unit")
-
-            critical_path_reports.append(crit_path)
-    return {
-        "_device_utilization": device_utilization,
-        "_clocks": clocks_reports,
-        "_critical_path_reports": critical_path_reports,
-    }
@@ -73,6 +73,8 @@ def try_float(s: str):
 class Quartus(FpgaSynthFlow):
     """FPGA synthesis using Intel Quartus"""
 
+    parallelism = "threads"
+
     quartus_sh = Tool(
         executable="quartus_sh",
         docker=Docker(
@@ -17,6 +17,8 @@ log = logging.getLogger(__name__)
 class Vcs(SimFlow):
     """Synopsys VCS simulator"""
 
+    parallelism = "threads"
+
     highlight_rules = {
         r"^(Error:)(.+)$": fg.RED + style.BRIGHT + r"\g<0>",
         r"^(\*+ERROR\*+)(.+)$": fg.RED + style.BRIGHT + r"\g<0>",
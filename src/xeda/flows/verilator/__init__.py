@@ -1,21 +1,31 @@
+import json
 import logging
 import os
 import shutil
+import time
 from glob import glob
 from pathlib import Path
 from random import randint
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Union
 
 from pydantic import Field
 
-from ...design import SourceType
-from ...flow import SimFlow
-from ...tool import Tool
+from ...cocotb import TestResults
+from ...design import FileResource, SourceType
+from ...flow import SimFlow, SimRun
+from ...jobserver import current_tokens
+from ...tool import Docker, Tool
+from ...utils import ToolException, cache_dir, semantic_hash
+from .autotune import ThreadsTuning, host_cpu
+from .build_cache import BuildCache
+from .hierarchy import hier_blocks_config, select_hier_blocks
 
 log = logging.getLogger(__name__)
 
 
 class Verilator(SimFlow):
+    parallelism = "make"
+
     cocotb_sim_name = "verilator"
 
     class Settings(SimFlow.Settings):
@@ -35,7 +45,10 @@ class Verilator(SimFlow):
         verilog_libs: List[str] = []
         build: bool = True
         vpi: bool = False
-        no_deps: bool = True
+        no_deps: bool = Field(
+            True,
+            description="Do not generate the make dependency files of the model (--no-MMD). Ignored with build_cache, which needs them.",
+        )
         generate_systemc: bool = False
         generate_executable: bool = True
         compiler: Optional[str] = None
@@ -44,9 +57,17 @@ class Verilator(SimFlow):
         x_assign: str = "unique"
         fst: Union[None, str, Path] = None
         saif: Union[None, str, Path] = None
-        threads: int = Field(
+        threads: Union[Literal["auto"], int] = Field(
             0,
-            description="0: not thread-safe, 1: thread-safe single thread, 2+: multithreaded",
+            description="0: not thread-safe, 1: thread-safe single thread, 2+: multithreaded, auto: the best of autotune_threads, benchmarked on the first build of the design on this host",
+        )
+        autotune_threads: List[int] = Field(
+            [1, 2, 4, 8],
+            description="Numbers of threads benchmarked with threads=auto (up to the number of CPUs)",
+        )
+        autotune_run: SimRun = Field(
+            SimRun(name="autotune"),
+            description="The benchmark run of threads=auto, in addition to model_args. It should be short, but long enough to be representative.",
         )
         trace_underscore: bool = True
         trace_structs: bool = True
@@ -54,10 +75,73 @@ class Verilator(SimFlow):
         trace_max_width: Optional[int] = 2048
         trace_max_array: Optional[int] = 2048
         clean_before_run: bool = True
+        build_cache: bool = Field(
+            True,
+            description="Reuse the model built by a previous run with identical sources, Verilator version, and options (kept in the xeda cache directory), instead of verilating and compiling it again.",
+        )
+        build_cache_max_size: Optional[float] = Field(
+            10.0,
+            description="Maximum total size of the cached models, in GB. The least recently used models are removed. No limit if not set.",
+        )
+        ccache: Optional[bool] = Field(
+            None,
+            description="Compile the verilated model through ccache (Verilator's OBJCACHE). Default: use ccache if it is found in PATH, unless OBJCACHE is already set.",
+        )
+        hier_blocks: Union[None, Literal["auto"], List[str]] = Field(
+            None,
+            description="Modules which are verilated separately, in parallel, as hierarchical blocks (Verilator's --hierarchical). 'auto': select large modules, preferring repeated ones, using the cell statistics of Yosys.",
+        )
+        hier_auto_min_cells: int = Field(
+            5000,
+            description="With hier_blocks=auto, minimum number of cells (including those of submodules) of a hierarchical block",
+        )
+        hier_auto_max_blocks: int = Field(
+            8, description="With hier_blocks=auto, maximum number of hierarchical blocks"
+        )
+        pgo: bool = Field(
+            False,
+            description="Profile-guided optimization: build an instrumented model, run it (pgo_training), and rebuild the model using the collected profiles: Verilator's thread scheduling profile (with threads > 1) and the C++ compiler's profile (pgo_compiler). The profiles are kept with the model in the build cache.",
+        )
+        pgo_training: SimRun = Field(
+            SimRun(name="pgo_training"),
+            description="Training run of the instrumented model, in addition to model_args. It should be representative of the simulations, yet short.",
+        )
+        pgo_compiler: bool = Field(
+            True,
+            description="With pgo, also use the C++ compiler's profile-guided optimization (-fprofile-generate/-fprofile-use).",
+        )
 
     def run(self):
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
+        if ss.threads == "auto":
+            ss.threads = self.autotune()
+        model = self.build()
+        model_args = [*ss.model_args, *self.trace_args()]
+        if ss.random_init:
+            random_seed = (
+                1 if ss.debug else randint(1, 1 << 31)
+            )  # 0 = choose value from system random number generator
+            model_args += [f"+verilator+seed+{random_seed}", "+verilator+rand+reset+2"]
+        env = self.cocotb.env(self.design) if self.cocotb else None
+        self.run_sim(model, *model_args, env=env)
+
+    def trace_args(self) -> List[str]:
+        """Arguments of the model for generating the waveform (trace) file, if any"""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        trace = ss.vcd or ss.fst or ss.saif
+        if not trace:
+            return []
+        if isinstance(trace, (str, Path)):
+            return ["--trace", "--trace-file", str(self.process_path(trace, subs_vars=True))]
+        return ["--trace"]
+
+    def build(self) -> Tool:
+        """Verilate and build the simulation model, which can then be run any number of times.
+        Returns the model executable."""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
 
         self.rm_dep_files()
 
@@ -86,12 +170,16 @@ class Verilator(SimFlow):
         if not self.cocotb and not self.design.sim_sources_of_type(SourceType.Cpp):
             args += ["--main"]
 
-        if ss.build:
-            args.append("--build")
+        # With a jobserver, the model is built by running make directly (below), as Verilator passes
+        # an explicit `-j` to make, which would override the jobserver.
+        make_jobserver = ss.build and current_tokens() is not None and not verilator.dockerized
+        build_args: List[Any] = []
+        if ss.build and not make_jobserver:
+            build_args.append("--build")
 
-        args += [
+        build_args += [
             "-j",  # Parallelism for --build-jobs/--verilate-jobs
-            0,  # 0: auto
+            1 if make_jobserver else 0,  # 0: auto
         ]
 
         for wf in ss.warn_flags:
@@ -105,7 +193,8 @@ class Verilator(SimFlow):
                 "--compiler",
                 ss.compiler,
             ]
-        if ss.no_deps:
+        # the build cache checks the files read by Verilator, from its dependency files
+        if ss.no_deps and not (ss.build and ss.build_cache):
             args += [
                 "--no-MMD",
             ]
@@ -166,7 +255,6 @@ class Verilator(SimFlow):
                     update=dict(command=[self.cocotb.executable]),
                 )
 
-        model_args = ss.model_args
         if ss.vcd:
             args += [
                 "--trace-vcd",
@@ -181,11 +269,8 @@ class Verilator(SimFlow):
             ]
         trace = ss.vcd or ss.fst or ss.saif
         if trace:
-            model_args.append("--trace")
             if isinstance(trace, (str, Path)):
-                trace = str(self.process_path(trace, subs_vars=True))
-                model_args += ["--trace-file", trace]
-                log.info("Will generate trace file %s", trace)
+                log.info("Will generate trace file %s", self.trace_args()[-1])
             else:
                 log.info("Will generate trace file in %s", ss.sim_dir)
             if ss.trace_threads:
@@ -208,8 +293,6 @@ class Verilator(SimFlow):
         if cflags:
             args += ["-CFLAGS", " ".join(cflags)]
 
-        env = None
-
         args += compile_args
         args += [f"-D{k}" if v is None else f"-D{k}={v}" for k, v in defines.items()]
         args += [f"-I{dir}" for dir in ss.include_dirs]
@@ -229,7 +312,6 @@ class Verilator(SimFlow):
                 "-LDFLAGS",
                 f"-Wl,-rpath,{lib_dir} -L{lib_dir} -lcocotbvpi_verilator",
             ]
-            env = self.cocotb.env(self.design)
             cocotb_cpp = None
             coco_share_dir = self.cocotb.share_dir
             if coco_share_dir:
@@ -246,14 +328,261 @@ class Verilator(SimFlow):
                 cocotb_cpp = self.copy_from_template("cocotb_verilator.cpp", top=top or "top")
             sources.append(cocotb_cpp)
 
-        verilator.run(*args, *sources)
-        if ss.random_init:
-            random_seed = (
-                1 if ss.debug else randint(1, 1 << 31)
-            )  # 0 = choose value from system random number generator
-            model_args += [f"+verilator+seed+{random_seed}", "+verilator+rand+reset+2"]
+        hier_blocks = self.hier_blocks()
+        if hier_blocks:
+            hier_config = self.run_path / "hier_blocks.vlt"
+            hier_config.write_text(hier_blocks_config(hier_blocks))
+            args.append("--hierarchical")
+            sources.append(hier_config)
+
+        build_env = {"OBJCACHE": "ccache"} if ss.build and self.use_ccache(verilator) else None
+        build_cache = None
+        if ss.build and ss.build_cache:
+            build_cache = BuildCache(
+                dict(
+                    verilator=verilator.info,
+                    args=[str(arg) for arg in args],
+                    sources=self.files_fingerprint(sources),
+                    # also checked (with all other files read by Verilator) before reusing the model
+                    includes=self.files_fingerprint(
+                        p
+                        for d in ss.include_dirs
+                        if Path(d).is_dir()
+                        for p in sorted(Path(d).rglob("*"))
+                        if p.is_file()
+                    ),
+                    libs=self.files_fingerprint(ss.verilog_libs),
+                    cxx=os.environ.get("CXX"),
+                    pgo=[ss.pgo_training.dict(), ss.pgo_compiler] if ss.pgo else None,
+                )
+            )
+
+        def build_model(*extra_args: Any) -> None:
+            verilator.run(*args, *extra_args, *build_args, *sources, env=build_env)
+            if make_jobserver:
+                make = verilator.derive("make", make_jobserver_client=True)
+                makefile = "Vtop_hier.mk" if hier_blocks else "Vtop.mk"
+                make.run("-C", ss.sim_dir, "-f", makefile, env=build_env)
+
+        # The latest build of a hierarchical design, so that Verilator and make only re-verilate and
+        # recompile the blocks whose sources have changed.
+        latest_build = None
+        if build_cache is not None and hier_blocks:
+            latest_build = BuildCache(
+                dict(design=self.design.name, verilator=verilator.info, args=[str(a) for a in args])
+            )
         model = verilator.derive(verilated_bin)
-        model.run(*ss.model_args, env=env)
+        if build_cache is None or not build_cache.restore(Path(ss.sim_dir)):
+            if latest_build is not None:
+                latest_build.restore(Path(ss.sim_dir), check_dependencies=False)
+            if ss.pgo and ss.build:
+                self.pgo_build(build_model, model, verilator)
+            else:
+                build_model()
+            max_size = (
+                int(ss.build_cache_max_size * 1e9) if ss.build_cache_max_size is not None else None
+            )
+            if build_cache is not None:
+                build_cache.save(Path(ss.sim_dir), max_size)
+            if latest_build is not None:
+                latest_build.save(Path(ss.sim_dir), max_size)
+        return model
+
+    def hier_blocks(self) -> List[str]:
+        """Modules to verilate as hierarchical blocks. With hier_blocks=auto, they are selected from
+        the cell statistics of the RTL sources, which are computed by Yosys once for each version of
+        the RTL."""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        if ss.hier_blocks != "auto":
+            return list(ss.hier_blocks or [])
+        rtl = self.design.rtl
+        selection = cache_dir("verilator", "hier_blocks") / (
+            semantic_hash(
+                dict(
+                    rtl=self.design.rtl_hash,
+                    include_dirs=ss.include_dirs,
+                    min_cells=ss.hier_auto_min_cells,
+                    max_blocks=ss.hier_auto_max_blocks,
+                )
+            )[:32]
+            + ".json"
+        )
+        try:
+            with open(selection) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        sources = self.design.sources_of_type(
+            SourceType.Verilog, SourceType.SystemVerilog, rtl=True, tb=False
+        )
+        stat_json = self.run_path / "hier_stat.json"
+        script = [
+            " ".join(
+                ["read_verilog", "-sv", *(f"-I{d}" for d in ss.include_dirs), *map(str, sources)]
+            ),
+            " ".join(
+                ["hierarchy", *(["-top", rtl.top] if rtl.top else ["-auto-top"])]
+                + [f"-chparam {name} {value}" for name, value in rtl.parameters.items()]
+            ),
+            "proc",
+            f"tee -q -o {stat_json} stat -json",
+        ]
+        yosys = Tool("yosys", docker=Docker(image="hdlc/impl"))  # type: ignore
+        try:
+            yosys.run("-q", "-p", "; ".join(script))
+            with open(stat_json) as f:
+                stat = json.load(f)
+        except (ToolException, OSError, ValueError) as e:
+            log.warning("Not using hierarchical verilation, as selecting blocks failed: %s", e)
+            return []
+        blocks = select_hier_blocks(stat, rtl.top, ss.hier_auto_min_cells, ss.hier_auto_max_blocks)
+        log.info("Hierarchical blocks: %s", ", ".join(blocks) or "-")
+        try:
+            with open(selection, "w") as f:
+                json.dump(blocks, f)
+        except OSError as e:
+            log.debug("Could not save the hierarchical blocks to %s: %s", selection, e)
+        return blocks
+
+    def autotune(self) -> int:
+        """The number of threads with the best simulation performance, which is benchmarked (once
+        for each design, Verilator version, and host CPU) by building the model with each of
+        `autotune_threads` and running `autotune_run`"""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        verilator = Tool("verilator", docker="xeda-verilator")
+        max_threads = os.cpu_count() or 1
+        candidates = sorted({n for n in ss.autotune_threads if 1 <= n <= max_threads}) or [1]
+        tuning = ThreadsTuning(
+            dict(
+                rtl=self.design.rtl_hash,
+                tb=self.design.tb_hash,
+                verilator=verilator.info,
+                cpu=host_cpu(),
+                candidates=candidates,
+                run=ss.autotune_run.dict(),
+            )
+        )
+        if tuning.threads is None:
+            env = self.cocotb.env(self.design) if self.cocotb else {}
+            benchmarks: Dict[int, Dict[str, float]] = {}
+            for n in candidates:
+                ss.threads = n
+                model = self.build()
+                log.info("Benchmarking the model with %d thread(s)", n)
+                results_xml = self.run_path / f"results_autotune{n}.xml"
+                start = time.monotonic()
+                model.run(
+                    *ss.model_args,
+                    *self.trace_args(),
+                    "+verilator+seed+1",
+                    *ss.autotune_run.args,
+                    *self.sim_run_args(ss.autotune_run),
+                    env={**env, **ss.autotune_run.env, "COCOTB_RESULTS_FILE": results_xml},
+                    stdout=self.run_path / f"{ss.autotune_run.name or 'autotune'}{n}.log",
+                )
+                benchmarks[n] = dict(time=time.monotonic() - start)
+                if self.cocotb and results_xml.exists():
+                    results = TestResults.parse_results(results_xml)
+                    benchmarks[n]["ratio_time"] = results.ratio_time
+            tuning.update(benchmarks)
+            self.results["threads_benchmarks"] = benchmarks
+        assert tuning.threads is not None
+        log.info("Using %d simulation thread(s), tuned in %s", tuning.threads, tuning.path)
+        self.results["threads"] = tuning.threads
+        return tuning.threads
+
+    def pgo_build(self, build_model: Callable[..., None], model: Tool, verilator: Tool) -> None:
+        """Two-pass profile-guided build: build an instrumented model with `build_model`, run
+        the training simulation, and rebuild the model with the collected profiles, which are kept
+        in the 'pgo' subdirectory of sim_dir."""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        sim_dir = Path(ss.sim_dir)
+        pgo_dir = (sim_dir / "pgo").absolute()
+        shutil.rmtree(pgo_dir, ignore_errors=True)
+        pgo_dir.mkdir(parents=True)
+        assert isinstance(ss.threads, int)
+        thread_pgo = ss.threads > 1
+        if thread_pgo and not verilator.version_gte(5):
+            log.warning("Thread profile-guided optimization requires Verilator 5 or later")
+            thread_pgo = False
+        if not thread_pgo and not ss.pgo_compiler:
+            log.warning("pgo: nothing to optimize (requires threads > 1 or pgo_compiler)")
+            build_model()
+            return
+        instrument_args: List[Any] = []
+        if thread_pgo:
+            instrument_args.append("--prof-pgo")
+        if ss.pgo_compiler:
+            generate = f"-fprofile-generate={pgo_dir}"
+            instrument_args += ["-CFLAGS", generate, "-LDFLAGS", generate]
+        log.info("PGO: building the instrumented model")
+        build_model(*instrument_args)
+
+        training = ss.pgo_training
+        training_args = [
+            *ss.model_args,
+            *self.trace_args(),
+            *training.args,
+            *self.sim_run_args(training),
+        ]
+        profile_vlt = pgo_dir / "profile.vlt"
+        if thread_pgo:
+            training_args.append(f"+verilator+prof+vlt+file+{profile_vlt}")
+        env = self.cocotb.env(self.design) if self.cocotb else {}
+        log.info("PGO: running the training simulation")
+        model.run(
+            *training_args,
+            env={**env, **training.env},
+            stdout=self.run_path / f"{training.name or 'pgo_training'}.log",
+        )
+        profraw_files = sorted(pgo_dir.glob("*.profraw"))
+        if profraw_files:  # clang
+            llvm_profdata = verilator.derive("llvm-profdata")
+            llvm_profdata.run("merge", "-o", pgo_dir / "default.profdata", *profraw_files)
+
+        # remove the instrumented objects, so that the whole model is rebuilt
+        for pattern in ("*.o", "*.a"):
+            for p in sim_dir.glob(pattern):
+                p.unlink()
+        Path(model.executable).unlink(missing_ok=True)
+        optimize_args: List[Any] = []
+        if thread_pgo:
+            if profile_vlt.exists():
+                optimize_args.append(profile_vlt)
+            else:
+                log.warning("The training run did not write the thread profile %s", profile_vlt)
+        if ss.pgo_compiler:
+            use = f"-fprofile-use={pgo_dir}"
+            if ss.threads > 1:  # counters of multithreaded models can be inconsistent
+                use += " -fprofile-correction"
+            optimize_args += ["-CFLAGS", use]
+        log.info("PGO: rebuilding the model using the collected profiles")
+        build_model(*optimize_args)
+
+    def sim_run_args(self, run: SimRun) -> List[str]:
+        if run.stop_time is not None:
+            log.warning("Verilator models do not support the stop_time of simulation runs")
+        return [] if run.seed is None else [f"+verilator+seed+{run.seed}"]
+
+    def use_ccache(self, verilator: Tool) -> bool:
+        assert isinstance(self.settings, self.Settings)
+        if self.settings.ccache is False or verilator.dockerized or "OBJCACHE" in os.environ:
+            return False
+        if shutil.which("ccache") is None:
+            if self.settings.ccache:
+                log.warning("ccache was not found in PATH")
+            return False
+        log.debug("Using ccache to compile the verilated model")
+        return True
+
+    @staticmethod
+    def files_fingerprint(files: Iterable[Any]) -> Dict[str, str]:
+        """content hashes of files (DesignSource, FileResource, or paths)"""
+        resources = (f if isinstance(f, FileResource) else FileResource(f) for f in files)
+        return {str(r): r.content_hash for r in resources}
 
     def rm_dep_files(self):
         assert isinstance(self.settings, self.Settings)
@@ -0,0 +1,64 @@
+"""Tuned number of simulation threads of Verilator models"""
+
+from __future__ import annotations
+
+import logging
+import os
+import platform
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ...utils import cache_dir, load_cache_file, save_cache_file, semantic_hash
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "ThreadsTuning",
+    "host_cpu",
+]
+
+
+def host_cpu() -> Dict[str, Any]:
+    """Identification of the host CPU: architecture, model name (if known), and number of CPUs"""
+    model = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    model = line.partition(":")[2].strip()
+                    break
+    except OSError:
+        pass
+    return dict(machine=platform.machine(), model=model, cpus=os.cpu_count())
+
+
+class ThreadsTuning:
+    """Benchmark results of a model built with different numbers of threads, and the best number of
+    threads, keyed by the design's RTL, the Verilator version, the host CPU, and the benchmark"""
+
+    def __init__(self, key: Dict[str, Any], root: Optional[Path] = None) -> None:
+        if root is None:
+            root = cache_dir("verilator", "threads")
+        self.path = root / f"{semantic_hash(key)[:32]}.json"
+        self.threads: Optional[int] = None
+        self.benchmarks: Dict[str, Dict[str, float]] = {}
+        data = load_cache_file(self.path, "threads tuning")
+        if isinstance(data, dict):
+            self.threads = data.get("threads")
+            self.benchmarks = data.get("benchmarks", {})
+
+    def update(self, benchmarks: Dict[int, Dict[str, float]]) -> int:
+        """Record the `benchmarks` of each number of threads (the wall-clock `time` of the benchmark
+        run, and its simulated/wall-clock time `ratio_time`, if known) and return the best number of
+        threads: the one with the highest ratio_time, or the shortest time."""
+
+        def speed(n: int) -> float:
+            ratio = benchmarks[n].get("ratio_time") or 0.0
+            return ratio if ratio > 0 else 1 / max(benchmarks[n]["time"], 1e-9)
+
+        self.threads = max(sorted(benchmarks), key=speed)
+        self.benchmarks = {str(n): b for n, b in benchmarks.items()}
+        save_cache_file(
+            self.path, dict(threads=self.threads, benchmarks=self.benchmarks), "threads tuning"
+        )
+        return self.threads
@@ -0,0 +1,99 @@
+"""Cache of verilated and built Verilator models"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ...design import FileResource
+from ...utils import CacheEntry, cache_dir
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "BuildCache",
+]
+
+
+class BuildCache(CacheEntry):
+    """The model directory (Verilator's `-Mdir`) of a previous build, keyed by the Verilator version,
+    its arguments (including the threading and tracing options and C++ flags), and the content of
+    all sources, so that an identical model is never verilated and compiled twice, in any run
+    directory. The content hashes of all files read by Verilator (from its dependency files, e.g.,
+    included headers) are also recorded and checked before the model is reused."""
+
+    model_dir = "obj_dir"
+    dependencies_file = "dependencies.json"
+
+    def __init__(self, key: Dict[str, Any], root: Optional[Path] = None) -> None:
+        super().__init__(key, cache_dir("verilator", "builds") if root is None else root)
+
+    @staticmethod
+    def dependencies(sim_dir: Path) -> List[Path]:
+        """Input files of Verilator, from the dependency files (*__ver.d) in `sim_dir`, excluding
+        the files that it generated"""
+        sim_dir = sim_dir.absolute()
+        deps: Set[Path] = set()
+        for dep_file in sim_dir.rglob("*__ver.d"):
+            try:
+                text = dep_file.read_text(errors="replace").replace("\\\n", " ")
+            except OSError:
+                continue
+            for line in text.splitlines():
+                _, sep, prerequisites = line.partition(": ")
+                if sep:
+                    deps.update(Path(p).absolute() for p in prerequisites.split())
+        return sorted(p for p in deps if sim_dir not in p.parents and p.is_file())
+
+    @staticmethod
+    def _fingerprint(files: Iterable[Path]) -> Dict[str, str]:
+        return {str(p): FileResource(p).content_hash for p in files}
+
+    def up_to_date(self) -> bool:
+        """whether none of the files read by Verilator have changed since the model was built"""
+        try:
+            with open(self.path / self.dependencies_file) as f:
+                dependencies: Dict[str, str] = json.load(f)
+            return self._fingerprint(map(Path, dependencies)) == dependencies
+        except (OSError, ValueError) as e:  # e.g., a removed dependency
+            log.debug("Invalid dependencies of %s: %s", self.path, e)
+            return False
+
+    def restore(self, sim_dir: Path, check_dependencies: bool = True) -> bool:
+        """Replace `sim_dir` with the cached model directory. Returns False on a cache miss.
+        Without `check_dependencies`, an out-of-date model is also restored (e.g., as the starting
+        point of an incremental build)."""
+        cached = self.path / self.model_dir
+        if not cached.is_dir():
+            return False
+        if check_dependencies and not self.up_to_date():
+            log.info("The Verilator model in %s is out of date", self.path)
+            return False
+        try:
+            if sim_dir.exists():
+                shutil.rmtree(sim_dir)
+            # keep the timestamps, so that running make on the restored model is a no-op
+            shutil.copytree(cached, sim_dir, symlinks=True)
+        except OSError as e:
+            log.warning("Failed to restore Verilator model from %s: %s", self.path, e)
+            shutil.rmtree(sim_dir, ignore_errors=True)
+            return False
+        self.touch()
+        log.info("Reusing the Verilator model built in %s", self.path)
+        return True
+
+    def save(self, sim_dir: Path, max_size: Optional[int] = None) -> None:
+        """Cache the model in `sim_dir`, then remove the least recently used models of the cache
+        until their total size is at most `max_size` bytes (if set)"""
+        try:
+            with self.replace() as tmp:
+                shutil.copytree(sim_dir, tmp / self.model_dir, symlinks=True)
+                with open(tmp / self.dependencies_file, "w") as f:
+                    json.dump(self._fingerprint(self.dependencies(sim_dir)), f)
+        except OSError as e:
+            log.warning("Failed to cache Verilator model in %s: %s", self.path, e)
+        if max_size is not None:
+            self.prune(self.path.parent, max_size)
@@ -0,0 +1,81 @@
+"""Hierarchical blocks of Verilator's hierarchical verilation"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "hier_blocks_config",
+    "select_hier_blocks",
+]
+
+
+def _module_name(name: str) -> str:
+    """module name of a Yosys module or cell type, e.g., `$paramod\\adder\\W=8` -> `adder`"""
+    if name.startswith("$paramod"):
+        parts = name.split("\\")
+        return parts[1] if len(parts) > 1 else name
+    return name.removeprefix("\\")
+
+
+def select_hier_blocks(
+    stat: Dict[str, Any],
+    top: Optional[str] = None,
+    min_cells: int = 5000,
+    max_blocks: int = 8,
+) -> List[str]:
+    """Select the hierarchical blocks from the (JSON) cell statistics of Yosys (`stat -json`):
+    modules (other than `top`) with at least `min_cells` cells, including the cells of their
+    submodules, ranked by their total number of cells in the design (size x instances), so that
+    large and repeated modules are preferred."""
+    modules: Dict[str, Dict[str, int]] = {}  # module -> {cell type -> count}
+    for name, mod_stat in stat.get("modules", {}).items():
+        cells = modules.setdefault(_module_name(name), {})
+        for cell_type, count in mod_stat.get("cells", {}).items():
+            cell_type = _module_name(cell_type)
+            cells[cell_type] = max(cells.get(cell_type, 0), count)
+
+    sizes: Dict[str, int] = {}
+
+    def size(module: str, visiting: Sequence[str] = ()) -> int:
+        if module not in sizes:
+            total = 0
+            for cell_type, count in modules[module].items():
+                if cell_type in modules and cell_type not in visiting:
+                    total += count * size(cell_type, (*visiting, module))
+                else:
+                    total += count
+            sizes[module] = total
+        return sizes[module]
+
+    instances: Dict[str, int] = {m: 0 for m in modules}
+
+    def count_instances(module: str, multiplier: int, visiting: Sequence[str] = ()) -> None:
+        for cell_type, count in modules[module].items():
+            if cell_type in modules and cell_type not in visiting:
+                instances[cell_type] += multiplier * count
+                count_instances(cell_type, multiplier * count, (*visiting, module))
+
+    roots = (
+        [top]
+        if top in modules
+        else [m for m in modules if not any(m in modules[p] for p in modules)]
+    )
+    for root in roots:
+        count_instances(root, 1)
+    candidates = [m for m in modules if m not in roots and instances[m] and size(m) >= min_cells]
+    candidates.sort(key=lambda m: (-size(m) * instances[m], m))
+    blocks = candidates[:max_blocks]
+    for m in blocks:
+        log.debug("Hierarchical block %s: %d cells, %d instances", m, size(m), instances[m])
+    return blocks
+
+
+def hier_blocks_config(blocks: Sequence[str]) -> str:
+    """Verilator configuration file marking `blocks` as hierarchical blocks"""
+    lines = ["`verilator_config"]
+    lines += [f'hier_block -module "{block}"' for block in blocks]
+    return "\n".join(lines) + "\n"
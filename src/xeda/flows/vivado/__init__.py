@@ -12,6 +12,7 @@ import colorama
 from ...dataclass import Field
 from ...flow import Flow, SynthFlow
 from ...tool import Docker, Tool
+from ...utils import iter_xml_table_rows
 
 log = logging.getLogger(__name__)
 
@@ -124,6 +125,8 @@ class VivadoTool(Tool):
 class Vivado(Flow, metaclass=ABCMeta):
     """Xilinx (AMD) Vivado FPGA synthesis and simulation flows"""
 
+    parallelism = "threads"
+
     class Settings(Flow.Settings):
         tcl_shell: bool = Field(
             False,
@@ -164,37 +167,30 @@ class Vivado(Flow, metaclass=ABCMeta):
 
     @staticmethod
     def parse_xml_report(report_xml) -> Optional[Dict[str, Any]]:
+        data: Dict[str, Any] = {}
+        table_key = None
+        header: List[str] = []
         try:
-            tree = ElementTree.parse(report_xml)
+            for row in iter_xml_table_rows(report_xml):
+                if (row.section, row.table) != table_key:
+                    table_key = (row.section, row.table)
+                    header = []
+                cells = [unescape(c).strip() for c in row.cells]
+                if row.header:
+                    header += cells
+                    continue
+                # choose 0th element as "index data" (distinct key)
+                cell_data = {h: c for h, c in zip(header[1:], cells[1:]) if c}
+                if cell_data:
+                    section_title = row.section or "<section>"
+                    title = section_title + ":" + row.table if row.table else section_title
+                    data.setdefault(title, {})[cells[0]] = cell_data
         except FileNotFoundError:
             log.critical("File %s not found.", report_xml)
             return None
         except ElementTree.ParseError as e:
             log.critical("Parsing %s failed: %s", report_xml, e.msg)
             return None
-        data = {}
-        for section in tree.findall("./section"):
-            section_title = section.get("title", "<section>")
-            for table in section.findall("./table"):
-                table_data = {}
-                header = [
-                    unescape(col.attrib["contents"]).strip()
-                    for col in table.findall("./tablerow/tableheader")
-                ]
-                for tablerow in table.findall("./tablerow"):
-                    cells = [
-                        unescape(cell.attrib["contents"]).strip()
-                        for cell in tablerow.findall("./tablecell")
-                    ]
-                    if cells:
-                        # choose 0th element as "index data" (distinct key)
-                        cell_data = {h: c for h, c in zip(header[1:], cells[1:]) if c}
-                        if cell_data:
-                            table_data[cells[0]] = cell_data
-                if table_data:
-                    table_title = table.get("title")
-                    title = section_title + ":" + table_title if table_title else section_title
-                    data[title] = table_data
         return data
 
     @staticmethod
@@ -15,6 +15,8 @@ if { ![info exists ACTIVE_STEP] } {
 set reports_dir [file join ${RUN_DIR} {{settings.reports_dir}} $ACTIVE_STEP]
 set outputs_dir [file join ${RUN_DIR} {{settings.outputs_dir}} $ACTIVE_STEP]
 
+recordStepMetrics $ACTIVE_STEP {{step_metrics_file}}
+
 puts "\n=======================( Writing reports after $ACTIVE_STEP )========================"
 puts "Writing reports to ${reports_dir}"
 file mkdir ${reports_dir}
@@ -0,0 +1,7 @@
+{% include 'util.tcl' %}
+
+{%- for file in user_hooks %}
+source {{file}}
+{%- endfor %}
+
+beginStepMetrics
@@ -43,3 +43,41 @@ proc showWarningsAndErrors {} {
   }
   puts "\n"
 }
+
+# Start measuring the elapsed time and peak memory of a step
+proc beginStepMetrics {} {
+  # reset the peak resident memory (VmHWM), so it's measured per step (only available on Linux)
+  catch {set fp [open /proc/[pid]/clear_refs w]; puts -nonewline $fp 5; close $fp}
+  set ::xeda_step_start [clock milliseconds]
+}
+
+# Append the elapsed time, peak memory, and WNS/TNS of a completed step as a JSON line to metricsFile
+# The start time of the step is taken from ::xeda_step_start, if set (see beginStepMetrics).
+proc recordStepMetrics {step metricsFile} {
+  set end [clock milliseconds]
+  set start null
+  set elapsed null
+  if {[info exists ::xeda_step_start]} {
+    set start $::xeda_step_start
+    set elapsed [expr {($end - $start) / 1000.0}]
+    unset ::xeda_step_start
+  }
+  # peak resident memory of this Vivado process since beginStepMetrics (only available on Linux)
+  set peak_memory null
+  if {![catch {set fp [open /proc/[pid]/status r]; set status [read $fp]; close $fp}]} {
+    if {[regexp {VmHWM:\s+(\d+)\s+kB} $status -> kb]} {
+      set peak_memory [expr {$kb / 1024.0}]
+    }
+  }
+  # WNS and TNS (setup) from the 'Design Timing Summary' table, instead of enumerating all failing paths
+  set wns null
+  set tns null
+  set summary [report_timing_summary -quiet -no_header -no_check_timing -no_detailed_paths -delay_type max -return_string]
+  if {[regexp {WNS\(ns\)\s+TNS\(ns\)[^\n]*\n[ \t-]*\n\s*(-?[0-9.]+)\s+(-?[0-9.]+)} $summary -> summary_wns summary_tns]} {
+    set wns $summary_wns
+    set tns $summary_tns
+  }
+  set fp [open $metricsFile a]
+  puts $fp "{\"step\": \"$step\", \"start\": $start, \"end\": $end, \"elapsed\": $elapsed, \"peak_memory\": $peak_memory, \"wns\": $wns, \"tns\": $tns}"
+  close $fp
+}
@@ -5,6 +5,7 @@ set reports_dir           {{settings.reports_dir}}
 set settings.outputs_dir  {{settings.outputs_dir}}
 set checkpoints_dir       {{settings.checkpoints_dir}}
 set fpga_part             {{settings.fpga.part}}
+set step_metrics_file     {{step_metrics_file}}
 
 {% include 'util.tcl' %}
 
@@ -64,7 +65,9 @@ read_xdc {{xdc_file}}
 {%- endfor %}
 
 puts "\n===========================( RTL Synthesize and Map )==========================="
+beginStepMetrics
 eval synth_design -part $fpga_part -top {{design.rtl.top}} {{settings.synth.steps.synth|flatten_options}} {{design.rtl.parameters|vivado_generics}} {{design.rtl.defines|vivado_defines}}
+recordStepMetrics synth_design $step_metrics_file
 
 {%- if settings.synth.strategy == "Debug" %}
 set_property KEEP_HIERARCHY true [get_cells -hier * ]
@@ -75,7 +78,9 @@ showWarningsAndErrors
 
 {% if settings.synth.steps.opt is not none %}
 puts "\n==============================( Optimize Design )================================"
+beginStepMetrics
 eval opt_design {{settings.synth.steps.opt|flatten_options}}
+recordStepMetrics opt_design $step_metrics_file
 {%- endif %}
 
 {% if settings.write_checkpoint %}
@@ -91,19 +96,25 @@ report_utilization -hierarchical -force -file ${reports_dir}/post_synth/hierarch
 {% if settings.synth.steps.power_opt and not settings.impl.steps.power_opt %}
 puts "\n===============================( Post-synth Power Optimization )================================"
 # this is more effective than Post-placement Power Optimization but can hurt timing
+beginStepMetrics
 eval power_opt_design
+recordStepMetrics power_opt_design $step_metrics_file
 report_power_opt -file ${reports_dir}/post_synth/power_optimization.rpt
 showWarningsAndErrors
 {%- endif %}
 
 puts "\n================================( Place Design )================================="
+beginStepMetrics
 eval place_design {{settings.impl.steps.place|flatten_options}}
+recordStepMetrics place_design $step_metrics_file
 showWarningsAndErrors
 
 
 {% if settings.impl.steps.power_opt %}
 puts "\n===============================( Post-placement Power Optimization )================================"
+beginStepMetrics
 eval power_opt_design
+recordStepMetrics post_place_power_opt_design $step_metrics_file
 report_power_opt -file ${reports_dir}/post_place/post_place_power_optimization.rpt
 showWarningsAndErrors
 {%- endif %}
@@ -111,11 +122,15 @@ showWarningsAndErrors
 {% if settings.impl.steps.place_opt is not none %}
 
 puts "\n==============================( Post-place optimization )================================"
+beginStepMetrics
 eval opt_design {{settings.impl.steps.place_opt|flatten_options}}
+recordStepMetrics post_place_opt_design $step_metrics_file
 
 {% if settings.impl.steps.place_opt2 is not none %}
 puts "\n==============================( Post-place optimization 2)================================"
+beginStepMetrics
 eval opt_design {{settings.impl.steps.place_opt2|flatten_options}}
+recordStepMetrics post_place_opt_design $step_metrics_file
 {%- endif %}
 
 {%- endif %}
@@ -123,11 +138,15 @@ eval opt_design {{settings.impl.steps.place_opt2|flatten_options}}
 
 {% if settings.impl.steps.phys_opt is not none %}
 puts "\n========================( Post-place Physical Optimization )=========================="
+beginStepMetrics
 eval phys_opt_design {{settings.impl.steps.phys_opt|flatten_options}}
+recordStepMetrics phys_opt_design $step_metrics_file
 
 {% if settings.impl.steps.phys_opt is not none %}
 puts "\n========================( Post-place Physical Optimization 2 )=========================="
+beginStepMetrics
 eval phys_opt_design {{settings.impl.steps.phys_opt|flatten_options}}
+recordStepMetrics phys_opt_design $step_metrics_file
 {%- endif %}
 {%- endif %}
 
@@ -138,12 +157,16 @@ report_utilization -hierarchical -force -file ${reports_dir}/post_place/hierarch
 {%- endif %}
 
 puts "\n================================( Route Design )================================="
+beginStepMetrics
 eval route_design {{settings.impl.steps.route|flatten_options}}
+recordStepMetrics route_design $step_metrics_file
 showWarningsAndErrors
 
 {% if settings.impl.steps.post_route_phys_opt is not none %}
 puts "\n=========================( Post-Route Physical Optimization )=========================="
+beginStepMetrics
 phys_opt_design {{settings.impl.steps.post_route_phys_opt|flatten_options}}
+recordStepMetrics post_route_phys_opt_design $step_metrics_file
 showWarningsAndErrors
 {%- endif %}
 
@@ -200,7 +223,9 @@ write_xdc -no_fixed_only -force ${settings.outputs_dir}/impl.xdc
 
 {% if settings.bitstream -%}
 puts "\n==============================( Writing Bitstream )==============================="
+beginStepMetrics
 write_bitstream -force {{{settings.bitstream}}}
+recordStepMetrics write_bitstream $step_metrics_file
 {% endif -%}
 
 showWarningsAndErrors
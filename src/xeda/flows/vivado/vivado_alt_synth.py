@@ -380,6 +380,7 @@ class VivadoAltSynth(VivadoSynth, FpgaSynthFlow):
     def run(self):
         ss = self.settings
         assert isinstance(ss, self.Settings)
+        (self.run_path / self.step_metrics_file).unlink(missing_ok=True)
 
         synth_steps: Optional[StepsValType] = ss.synth.steps.get("synth")
         if synth_steps is None:
@@ -416,5 +417,6 @@ class VivadoAltSynth(VivadoSynth, FpgaSynthFlow):
         script_path = self.copy_from_template(
             "vivado_alt_synth.tcl",
             xdc_files=[clock_xdc_path],
+            step_metrics_file=self.run_path / self.step_metrics_file,
         )
         self.vivado.run("-source", script_path)
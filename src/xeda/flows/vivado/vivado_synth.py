@@ -6,14 +6,16 @@ import re
 from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional, Union
+from xml.etree import ElementTree
 
 from ...dataclass import Field, XedaBaseModel, validator
 from ...design import SourceType
 from ...flow import FpgaSynthFlow
-from ...utils import HierDict, parse_xml, try_convert
+from ...timing_paths import parse_vivado_timing_paths
+from ...utils import HierDict, iter_xml_table_rows, parse_step_metrics, try_convert
 from ..vivado import Vivado
 
-__all__ = ["RunOptions", "StepsValType", "VivadoSynth"]
+__all__ = ["RunOptions", "StepsValType", "VivadoSynth", "parse_hier_util"]
 
 log = logging.getLogger(__name__)
 
@@ -40,6 +42,19 @@ class RunOptions(XedaBaseModel):
 class VivadoSynth(Vivado, FpgaSynthFlow):
     """Synthesize with Xilinx Vivado using a project-based flow"""
 
+    # steps (as in post_step_hook.tcl) are echoed as "Command: <step>" by the non-project flow, while
+    # the project flow only reports the start of the synthesis and implementation runs
+    stage_markers = {
+        "synth_design": r"^Command: synth_design\b|\( Running Synthesis \)",
+        "opt_design": r"^Command: opt_design\b|\( Running Implementation \)",
+        "place_design": r"^Command: place_design\b",
+        "phys_opt_design": r"^Command: phys_opt_design\b",
+        "route_design": r"^Command: route_design\b",
+        "write_bitstream": r"^Command: write_bitstream\b",
+    }
+    # runtime, peak memory, and WNS/TNS of each step, written by `recordStepMetrics` (util.tcl)
+    step_metrics_file = "step_metrics.jsonl"
+
     class Settings(Vivado.Settings, FpgaSynthFlow.Settings):
         """Vivado synthesis settings"""
 
@@ -130,6 +145,7 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
     def run(self):
         assert isinstance(self.settings, self.Settings)
         settings = self.settings
+        (self.run_path / self.step_metrics_file).unlink(missing_ok=True)
         if settings.write_netlist:
             for o in [
                 "timesim.min.sdf",
@@ -218,6 +234,13 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
                 assert isinstance(step_settings, dict)
                 tcl_settings = step_settings.get("TCL")
                 assert isinstance(tcl_settings, dict)
+                current_pre_hook = tcl_settings.get("PRE")
+                pre_step_hook = self.copy_from_template(
+                    "pre_step_hook.tcl",
+                    script_filename=f"pre_{step.lower()}_hook.tcl",
+                    user_hooks=[current_pre_hook] if current_pre_hook else [],
+                ).resolve()
+                tcl_settings["PRE"] = pre_step_hook
                 current_hook = tcl_settings.get("POST")
                 user_hooks = []  # TODO add alternative methods for adding multiple user hooks?
                 if current_hook:
@@ -227,9 +250,10 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
                     script_filename=f"post_{step.lower()}_hook.tcl",
                     run_dir=self.run_path,
                     user_hooks=user_hooks,
+                    step_metrics_file=self.run_path / self.step_metrics_file,
                 ).resolve()
                 tcl_settings["POST"] = post_step_hook
-                tcl_files += [post_step_hook]
+                tcl_files += [pre_step_hook, post_step_hook]
 
         xdc_files = [self.copy_from_template("clock.xdc")]
         xdc_files += (
@@ -343,9 +367,18 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
                         self.artifacts["bitstream"] = bitstream
                         break
 
+        steps = parse_step_metrics(self.run_path / self.step_metrics_file)
+        if steps:
+            self.results["steps"] = steps
+
         reports_dir = self.settings.reports_dir / "route_design"
         failed: bool = self.results.get("status", False)
         failed |= not self.parse_timing_report(reports_dir)
+        timing_rpt = reports_dir / "timing.rpt"
+        if timing_rpt.exists():
+            paths = parse_vivado_timing_paths(timing_rpt)
+            self.artifacts["timing_paths"] = paths.save(reports_dir / "timing_paths.npz")
+            self.results["_timing_paths"] = paths.summary()
         hier_util = parse_hier_util(reports_dir / "hierarchical_utilization.xml")
         if hier_util:
             with open(reports_dir / "hierarchical_utilization.json", "w") as f:
@@ -418,26 +451,9 @@ def parse_hier_util(
     skip_headers=None,
 ) -> Optional[HierDict]:
     """parse hierarchical utilization report"""
-    table = parse_xml(
-        report,
-        tags_blacklist=["class", "style", "halign", "width"],
-        skip_empty_children=True,
-    )
-    if table is None:
-        return None
-
-    tr = table["RptDoc"]["section"]["table"]["tablerow"]  # type: ignore
-    hdr = tr[0]["tableheader"]  # type: ignore
-    headers: List[str] = [h["@contents"] for h in hdr]  # type: ignore
-    rows: List[HierDict] = tr[1:]  # type: ignore
-
-    select_headers: Optional[List[str]] = None
     if skip_headers is None:
         skip_headers = ["Logic LUTs"]
     skip_headers.append("Instance")
-    if select_headers is None:
-        select_headers = [h for h in headers if h not in skip_headers]
-    assert select_headers is not None
 
     def leading_ws(s: str) -> int:
         return sum(1 for _ in itertools.takewhile(str.isspace, s))
@@ -450,28 +466,36 @@ def parse_hier_util(
                 continue
         return v
 
-    def add_hier(d, cur_ws=0, i: int = 0, parent=None) -> int:
-        cur_dict = d
-        cur_mod = parent
-        while i < len(rows):
-            row = rows[i]
-            cells = row["tablecell"]
-            assert cells
-            lcontents = [cell["@contents"] for cell in cells]  # type: ignore
+    util_dict: OrderedDict[str, Any] = OrderedDict()
+    headers: Optional[List[str]] = None
+    select_headers: List[str] = []
+    # [dict of this level, indentation of this level, dict of the last instance of this level]
+    stack: List[List[Any]] = [[util_dict, 0, util_dict]]
+    try:
+        # rows are consumed as they are parsed
+        for row in iter_xml_table_rows(report):
+            if row.header:
+                if headers is None:
+                    headers = row.cells
+                    select_headers = [h for h in headers if h not in skip_headers]
+                continue
+            if headers is None:
+                continue
+            lcontents = row.cells
             inst_name = lcontents[0]
             assert inst_name
             inst_ws = leading_ws(inst_name)
-
-            if inst_ws > cur_ws:
-                x = "@children"
-                if x not in cur_dict:
-                    cur_dict[x] = OrderedDict()
-                i = add_hier(cur_dict[x], inst_ws, i, cur_mod)
-                continue
-
-            if inst_ws < cur_ws:
-                return i  # pop
-
+            while True:
+                d, cur_ws, cur_dict = stack[-1]
+                if inst_ws > cur_ws:
+                    x = "@children"
+                    if x not in cur_dict:
+                        cur_dict[x] = OrderedDict()
+                    stack.append([cur_dict[x], inst_ws, cur_dict[x]])
+                elif inst_ws < cur_ws:
+                    stack.pop()  # pop
+                else:
+                    break
             key_name = inst_name.strip()
             if key_name not in d:
                 d[key_name] = OrderedDict()
@@ -483,13 +507,13 @@ def parse_hier_util(
                     if k in select_headers and ((vv := conv_val(v)) or not skip_zero_or_empty)
                 )
             )
-            # if parent:
-            #     cur_dict["@parent"] = parent
-            cur_mod = key_name
-            i += 1
-        return i
-
-    util_dict: OrderedDict[str, Any] = OrderedDict()
-    add_hier(util_dict)
-
+            stack[-1][2] = cur_dict
+    except FileNotFoundError:
+        log.critical("File %s not found.", report)
+        return None
+    except ElementTree.ParseError as e:
+        log.critical("Parsing %s failed: %s", report, e.msg)
+        return None
+    if headers is None:
+        return None
     return util_dict
@@ -31,6 +31,11 @@ class YosysSim(YosysBase, SimFlow):
         cxxrtl: CxxRtl = CxxRtl()
 
     def run(self) -> None:
+        self.run_sim(self.build())
+
+    def build(self) -> Tool:
+        """Generate and compile the CXXRTL model, which can then be run any number of times.
+        Returns the model executable."""
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
         yosys = Tool(
@@ -77,8 +82,7 @@ class YosysSim(YosysBase, SimFlow):
             cxx_args += [f"-I{cxxrtl_cpp.parent}"]
         cxx_args += ss.cxxrtl.ccflags
         cxx.run(*cxx_args)
-        sim_bin = yosys.derive(executable=Path.cwd() / sim_bin_file)
-        sim_bin.run()
+        return yosys.derive(executable=Path.cwd() / sim_bin_file)
 
     def parse_reports(self) -> bool:
         return True
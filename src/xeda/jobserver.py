@@ -0,0 +1,173 @@
+"""GNU make compatible jobserver for sharing a budget of CPU tokens among concurrent flows"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import select
+import shutil
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "Jobserver",
+    "JobTokens",
+    "current_tokens",
+]
+
+_TOKEN = b"+"
+
+_thread_state = threading.local()
+
+
+def current_tokens() -> Optional[JobTokens]:
+    """Job tokens held by the flow running in the current thread, if any"""
+    return getattr(_thread_state, "tokens", None)
+
+
+class JobTokens:
+    """Job tokens acquired from a Jobserver"""
+
+    def __init__(self, jobserver: Jobserver, count: int) -> None:
+        self.jobserver = jobserver
+        self.count = count
+
+    def release(self) -> None:
+        if self.count > 0:
+            self.jobserver.release(self.count)
+            self.count = 0
+
+    @contextlib.contextmanager
+    def activate(self):
+        """make these tokens visible to the tools that are run from the current thread"""
+        prev = current_tokens()
+        _thread_state.tokens = self
+        try:
+            yield self
+        finally:
+            _thread_state.tokens = prev
+
+    def make_env(self) -> Tuple[Dict[str, str], Tuple[int, ...]]:
+        """MAKEFLAGS environment and file descriptors to pass to a GNU make jobserver client.
+        One token held by the flow acts as the implicit job slot of the make client.
+        """
+        r, w = self.jobserver.fds()
+        makeflags = f"-j{self.jobserver.jobs} --jobserver-auth={r},{w}"
+        return {"MAKEFLAGS": makeflags}, (r, w)
+
+    def __enter__(self) -> JobTokens:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class Jobserver:
+    """A make-style jobserver: a named pipe pre-filled with `jobs` tokens.
+
+    Every flow takes at least one token before running. Multithreaded tools are sized by the number
+    of tokens their flow holds, while GNU make based tools (jobserver clients) receive the
+    jobserver through `MAKEFLAGS` and take additional tokens for each parallel job.
+    The pipe is opened by path, so the jobserver can be shared with worker processes.
+    """
+
+    def __init__(self, jobs: int) -> None:
+        assert jobs > 0, "number of jobs should be positive"
+        self.jobs = jobs
+        self._dir = Path(tempfile.mkdtemp(prefix="xeda_jobserver_"))
+        self.path = self._dir / "fifo"
+        os.mkfifo(self.path, 0o600)
+        self._fds: Optional[Tuple[int, int, int]] = None
+        self._pid: Optional[int] = None
+        # only the creating process removes the pipe
+        self._finalizer: Optional[weakref.finalize] = weakref.finalize(
+            self, shutil.rmtree, self._dir, True
+        )
+        os.write(self.fds()[1], _TOKEN * jobs)
+        log.debug("Jobserver with %d tokens at %s", jobs, self.path)
+
+    def __getstate__(self):
+        return {"jobs": self.jobs, "path": self.path, "_dir": self._dir}
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        self._fds = None
+        self._pid = None
+        self._finalizer = None
+
+    def _open(self) -> Tuple[int, int, int]:
+        # O_NONBLOCK avoids blocking until a writer opens the pipe
+        r = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        w = os.open(self.path, os.O_WRONLY)
+        os.set_blocking(r, True)
+        r_nb = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        for fd in (r, w):
+            os.set_inheritable(fd, True)
+        return r, w, r_nb
+
+    def fds(self) -> Tuple[int, int]:
+        """(read, write) file descriptors of the jobserver pipe in the current process"""
+        if self._fds is None or self._pid != os.getpid():
+            self._fds = self._open()
+            self._pid = os.getpid()
+        return self._fds[0], self._fds[1]
+
+    def _try_read(self, n: int) -> int:
+        self.fds()
+        assert self._fds
+        try:
+            return len(os.read(self._fds[2], n))
+        except BlockingIOError:
+            return 0
+
+    def acquire(self, max_tokens: int = 1, timeout: Optional[float] = None) -> JobTokens:
+        """Block until at least one token is available, then take up to `max_tokens` tokens"""
+        max_tokens = max(1, min(max_tokens, self.jobs))
+        r, _ = self.fds()
+        if timeout is not None:
+            ready, _, _ = select.select([r], [], [], timeout)
+            if not ready:
+                raise TimeoutError(f"No job token became available in {timeout} seconds")
+        count = 0
+        while count == 0:
+            count = len(os.read(r, 1))
+        if max_tokens > 1:
+            count += self._try_read(max_tokens - 1)
+        log.debug("Acquired %d job token(s)", count)
+        return JobTokens(self, count)
+
+    def release(self, count: int) -> None:
+        os.write(self.fds()[1], _TOKEN * count)
+        log.debug("Released %d job token(s)", count)
+
+    def available(self) -> int:
+        """Number of tokens currently in the pipe. The tokens are counted by draining and refilling
+        the pipe, which is not atomic: only call when no clients (flows, tools, or worker processes)
+        are running, as a concurrent acquire would make the count wrong."""
+        count = self._try_read(self.jobs)
+        if count:
+            self.release(count)
+        return count
+
+    def replenish(self) -> None:
+        """Restore the full budget, e.g., to recover tokens of killed processes. Only call when no
+        clients are running and no tokens are held: tokens acquired while the pipe is counted (see
+        `available`) would be counted as lost and added again, over-filling the pool."""
+        lost = self.jobs - self.available()
+        if lost > 0:
+            log.warning("Recovering %d lost job token(s)", lost)
+            self.release(lost)
+
+    def close(self) -> None:
+        if self._fds is not None and self._pid == os.getpid():
+            for fd in self._fds:
+                os.close(fd)
+        self._fds = None
+        if self._finalizer is not None:
+            self._finalizer()
@@ -0,0 +1,273 @@
+"""Resource limits (memory, CPU, open files) of tool processes, using cgroup v2 or rlimits"""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import itertools
+import logging
+import os
+import re
+import resource
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .dataclass import Field, XedaBaseModel, validator
+from .utils import ResourceLimitExceeded
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "ResourceLimits",
+    "ProcessLimiter",
+    "parse_size",
+    "process_limiter",
+    "active_limits",
+]
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# a (delegated) cgroup v2 directory under which the cgroups of tool processes are created.
+# Default: the cgroup of the xeda process
+CGROUP_ENV_VAR = "XEDA_CGROUP"
+
+# on Linux, RLIMIT_DATA also covers private anonymous mappings, and unlike RLIMIT_AS, does not
+# count address space that is reserved but never used
+_MEMORY_RLIMIT = resource.RLIMIT_DATA if sys.platform.startswith("linux") else resource.RLIMIT_AS
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d*)?)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE)
+
+_thread_state = threading.local()
+_cgroup_counter = itertools.count()
+
+
+def parse_size(value: Any) -> Optional[int]:
+    """Convert a memory size to bytes. Strings can have a K, M, G, or T suffix, which (as in Docker
+    and systemd) are powers of 1024, e.g., '16G' or '512MiB'."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    match = _SIZE_RE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid memory size: {value}")
+    exp = "_kmgt".index(match.group(2).lower() or "_")
+    return int(float(match.group(1)) * 1024**exp)
+
+
+class ResourceLimits(XedaBaseModel):
+    """Limits applied to each process of a tool"""
+
+    memory: Optional[int] = Field(None, description="Maximum memory in bytes")
+    cpu_quota: Optional[float] = Field(
+        None, description="Maximum CPU bandwidth in number of CPUs (requires cgroup v2)"
+    )
+    cpu_time: Optional[int] = Field(None, description="Maximum CPU time in seconds")
+    open_files: Optional[int] = Field(None, description="Maximum number of open files")
+    cgroup: bool = Field(True, description="Use a cgroup v2 subtree, when available")
+
+    @validator("memory", pre=True)
+    def _validate_memory(cls, value):
+        return parse_size(value)
+
+    @property
+    def is_set(self) -> bool:
+        return any(
+            v is not None for v in (self.memory, self.cpu_quota, self.cpu_time, self.open_files)
+        )
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Apply the limits to all processes launched from the current thread.
+        Yields the list of detected violations."""
+        violations: List[Dict[str, Any]] = []
+        prev = getattr(_thread_state, "active", None)
+        _thread_state.active = (self, violations)
+        try:
+            yield violations
+        finally:
+            _thread_state.active = prev
+
+    def docker_args(self) -> List[str]:
+        """equivalent `docker run` arguments"""
+        args = []
+        if self.memory:
+            args.append(f"--memory={self.memory}")
+        if self.cpu_quota:
+            args.append(f"--cpus={self.cpu_quota}")
+        if self.cpu_time:
+            args.append(f"--ulimit=cpu={self.cpu_time}:{self.cpu_time}")
+        if self.open_files:
+            args.append(f"--ulimit=nofile={self.open_files}:{self.open_files}")
+        return args
+
+
+def active_limits() -> Optional[ResourceLimits]:
+    """resource limits of the current thread, if any"""
+    active = getattr(_thread_state, "active", None)
+    return active[0] if active else None
+
+
+def process_limiter() -> Optional[ProcessLimiter]:
+    """ProcessLimiter for a process launched from the current thread, if limits are active"""
+    active = getattr(_thread_state, "active", None)
+    if active is None:
+        return None
+    return ProcessLimiter(*active)
+
+
+def _cgroup_parent() -> Optional[Path]:
+    parent = os.environ.get(CGROUP_ENV_VAR)
+    if parent:
+        return CGROUP_ROOT / parent if not os.path.isabs(parent) else Path(parent)
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return CGROUP_ROOT / line[3:].strip().lstrip("/")
+    except OSError:
+        pass
+    return None
+
+
+def _create_cgroup(limits: ResourceLimits) -> Optional[Path]:
+    parent = _cgroup_parent()
+    if parent is None or not (parent / "cgroup.subtree_control").exists():
+        return None
+    controllers = set()
+    if limits.memory:
+        controllers.add("memory")
+    if limits.cpu_quota:
+        controllers.add("cpu")
+    cgroup = parent / f"xeda-{os.getpid()}-{next(_cgroup_counter)}"
+    try:
+        subtree_control = parent / "cgroup.subtree_control"
+        missing = controllers - set(subtree_control.read_text().split())
+        if missing:
+            subtree_control.write_text(" ".join(f"+{c}" for c in sorted(missing)))
+        cgroup.mkdir()
+        if limits.memory:
+            (cgroup / "memory.max").write_text(str(limits.memory))
+            with contextlib.suppress(OSError):
+                (cgroup / "memory.swap.max").write_text("0")
+        if limits.cpu_quota:
+            period = 100000
+            (cgroup / "cpu.max").write_text(f"{int(limits.cpu_quota * period)} {period}")
+    except OSError as e:
+        log.debug("Could not set up cgroup under %s: %s", parent, e)
+        _remove_cgroup(cgroup)
+        return None
+    log.debug("Created cgroup %s", cgroup)
+    return cgroup
+
+
+def _remove_cgroup(cgroup: Path) -> None:
+    for _ in range(50):
+        try:
+            cgroup.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            if e.errno != errno.EBUSY:
+                break
+            # processes (e.g., orphaned children) are still running in the cgroup
+            with contextlib.suppress(OSError):
+                (cgroup / "cgroup.kill").write_text("1")
+            time.sleep(0.1)
+    log.warning("Failed to remove cgroup %s", cgroup)
+
+
+def _cgroup_events(cgroup: Path) -> Dict[str, int]:
+    try:
+        lines = (cgroup / "memory.events").read_text().splitlines()
+    except OSError:
+        return {}
+    return {k: int(v) for k, v in (line.split() for line in lines if line)}
+
+
+class ProcessLimiter:
+    """Apply ResourceLimits to a single child process and detect violations of the limits"""
+
+    def __init__(self, limits: ResourceLimits, violations: List[Dict[str, Any]]) -> None:
+        self.limits = limits
+        self.violations = violations
+        self.cgroup: Optional[Path] = None
+        self._procs_fd: Optional[int] = None
+        self._rlimits: List[Tuple[int, Tuple[int, int]]] = []
+
+    def __enter__(self) -> ProcessLimiter:
+        limits = self.limits
+        if limits.cgroup and (limits.memory or limits.cpu_quota):
+            self.cgroup = _create_cgroup(limits)
+            if self.cgroup:
+                self._procs_fd = os.open(self.cgroup / "cgroup.procs", os.O_WRONLY)
+        if limits.cpu_quota and not self.cgroup:
+            log.warning("cpu_quota requires cgroup v2 (see %s). Ignored.", CGROUP_ENV_VAR)
+        rlimits = []
+        if limits.memory and not self.cgroup:
+            rlimits.append((_MEMORY_RLIMIT, limits.memory, limits.memory))
+        if limits.cpu_time:
+            # SIGXCPU at the soft limit, SIGKILL at the hard limit
+            rlimits.append((resource.RLIMIT_CPU, limits.cpu_time, limits.cpu_time + 5))
+        if limits.open_files:
+            rlimits.append((resource.RLIMIT_NOFILE, limits.open_files, limits.open_files))
+        for res, soft, hard in rlimits:
+            _, cur_hard = resource.getrlimit(res)
+            if cur_hard != resource.RLIM_INFINITY:
+                hard = min(hard, cur_hard)
+                soft = min(soft, hard)
+            self._rlimits.append((res, (soft, hard)))
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._procs_fd is not None:
+            os.close(self._procs_fd)
+            self._procs_fd = None
+        if self.cgroup:
+            _remove_cgroup(self.cgroup)
+
+    def preexec_fn(self) -> None:
+        """runs in the child process, between fork and exec"""
+        if self._procs_fd is not None:
+            os.write(self._procs_fd, b"0")  # move this process into the cgroup
+        for res, limits in self._rlimits:
+            resource.setrlimit(res, limits)
+
+    def check(self, command: Sequence[Any], returncode: int) -> Optional[ResourceLimitExceeded]:
+        """Detect (and record) a violation of the limits by the finished process"""
+        if returncode == 0:
+            return None
+        limits = self.limits
+        resource_name: Optional[str] = None
+        confirmed = False
+        if self.cgroup and _cgroup_events(self.cgroup).get("oom_kill", 0) > 0:
+            resource_name, confirmed = "memory", True
+        elif limits.cpu_time and returncode == -signal.SIGXCPU:
+            resource_name, confirmed = "cpu_time", True
+        elif limits.memory and returncode in (-signal.SIGKILL, -signal.SIGSEGV, -signal.SIGABRT):
+            # allocation failures under an rlimit are not reported as such
+            resource_name = "memory"
+        elif limits.cpu_time and returncode == -signal.SIGKILL:
+            resource_name = "cpu_time"
+        if resource_name is None:
+            return None
+        limit = getattr(limits, resource_name)
+        violation = dict(
+            resource=resource_name,
+            limit=limit,
+            confirmed=confirmed,
+            command=" ".join(map(str, command)),
+            exit_code=returncode,
+        )
+        log.error(
+            "Process exceeded its %s limit (%s)%s",
+            resource_name,
+            limit,
+            "" if confirmed else " [suspected]",
+        )
+        self.violations.append(violation)
+        return ResourceLimitExceeded(command, returncode, resource_name, limit)
@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 import errno
 import logging
@@ -8,15 +9,25 @@ import select
 import signal
 import subprocess
 import sys
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Set, Union
 
 import colorama
 
+from .limits import ProcessLimiter, process_limiter
+from .progress import ProgressMonitor, active_monitor
 from .utils import ExecutableNotFound, NonZeroExitCode
 
 log = logging.getLogger(__name__)
 
+# per-thread state: the EventLoopBridge (if any) that child processes of this thread are routed to
+_thread_state = threading.local()
+# the current working directory is process-wide. Bridged threads only run Python code while
+# holding this lock and release it while waiting for their child processes to complete.
+_cwd_lock = threading.Lock()
+
 
 def proc_output(is_stderr: bool, line):
     print(
@@ -33,7 +44,84 @@ def run_process(
     cwd: Union[None, str, os.PathLike] = None,
     print_command: bool = False,
     highlight_rules: Optional[Dict[str, str]] = None,
+    pass_fds: Sequence[int] = (),
+    resource_limits: bool = True,
+) -> Union[None, str]:
+    """Run a child process.
+    If `resource_limits` is True, the resource limits of the current thread (if any) are applied.
+    If a ProgressMonitor is active in the current thread, it is fed the lines of standard output,
+    unless the output is captured.
+    """
+    limiter = process_limiter() if resource_limits else None
+    monitor = active_monitor()
+    bridge: Optional[EventLoopBridge] = getattr(_thread_state, "bridge", None)
+    if bridge is not None:
+        return bridge.run_process(
+            executable,
+            args,
+            env=env,
+            stdout=stdout,
+            check=check,
+            cwd=cwd,
+            print_command=print_command,
+            highlight_rules=highlight_rules,
+            pass_fds=pass_fds,
+            limiter=limiter,
+            monitor=monitor,
+        )
+    if limiter is None:
+        return _run_process(
+            executable,
+            args,
+            env,
+            stdout,
+            check,
+            cwd,
+            print_command,
+            highlight_rules,
+            pass_fds,
+            monitor=monitor,
+        )
+    with limiter:
+        return _run_process(
+            executable,
+            args,
+            env,
+            stdout,
+            check,
+            cwd,
+            print_command,
+            highlight_rules,
+            pass_fds,
+            limiter,
+            monitor,
+        )
+
+
+def _check_returncode(
+    command: Sequence[Any], returncode: int, check: bool, limiter: Optional[ProcessLimiter]
+) -> None:
+    exceeded = limiter.check(command, returncode) if limiter else None
+    if check and exceeded:
+        raise exceeded
+    if check and returncode != 0:
+        raise NonZeroExitCode(command, returncode)
+
+
+def _run_process(
+    executable: str,
+    args: Optional[Sequence[Any]],
+    env: Optional[Dict[str, Any]],
+    stdout: Union[None, bool, str, os.PathLike],
+    check: bool,
+    cwd: Union[None, str, os.PathLike],
+    print_command: bool,
+    highlight_rules: Optional[Dict[str, str]],
+    pass_fds: Sequence[int],
+    limiter: Optional[ProcessLimiter] = None,
+    monitor: Optional[ProgressMonitor] = None,
 ) -> Union[None, str]:
+    preexec_fn = limiter.preexec_fn if limiter else None
     if args is None:
         args = []
     args = [str(a) for a in args]
@@ -47,34 +135,41 @@ def run_process(
         log.debug("Running `%s`", cmd_str)
     if cwd:
         log.debug("cwd=%s", cwd)
-    if highlight_rules and stdout is None:
+    if (highlight_rules and stdout is None) or (monitor is not None and stdout is not True):
+        highlight_rules_re = _compile_highlight_rules(highlight_rules) if highlight_rules else {}
 
-        # compile regex str keys to improve performance
-        highlight_rules_re: Dict[re.Pattern, str] = {}
-        for pattern, subs in highlight_rules.items():
-            highlight_rules_re[re.compile(pattern)] = subs
-
-        with subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            env=env,
-            cwd=cwd,
-            universal_newlines=True,
-            bufsize=1,
-        ) as proc:
+        with contextlib.ExitStack() as stack:
+            out_file = None
+            if stdout and isinstance(stdout, (str, os.PathLike)):
+                log.info("Standard output is redirected to: %s", os.path.abspath(stdout))
+                out_file = stack.enter_context(open(stdout, "w"))
+            proc = stack.enter_context(
+                subprocess.Popen(
+                    command,
+                    stdout=subprocess.PIPE,
+                    env=env,
+                    cwd=cwd,
+                    universal_newlines=True,
+                    bufsize=1,
+                    pass_fds=pass_fds,
+                    preexec_fn=preexec_fn,
+                )
+            )
             assert proc.stdout is not None, f"Popen for '{cmd_str}' failed: stdout is None!"
 
             with open(proc.stdout.fileno(), errors="ignore", closefd=False) as proc_stdout:
                 for line in proc_stdout:
-                    for re_pat, subs in highlight_rules_re.items():
-                        line, matches = re_pat.subn(subs + colorama.Style.RESET_ALL, line, count=1)
-                        if matches > 0:
-                            break
-                    print(line, end="\r")
+                    if monitor is not None:
+                        monitor.feed(line)
+                    if out_file is not None:
+                        out_file.write(line)
+                    elif highlight_rules_re:
+                        print(_highlight(line, highlight_rules_re), end="\r")
+                    else:
+                        print(line, end="")
             ret = proc.wait()
-            if check and ret != 0:
-                raise NonZeroExitCode(command, ret)
-            return None
+        _check_returncode(command, ret, check, limiter)
+        return None
     elif stdout and isinstance(stdout, (str, os.PathLike)):
         stdout = Path(stdout)
 
@@ -97,14 +192,15 @@ def run_process(
             encoding="utf-8",
             errors="replace",
             env=env,
+            pass_fds=pass_fds,
+            preexec_fn=preexec_fn,
         ) as proc:
             log.debug("Started %s[%d]", executable, proc.pid)
             try:
                 if stdout:
                     if isinstance(stdout, bool):
                         out, err = proc.communicate(timeout=None)
-                        if check and proc.returncode != 0:
-                            raise NonZeroExitCode(proc.args, proc.returncode)
+                        _check_returncode(command, proc.returncode, check, limiter)
                         if err:
                             print(err, file=sys.stderr)
                         return out.strip()
@@ -127,12 +223,244 @@ def run_process(
                 finally:
                     proc.wait()
                     raise e from None
-        if check and proc.returncode != 0:
-            raise NonZeroExitCode(proc.args, proc.returncode)
+        _check_returncode(command, proc.returncode, check, limiter)
 
     return None
 
 
+def _compile_highlight_rules(highlight_rules: Dict[str, str]) -> Dict[re.Pattern, str]:
+    # compile regex str keys to improve performance
+    return {re.compile(pattern): subs for pattern, subs in highlight_rules.items()}
+
+
+def _highlight(line: str, highlight_rules_re: Dict[re.Pattern, str]) -> str:
+    for re_pat, subs in highlight_rules_re.items():
+        line, matches = re_pat.subn(subs + colorama.Style.RESET_ALL, line, count=1)
+        if matches > 0:
+            break
+    return line
+
+
+async def run_process_async(
+    executable: str,
+    args: Optional[Sequence[Any]] = None,
+    env: Optional[Dict[str, Any]] = None,
+    stdout: Union[None, bool, str, os.PathLike] = None,
+    check: bool = True,
+    cwd: Union[None, str, os.PathLike] = None,
+    print_command: bool = False,
+    highlight_rules: Optional[Dict[str, str]] = None,
+    tag: Optional[str] = None,
+    pass_fds: Sequence[int] = (),
+    limiter: Optional[ProcessLimiter] = None,
+    monitor: Optional[ProgressMonitor] = None,
+) -> Union[None, str]:
+    """asyncio counterpart of `run_process`.
+    Standard output and error of the child process are consumed line by line, so that many
+    concurrent processes can share the console. If `tag` is set, each line of console output is
+    prefixed with `[tag] `.
+    If `stdout` is True, the standard output is captured and returned.
+    If `stdout` is a path, the standard output is written to that file.
+    Cancelling the coroutine terminates the child process.
+    If `limiter` is set, the resource limits are applied to the child process.
+    If `monitor` is set, it is fed the lines of standard output, unless the output is captured.
+    """
+    if limiter is None:
+        return await _run_process_async(
+            executable,
+            args,
+            env,
+            stdout,
+            check,
+            cwd,
+            print_command,
+            highlight_rules,
+            tag,
+            pass_fds,
+            monitor=monitor,
+        )
+    with limiter:
+        return await _run_process_async(
+            executable,
+            args,
+            env,
+            stdout,
+            check,
+            cwd,
+            print_command,
+            highlight_rules,
+            tag,
+            pass_fds,
+            limiter,
+            monitor,
+        )
+
+
+async def _run_process_async(
+    executable: str,
+    args: Optional[Sequence[Any]],
+    env: Optional[Dict[str, Any]],
+    stdout: Union[None, bool, str, os.PathLike],
+    check: bool,
+    cwd: Union[None, str, os.PathLike],
+    print_command: bool,
+    highlight_rules: Optional[Dict[str, str]],
+    tag: Optional[str],
+    pass_fds: Sequence[int],
+    limiter: Optional[ProcessLimiter] = None,
+    monitor: Optional[ProgressMonitor] = None,
+) -> Union[None, str]:
+    if args is None:
+        args = []
+    args = [str(a) for a in args]
+    if env is not None:
+        env = {k: str(v) for k, v in env.items() if v is not None}
+    command: List[str] = [str(c) for c in (executable, *args)]
+    cmd_str = " ".join(command)
+    prefix = f"[{tag}] " if tag else ""
+    if print_command:
+        print(f"{prefix}Running `{cmd_str}`")
+    else:
+        log.debug("Running `%s`", cmd_str)
+    if cwd:
+        log.debug("cwd=%s", cwd)
+    highlight_rules_re = _compile_highlight_rules(highlight_rules) if highlight_rules else {}
+
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env,
+        cwd=cwd,
+        pass_fds=pass_fds,
+        preexec_fn=limiter.preexec_fn if limiter else None,
+        limit=1 << 20,  # maximum line length
+    )
+    log.debug("Started %s[%d]", executable, proc.pid)
+    captured: List[str] = []
+
+    async def consume(stream: asyncio.StreamReader, is_stderr: bool, out_file=None):
+        while True:
+            data = await stream.readline()
+            if not data:
+                break
+            line = data.decode("utf-8", errors="replace")
+            if not is_stderr and monitor is not None and stdout is not True:
+                monitor.feed(line)
+            if not is_stderr and out_file is not None:
+                out_file.write(line)
+            elif not is_stderr and stdout is True:
+                captured.append(line)
+            else:
+                if highlight_rules_re and not is_stderr:
+                    line = _highlight(line, highlight_rules_re)
+                if not line.endswith("\n"):
+                    line += "\n"
+                proc_output(is_stderr, prefix + line)
+
+    with contextlib.ExitStack() as stack:
+        out_file = None
+        if stdout and isinstance(stdout, (str, os.PathLike)):
+            log.info("Standard output is redirected to: %s", os.path.abspath(stdout))
+            out_file = stack.enter_context(open(stdout, "w"))
+        assert proc.stdout is not None and proc.stderr is not None
+        try:
+            await asyncio.gather(
+                consume(proc.stdout, False, out_file),
+                consume(proc.stderr, True),
+            )
+            ret = await proc.wait()
+        except asyncio.CancelledError:
+            log.debug("Cancelled! Terminating %s(pid=%s)", executable, proc.pid)
+            with contextlib.suppress(ProcessLookupError):
+                proc.terminate()
+            await proc.wait()
+            raise
+    _check_returncode(command, ret, check, limiter)
+    if stdout is True:
+        return "".join(captured).strip()
+    return None
+
+
+class EventLoopBridge:
+    """Route the child processes of (blocking) worker threads to an asyncio event loop.
+
+    While a thread is attached, `run_process` calls made from that thread are executed using
+    `run_process_async` on `loop`. As the working directory is shared by all threads, attached
+    threads run their Python code one at a time and only overlap while they wait for their
+    child processes (or inside `released()`).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, tag: Optional[str] = None) -> None:
+        self.loop = loop
+        self.tag = tag
+        self._pending: Set[Future] = set()
+
+    @contextlib.contextmanager
+    def attached(self):
+        """attach the current thread to this bridge"""
+        _cwd_lock.acquire()
+        # the working directory of the process whenever no attached thread holds the lock
+        base_cwd = os.getcwd()
+        _thread_state.bridge = self
+        _thread_state.base_cwd = base_cwd
+        try:
+            yield self
+        finally:
+            _thread_state.bridge = None
+            os.chdir(base_cwd)
+            _cwd_lock.release()
+
+    @contextlib.contextmanager
+    def released(self):
+        """let other attached threads run while the current thread is blocked"""
+        cwd = os.getcwd()
+        os.chdir(_thread_state.base_cwd)
+        _cwd_lock.release()
+        try:
+            yield
+        finally:
+            _cwd_lock.acquire()
+            os.chdir(cwd)
+
+    def run_process(
+        self,
+        executable: str,
+        args: Optional[Sequence[Any]] = None,
+        cwd: Union[None, str, os.PathLike] = None,
+        **kwargs,
+    ) -> Union[None, str]:
+        if cwd is None:
+            cwd = os.getcwd()
+        future = asyncio.run_coroutine_threadsafe(
+            run_process_async(executable, args, cwd=cwd, tag=self.tag, **kwargs), self.loop
+        )
+        self._pending.add(future)
+        try:
+            with self.released():
+                return future.result()
+        finally:
+            self._pending.discard(future)
+
+    def cancel(self) -> None:
+        """cancel (and terminate) all running child processes"""
+        for future in list(self._pending):
+            future.cancel()
+
+
+@contextlib.contextmanager
+def unlocked():
+    """Context manager for blocking operations (other than child processes) of the current thread.
+    If the thread is attached to an EventLoopBridge, other attached threads can run meanwhile.
+    """
+    bridge: Optional[EventLoopBridge] = getattr(_thread_state, "bridge", None)
+    if bridge is None:
+        yield
+    else:
+        with bridge.released():
+            yield
+
+
 def _terminate_process(process):
     if process.poll() is None:
         process.send_signal(signal.SIGINT)
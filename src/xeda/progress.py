@@ -0,0 +1,180 @@
+"""Live progress of flows: detection of stages in the output of tools, and ETA from past runtimes"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .utils import cache_dir, load_cache_file, save_cache_file
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "ProgressMonitor",
+    "ProgressCallback",
+    "RuntimeHistory",
+    "active_monitor",
+]
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+_thread_state = threading.local()
+
+
+def active_monitor() -> Optional[ProgressMonitor]:
+    """ProgressMonitor of the flow running in the current thread, if it has any stage markers"""
+    monitor = getattr(_thread_state, "monitor", None)
+    return monitor if monitor is not None and monitor.stages else None
+
+
+class RuntimeHistory:
+    """Runtimes (total and start time of each stage) of past successful runs of a flow on a design"""
+
+    max_runs = 5
+
+    def __init__(self, flow: str, design: str, root: Optional[Path] = None) -> None:
+        if root is None:
+            root = cache_dir("progress")
+        self.path = root / re.sub(r"[^\w.-]+", "_", f"{flow}__{design}.json")
+        data = load_cache_file(self.path, "runtime history")
+        self.runs: List[Dict[str, Any]] = data.get("runs", []) if isinstance(data, dict) else []
+
+    @property
+    def total(self) -> Optional[float]:
+        """average total runtime"""
+        totals = [r["total"] for r in self.runs if r.get("total")]
+        return sum(totals) / len(totals) if totals else None
+
+    def stage_start(self, stage: str) -> Optional[float]:
+        """average elapsed time at the start of `stage`"""
+        starts = [r["stages"][stage] for r in self.runs if stage in r.get("stages", {})]
+        return sum(starts) / len(starts) if starts else None
+
+    def remaining(self, stage: Optional[str], elapsed: float) -> Optional[float]:
+        """Estimated remaining time, scaled by how fast this run has been so far"""
+        total = self.total
+        if total is None:
+            return None
+        start = self.stage_start(stage) if stage else None
+        if not start:
+            return max(total - elapsed, 0.0)
+        speed = min(max(elapsed / start, 0.25), 4.0)
+        return max(total - start, 0.0) * speed
+
+    def record(self, total: float, stages: Dict[str, float]) -> None:
+        self.runs = (self.runs + [dict(total=total, stages=stages)])[-self.max_runs :]
+        save_cache_file(self.path, dict(runs=self.runs), "runtime history")
+
+
+class ProgressMonitor:
+    """Detects the stages of a flow by matching `stages` markers ((stage_name, regex) pairs, in order)
+    against lines of tool output and emits progress events (dicts) to callbacks and a JSONL file.
+    Markers of a stage which precedes the current one are ignored.
+
+    Events have the keys: event ("start", "stage", or "end"), flow, design, timestamp, elapsed
+    (seconds), eta (estimated remaining seconds or None), and for "stage" events, stage,
+    stage_index, and num_stages. "end" events include success.
+    """
+
+    def __init__(
+        self,
+        flow: str,
+        design: str,
+        stages: Sequence[Tuple[str, str]] = (),
+        callbacks: Sequence[ProgressCallback] = (),
+        events_file: Union[None, str, os.PathLike] = None,
+        history: Optional[RuntimeHistory] = None,
+    ) -> None:
+        self.flow = flow
+        self.design = design
+        self.stages = list(stages)
+        self.callbacks = list(callbacks)
+        self.events_file = Path(events_file) if events_file else None
+        self.history = history
+        self.stage: Optional[str] = None
+        self.stage_index = -1
+        self.stage_starts: Dict[str, float] = {}
+        self.start_time = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages_re = (
+            re.compile("|".join(f"(?P<s{i}>{pattern})" for i, (_, pattern) in enumerate(stages)))
+            if stages
+            else None
+        )
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def emit(self, event: str, **kwargs: Any) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        if event == "end":
+            eta: Optional[float] = 0.0
+        else:
+            eta = self.history.remaining(self.stage, elapsed) if self.history else None
+        ev = dict(
+            event=event,
+            flow=self.flow,
+            design=self.design,
+            timestamp=datetime.now().isoformat(),
+            elapsed=round(elapsed, 3),
+            eta=None if eta is None else round(eta, 3),
+            **kwargs,
+        )
+        with self._lock:
+            if self.events_file:
+                try:
+                    with open(self.events_file, "a") as f:
+                        f.write(json.dumps(ev) + "\n")
+                except OSError as e:
+                    log.warning("Failed to write progress event to %s: %s", self.events_file, e)
+            for callback in self.callbacks:
+                try:
+                    callback(ev)
+                except Exception as e:  # pylint: disable=broad-except
+                    log.warning("Progress callback %s failed: %s", callback, e)
+        return ev
+
+    def feed(self, line: str) -> None:
+        """Match a line of tool output against the stage markers"""
+        if self._stages_re is None:
+            return
+        match = self._stages_re.search(line)
+        if match is None or match.lastgroup is None:
+            return
+        index = int(match.lastgroup[1:])
+        if index <= self.stage_index:  # stages only advance
+            return
+        stage = self.stages[index][0]
+        self.stage = stage
+        self.stage_index = index
+        self.stage_starts.setdefault(stage, round(self.elapsed, 3))
+        log.info("[%s] stage: %s (%d/%d)", self.flow, stage, index + 1, len(self.stages))
+        self.emit("stage", stage=stage, stage_index=index, num_stages=len(self.stages))
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Monitor the output of tools run from the current thread"""
+        prev = getattr(_thread_state, "monitor", None)
+        _thread_state.monitor = self
+        self.start_time = time.monotonic()
+        self.emit("start")
+        try:
+            yield self
+        finally:
+            _thread_state.monitor = prev
+
+    def finish(self, success: bool) -> None:
+        total = self.elapsed
+        self.stage = None
+        self.emit("end", success=success)
+        if success and self.history is not None:
+            self.history.record(round(total, 3), self.stage_starts)
@@ -0,0 +1,528 @@
+"""Extraction of all timing paths from Vivado and Design Compiler timing reports into columnar arrays
+
+Reports are streamed (memory-mapped or line by line) and the fields of each path are appended to
+typed arrays (`array.array`), so no Python objects are kept per path. String columns use the
+Apache Arrow layout (offsets + UTF-8 data buffer) and low-cardinality columns are
+dictionary-encoded. The columns can be converted to NumPy arrays or a PyArrow table, when those
+packages are installed, and are saved as `.npz` files (readable with `numpy.load`) without
+requiring NumPy.
+"""
+
+from __future__ import annotations
+
+import ast
+import bisect
+import heapq
+import logging
+import math
+import os
+import re
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .utils import mapped_file
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "TimingPaths",
+    "StringColumn",
+    "DictColumn",
+    "parse_timing_paths",
+    "parse_vivado_timing_paths",
+    "parse_dc_timing_paths",
+]
+
+_NPY_DTYPES = {"d": "f8", "q": "i8", "i": "i4", "B": "u1"}
+_NPY_TYPECODES = {v: k for k, v in _NPY_DTYPES.items()}
+_BYTEORDER = "<" if sys.byteorder == "little" else ">"
+
+
+class StringColumn:
+    """Column of strings as one UTF-8 buffer and (Arrow-style) int64 offsets"""
+
+    def __init__(self) -> None:
+        self.offsets = array("q", [0])
+        self.data = bytearray()
+
+    def append(self, value: str) -> None:
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i] : self.offsets[i + 1]].decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class DictColumn:
+    """Dictionary-encoded column of (low cardinality) strings"""
+
+    def __init__(self, categories: Iterable[str] = ()) -> None:
+        self.codes = array("i")
+        self.categories: List[str] = list(categories)
+        self._index = {c: i for i, c in enumerate(self.categories)}
+
+    def append(self, value: str) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.categories[self.codes[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        for c in self.codes:
+            yield self.categories[c]
+
+
+class TimingPaths:
+    """Columnar table of timing paths"""
+
+    float_columns = ("slack", "requirement", "data_path_delay", "logic_delay", "route_delay")
+    int_columns = ("logic_levels",)
+    string_columns = ("startpoint", "endpoint")
+    dict_columns = ("clock", "path_group", "delay_type")
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, Union[array, StringColumn, DictColumn]] = {}
+        for name in self.float_columns:
+            self.columns[name] = array("d")
+        for name in self.int_columns:
+            self.columns[name] = array("q")
+        for name in self.string_columns:
+            self.columns[name] = StringColumn()
+        for name in self.dict_columns:
+            self.columns[name] = DictColumn()
+
+    def __len__(self) -> int:
+        return len(self.columns["slack"])
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def append(
+        self,
+        startpoint: str,
+        endpoint: str,
+        clock: str,
+        path_group: str,
+        delay_type: str,
+        slack: float,
+        requirement: float = math.nan,
+        data_path_delay: float = math.nan,
+        logic_delay: float = math.nan,
+        route_delay: float = math.nan,
+        logic_levels: int = -1,
+    ) -> None:
+        values = locals()
+        for name, col in self.columns.items():
+            col.append(values[name])  # type: ignore[union-attr]
+
+    def extend(self, other: TimingPaths) -> None:
+        for name, col in self.columns.items():
+            other_col = other.columns[name]
+            if isinstance(col, array):
+                col.extend(other_col)  # type: ignore[arg-type]
+            else:
+                for v in other_col:  # type: ignore[union-attr]
+                    col.append(v)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {name: col[i] for name, col in self.columns.items()}
+
+    # summaries
+    def slack_histogram(
+        self, bins: int = 20, delay_type: Optional[str] = "max"
+    ) -> Tuple[List[float], List[int]]:
+        """Histogram of (finite) slacks. Returns (bin_edges, counts), as numpy.histogram does."""
+        slack = self.columns["slack"]
+        assert isinstance(slack, array)
+        lo, hi = math.inf, -math.inf
+        for i in self._selection(delay_type):
+            s = slack[i]
+            if math.isfinite(s):
+                lo = min(lo, s)
+                hi = max(hi, s)
+        if lo > hi:
+            return [], []
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        width = (hi - lo) / bins
+        edges = [lo + k * width for k in range(bins)] + [hi]
+        counts = [0] * bins
+        for i in self._selection(delay_type):
+            s = slack[i]
+            if math.isfinite(s):
+                counts[min(bisect.bisect_right(edges, s) - 1, bins - 1)] += 1
+        return edges, counts
+
+    def worst_endpoints(
+        self, n: int = 10, delay_type: Optional[str] = "max"
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """The `n` endpoints with the smallest slack, per clock (worst path of each endpoint)"""
+        slack = self.columns["slack"]
+        clock = self.columns["clock"]
+        endpoint = self.columns["endpoint"]
+        assert isinstance(clock, DictColumn) and isinstance(endpoint, StringColumn)
+        worst: Dict[Tuple[int, str], int] = {}  # (clock code, endpoint) -> index of worst path
+        for i in self._selection(delay_type):
+            key = (clock.codes[i], endpoint[i])
+            j = worst.get(key)
+            if j is None or slack[i] < slack[j]:
+                worst[key] = i
+        per_clock: Dict[int, List[int]] = {}
+        for (c, _), i in worst.items():
+            per_clock.setdefault(c, []).append(i)
+        return {
+            clock.categories[c]: [
+                dict(
+                    endpoint=endpoint[i],
+                    startpoint=self.columns["startpoint"][i],
+                    slack=slack[i],
+                    logic_levels=self.columns["logic_levels"][i],
+                )
+                for i in heapq.nsmallest(n, indices, key=slack.__getitem__)
+            ]
+            for c, indices in per_clock.items()
+        }
+
+    def summary(self, n: int = 5, bins: int = 10) -> Dict[str, Any]:
+        edges, counts = self.slack_histogram(bins)
+        return dict(
+            num_paths=len(self),
+            slack_histogram=dict(bin_edges=edges, counts=counts),
+            worst_endpoints=self.worst_endpoints(n),
+        )
+
+    def _selection(self, delay_type: Optional[str]) -> Iterable[int]:
+        if delay_type is None:
+            return range(len(self))
+        col = self.columns["delay_type"]
+        assert isinstance(col, DictColumn)
+        if delay_type not in col.categories:
+            return ()
+        code = col.categories.index(delay_type)
+        return (i for i, c in enumerate(col.codes) if c == code)
+
+    # conversions
+    def buffers(self) -> Dict[str, array]:
+        """flat typed arrays of all columns"""
+        buffers = {}
+        for name, col in self.columns.items():
+            if isinstance(col, array):
+                buffers[name] = col
+            elif isinstance(col, StringColumn):
+                buffers[f"{name}.offsets"] = col.offsets
+                buffers[f"{name}.data"] = array("B", col.data)
+            else:
+                buffers[f"{name}.codes"] = col.codes
+                categories = StringColumn()
+                for c in col.categories:
+                    categories.append(c)
+                buffers[f"{name}.categories.offsets"] = categories.offsets
+                buffers[f"{name}.categories.data"] = array("B", categories.data)
+        return buffers
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """numeric columns as (zero-copy) NumPy arrays and string columns as NumPy object arrays"""
+        import numpy as np  # type: ignore[import-not-found]
+
+        out: Dict[str, Any] = {}
+        for name, col in self.columns.items():
+            if isinstance(col, array):
+                out[name] = np.frombuffer(col, dtype=_BYTEORDER + _NPY_DTYPES[col.typecode])
+            elif isinstance(col, DictColumn):
+                codes = np.frombuffer(col.codes, dtype=_BYTEORDER + "i4")
+                out[name] = np.array(col.categories, dtype=object)[codes]
+            else:
+                out[name] = np.array(list(col), dtype=object)
+        return out
+
+    def to_arrow(self):
+        """Convert to a pyarrow.Table (string buffers are not copied)"""
+        import pyarrow as pa  # type: ignore[import-not-found]
+
+        arrays = {}
+        for name, col in self.columns.items():
+            if isinstance(col, array):
+                arrays[name] = pa.array(col, type=pa.float64() if col.typecode == "d" else None)
+            elif isinstance(col, StringColumn):
+                arrays[name] = pa.LargeStringArray.from_buffers(
+                    len(col), pa.py_buffer(col.offsets), pa.py_buffer(bytes(col.data))
+                )
+            else:
+                arrays[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(col.codes, type=pa.int32()), pa.array(col.categories)
+                )
+        return pa.table(arrays)
+
+    def save(self, path: Union[str, os.PathLike]) -> Path:
+        """Save as an (uncompressed) .npz archive"""
+        path = Path(path)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+            for name, buf in self.buffers().items():
+                zf.writestr(name + ".npy", _npy_bytes(buf))
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> TimingPaths:
+        paths = cls()
+        with zipfile.ZipFile(path) as zf:
+            buffers = {
+                n.removesuffix(".npy"): _npy_array(zf.read(n))
+                for n in zf.namelist()
+                if n.endswith(".npy")
+            }
+        for name, col in paths.columns.items():
+            if isinstance(col, array):
+                paths.columns[name] = buffers[name]
+            elif isinstance(col, StringColumn):
+                col.offsets = buffers[f"{name}.offsets"]
+                col.data = bytearray(buffers[f"{name}.data"].tobytes())
+            else:
+                categories = StringColumn()
+                categories.offsets = buffers[f"{name}.categories.offsets"]
+                categories.data = bytearray(buffers[f"{name}.categories.data"].tobytes())
+                paths.columns[name] = col = DictColumn(categories)
+                col.codes = buffers[f"{name}.codes"]
+        return paths
+
+
+def _npy_bytes(buf: array) -> bytes:
+    header = repr(
+        {
+            "descr": _BYTEORDER + _NPY_DTYPES[buf.typecode],
+            "fortran_order": False,
+            "shape": (len(buf),),
+        }
+    )
+    # magic (6) + version (2) + header length (2) + header, aligned to 64 bytes
+    pad = 64 - (10 + len(header) + 1) % 64
+    header_bytes = (header + " " * pad + "\n").encode("latin1")
+    return (
+        b"\x93NUMPY\x01\x00" + len(header_bytes).to_bytes(2, "little") + header_bytes + bytes(buf)
+    )
+
+
+def _npy_array(content: bytes) -> array:
+    assert content[:6] == b"\x93NUMPY", "not an npy file"
+    header_len = int.from_bytes(content[8:10], "little")
+    header = ast.literal_eval(content[10 : 10 + header_len].decode("latin1"))
+    descr: str = header["descr"]
+    arr = array(_NPY_TYPECODES[descr[1:]])
+    arr.frombytes(content[10 + header_len :])
+    if descr[0] in "<>" and descr[0] != _BYTEORDER:
+        arr.byteswap()
+    return arr
+
+
+_NUM = r"[-+]?\d+(?:\.\d*)?"
+
+
+def _to_float(s: Union[None, str, bytes]) -> float:
+    if s is None:
+        return math.nan
+    try:
+        return float(s)
+    except ValueError:
+        return math.nan
+
+
+_BNUM = _NUM.encode()
+
+# fields of a Vivado `report_timing` path, in the order they are reported (all but Slack optional)
+_VIVADO_PATH_RE = re.compile(
+    rb"^\s*Slack(?:\s*\(\w+\))?\s*:\s*(?P<slack>" + _BNUM + rb"|inf)[^\n]*\n"
+    rb"(?:\s*Source:\s+(?P<startpoint>\S+)[^\n]*\n(?:\s*\([^\n]*\n)?)?"
+    rb"(?:\s*Destination:\s+(?P<endpoint>\S+)[^\n]*\n"
+    rb"(?:\s*\([^\n]*?clocked by (?P<clock>\S+?)[\s)][^\n]*\n)?)?"
+    rb"(?:\s*Path Group:\s+(?P<path_group>\S+)[^\n]*\n)?"
+    rb"(?:\s*Path Type:\s+(?P<path_type>\w+)[^\n]*\n)?"
+    rb"(?:\s*Requirement:\s+(?P<requirement>" + _BNUM + rb")ns[^\n]*\n)?"
+    rb"(?:\s*Data Path Delay:\s+(?P<data_path_delay>" + _BNUM + rb")ns\s*"
+    rb"\(logic (?P<logic_delay>" + _BNUM + rb")ns[^\n]*?"
+    rb"route (?P<route_delay>" + _BNUM + rb")ns[^\n]*\n)?"
+    rb"(?:\s*Logic Levels:\s+(?P<logic_levels>\d+))?",
+    re.MULTILINE,
+)
+
+
+def _parse_vivado(report: Union[str, os.PathLike], paths: TimingPaths) -> None:
+    # a single regular expression per path, matched over the memory-mapped report
+    with mapped_file(report) as content:
+        for m in _VIVADO_PATH_RE.finditer(content):
+            endpoint = m.group("endpoint")
+            if endpoint is None:
+                continue
+            path_group = (m.group("path_group") or b"").decode()
+            path_type = (m.group("path_type") or b"").lower()
+            levels = m.group("logic_levels")
+            paths.append(
+                startpoint=(m.group("startpoint") or b"").decode(),
+                endpoint=endpoint.decode(),
+                clock=m.group("clock").decode() if m.group("clock") else path_group,
+                path_group=path_group,
+                delay_type="min" if path_type in (b"hold", b"min") else "max",
+                slack=float(m.group("slack")),
+                requirement=_to_float(m.group("requirement")),
+                data_path_delay=_to_float(m.group("data_path_delay")),
+                logic_delay=_to_float(m.group("logic_delay")),
+                route_delay=_to_float(m.group("route_delay")),
+                logic_levels=int(levels) if levels else -1,
+            )
+
+
+class _DcPathParser:
+    field_re = re.compile(
+        r"^\s*(?P<key>Startpoint|Endpoint|Path Group|Path Type):\s+(?P<value>.*?)\s*$"
+    )
+    clocked_by_re = re.compile(r"clocked by (\S+?)\)")
+    # ... <incr> [attribute flags] <path> [r|f]
+    point_re = re.compile(
+        rf"^\s*(?P<point>\S+)\s.*?(?P<incr>{_NUM})\s*[&*#@$]*\s+(?P<path>{_NUM})\s*[rf]?\s*$"
+    )
+    cell_re = re.compile(r"^\s*(?P<inst>\S+)/\S+\s+\((?P<cell>\w+)\)")
+    arrival_re = re.compile(rf"^\s*data arrival time\s+(?P<t>{_NUM})\s*$")
+    required_re = re.compile(rf"^\s*data required time\s+(?P<t>{_NUM})\s*$")
+    slack_re = re.compile(rf"^\s*slack\s*\((?P<status>[^)]*)\)\s+(?P<slack>{_NUM})")
+
+    def __init__(self, paths: TimingPaths) -> None:
+        self.paths = paths
+        self.cur: Optional[Dict[str, Any]] = None
+
+    def feed(self, line: str) -> None:
+        m = self.field_re.match(line)
+        if m:
+            key, value = m.group("key", "value")
+            if key == "Startpoint":
+                self.cur = dict(
+                    startpoint=value.split(" (")[0],
+                    route_delay=0.0,
+                    instances=set(),
+                    in_data_path=True,
+                )
+                return
+            cur = self.cur
+            if cur is None:
+                return
+            if key == "Endpoint":
+                cur["endpoint"] = value.split(" (")[0]
+                clk = self.clocked_by_re.search(value)
+                if clk:
+                    cur["clock"] = clk.group(1)
+            elif key == "Path Group":
+                cur["path_group"] = value
+            elif key == "Path Type":
+                cur["delay_type"] = "min" if value.lower().startswith("min") else "max"
+            return
+        cur = self.cur
+        if cur is None:
+            return
+        m = self.slack_re.match(line)
+        if m:
+            cur["slack"] = _to_float(m.group("slack"))
+            self.flush()
+            return
+        if not cur["in_data_path"]:
+            m = self.required_re.match(line)
+            if m and "required" not in cur:
+                cur["required"] = float(m.group("t"))
+            elif "capture_edge" not in cur and line.lstrip().startswith("clock "):
+                m = self.point_re.match(line)
+                if m:
+                    cur["capture_edge"] = float(m.group("path"))
+            return
+        m = self.arrival_re.match(line)
+        if m:
+            cur["arrival"] = float(m.group("t"))
+            cur["in_data_path"] = False
+            return
+        m = self.point_re.match(line)
+        if not m:
+            return
+        point = m.group("point")
+        if point == "clock" or point.startswith("clock"):
+            # launch clock edge, clock network delay, ...: data path starts after these
+            cur["launch"] = float(m.group("path"))
+            cur.setdefault("launch_edge", cur["launch"])
+            return
+        if "(net)" in line:
+            cur["route_delay"] += float(m.group("incr"))
+            return
+        c = self.cell_re.match(line)
+        if c:
+            cur["instances"].add(c.group("inst"))
+
+    def flush(self) -> None:
+        cur = self.cur
+        self.cur = None
+        if not cur or "endpoint" not in cur:
+            return
+        instances = cur["instances"]
+        instances.discard(cur["startpoint"])
+        instances.discard(cur["endpoint"])
+        data_path_delay = cur.get("arrival", math.nan) - cur.get("launch", 0.0)
+        route_delay = cur["route_delay"]
+        path_group = cur.get("path_group", "")
+        self.paths.append(
+            startpoint=cur["startpoint"],
+            endpoint=cur["endpoint"],
+            clock=cur.get("clock", path_group),
+            path_group=path_group,
+            delay_type=cur.get("delay_type", "max"),
+            slack=cur.get("slack", math.nan),
+            requirement=cur.get("capture_edge", math.nan) - cur.get("launch_edge", 0.0),
+            data_path_delay=data_path_delay,
+            logic_delay=data_path_delay - route_delay,
+            route_delay=route_delay,
+            logic_levels=len(instances),
+        )
+
+
+def _parse_dc(report: Union[str, os.PathLike], paths: TimingPaths) -> None:
+    parser = _DcPathParser(paths)
+    with open(report, errors="replace") as f:
+        for line in f:
+            parser.feed(line)
+    parser.flush()
+
+
+_PARSERS = {"vivado": _parse_vivado, "dc": _parse_dc}
+
+
+def parse_timing_paths(
+    report: Union[str, os.PathLike],
+    tool: str,
+    paths: Optional[TimingPaths] = None,
+) -> TimingPaths:
+    """Stream a timing report of `tool` ('vivado' or 'dc') and append all of its paths to `paths`"""
+    if paths is None:
+        paths = TimingPaths()
+    _PARSERS[tool](report, paths)
+    log.debug("Parsed %d timing paths from %s", len(paths), report)
+    return paths
+
+
+def parse_vivado_timing_paths(report: Union[str, os.PathLike]) -> TimingPaths:
+    return parse_timing_paths(report, "vivado")
+
+
+def parse_dc_timing_paths(*reports: Union[str, os.PathLike]) -> TimingPaths:
+    paths = TimingPaths()
+    for report in reports:
+        parse_timing_paths(report, "dc", paths)
+    return paths
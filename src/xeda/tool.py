@@ -12,14 +12,25 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from .console import console
 from .dataclass import Field, XedaBaseModel, validator
 from .flow import Flow
+from .jobserver import current_tokens
+from .limits import active_limits
 from .proc_utils import run_process
-from .utils import ExecutableNotFound, NonZeroExitCode, ToolException, cached_property, try_convert
+from .tracing import span
+from .utils import (
+    ExecutableNotFound,
+    NonZeroExitCode,
+    ResourceLimitExceeded,
+    ToolException,
+    cached_property,
+    try_convert,
+)
 
 log = logging.getLogger(__name__)
 
 __all__ = [
     "ToolException",
     "NonZeroExitCode",
+    "ResourceLimitExceeded",
     "ExecutableNotFound",
     "Docker",
     "Tool",
@@ -114,6 +125,9 @@ class Docker(XedaBaseModel):
             docker_args += ["--tty", "--interactive"]
         if self.platform:
             docker_args += ["--platform", self.platform]
+        limits = active_limits()
+        if limits is not None:
+            docker_args += limits.docker_args()
         selinux_perm = True
         cap = ":z" if selinux_perm else ""
         for k, v in self.mounts.items():
@@ -142,6 +156,7 @@ class Docker(XedaBaseModel):
                 check=check,
                 print_command=print_command,
                 highlight_rules=highlight_rules,
+                resource_limits=False,  # applied to the container instead
             )
         except FileNotFoundError as e:
             path = env["PATH"] if env and "PATH" in env else os.environ.get("PATH", "")
@@ -189,6 +204,10 @@ class Tool(XedaBaseModel):
     print_command: bool = True
     highlight_rules: Optional[Dict[str, str]] = None
     console_colors: bool = True
+    make_jobserver_client: bool = Field(
+        False,
+        description="The tool is (or runs) GNU make and can share the job tokens of the flow.",
+    )
 
     design_root_: Optional[Path] = Field(None, hidden_from_schema=True)
     flow_settings_: Optional[Flow.Settings] = Field(None, hidden_from_schema=True)
@@ -415,6 +434,27 @@ class Tool(XedaBaseModel):
         check: bool = True,
         cwd: Optional[Path] = None,
         highlight_rules: Optional[Dict[str, str]] = None,
+    ) -> Union[None, str]:
+        with span(os.path.basename(executable), "tool", tool=self.__class__.__qualname__):
+            return self._execute(
+                executable,
+                *args,
+                env=env,
+                stdout=stdout,
+                check=check,
+                cwd=cwd,
+                highlight_rules=highlight_rules,
+            )
+
+    def _execute(
+        self,
+        executable: str,
+        *args: Any,
+        env: Optional[Dict[str, Any]],
+        stdout: OptionalBoolOrPath,
+        check: bool,
+        cwd: Optional[Path],
+        highlight_rules: Optional[Dict[str, str]],
     ) -> Union[None, str]:
         if not stdout and self.redirect_stdout:
             stdout = self.redirect_stdout
@@ -437,6 +477,11 @@ class Tool(XedaBaseModel):
                 print_command=self.print_command,
                 highlight_rules=highlight_rules,
             )
+        pass_fds: Tuple[int, ...] = ()
+        tokens = current_tokens() if self.make_jobserver_client else None
+        if tokens is not None:
+            make_env, pass_fds = tokens.make_env()
+            env = {**(env or {}), **make_env}
         if env is not None:
             env = {**os.environ, **env}
         try:
@@ -449,6 +494,7 @@ class Tool(XedaBaseModel):
                 cwd=cwd,
                 print_command=self.print_command,
                 highlight_rules=highlight_rules,
+                pass_fds=pass_fds,
             )
         except FileNotFoundError as e:
             path = env["PATH"] if env and "PATH" in env else os.environ.get("PATH")
@@ -0,0 +1,151 @@
+"""Profiling spans of the runner, flows, and tools, recorded in the Chrome trace event format.
+Traces can be viewed in Perfetto (https://ui.perfetto.dev) or chrome://tracing"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "PhaseTimer",
+    "Tracer",
+    "active_tracer",
+    "span",
+    "start_tracing",
+    "stop_tracing",
+]
+
+_tracer: Optional[Tracer] = None
+
+
+class Tracer:
+    """Collects the spans of a single process, as "complete" (ph="X") trace events.
+    Timestamps are from the system-wide monotonic clock, so traces of different processes align."""
+
+    def __init__(self, process_name: Optional[str] = None) -> None:
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._named_threads: Dict[int, str] = {}
+        self.set_process_name(process_name or os.path.basename(sys.argv[0]) or "xeda")
+
+    def _metadata(self, name: str, tid: int, value: str) -> None:
+        self.events.append(dict(name=name, ph="M", pid=self.pid, tid=tid, args=dict(name=value)))
+
+    def set_process_name(self, name: str) -> None:
+        with self._lock:
+            self._metadata("process_name", 0, name)
+
+    def add_span(
+        self, name: str, cat: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        tid = threading.get_native_id()
+        event = dict(
+            name=name,
+            cat=cat,
+            ph="X",
+            ts=start_ns / 1000,
+            dur=(end_ns - start_ns) / 1000,
+            pid=self.pid,
+            tid=tid,
+        )
+        if args:
+            event["args"] = {
+                k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()
+            }
+        with self._lock:
+            if tid not in self._named_threads:
+                thread_name = threading.current_thread().name
+                self._named_threads[tid] = thread_name
+                self._metadata("thread_name", tid, thread_name)
+            self.events.append(event)
+
+    def load(self, path: Union[str, os.PathLike]) -> None:
+        """add the events of a trace file (e.g., recorded by another process)"""
+        with open(path) as f:
+            data = json.load(f)
+        events = data["traceEvents"] if isinstance(data, dict) else data
+        with self._lock:
+            self.events.extend(events)
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{self.pid}.tmp")
+        with self._lock:
+            with open(tmp, "w") as f:
+                json.dump(dict(traceEvents=self.events, displayTimeUnit="ms"), f)
+        os.replace(tmp, path)
+
+
+def active_tracer() -> Optional[Tracer]:
+    """Tracer of the current process, if tracing is enabled"""
+    # a forked child process inherits the tracer of its parent, which it should not add to
+    if _tracer is not None and _tracer.pid == os.getpid():
+        return _tracer
+    return None
+
+
+def start_tracing(process_name: Optional[str] = None) -> Tracer:
+    """Enable tracing in the current process, if not already enabled"""
+    global _tracer  # pylint: disable=global-statement
+    tracer = active_tracer()
+    if tracer is None:
+        tracer = _tracer = Tracer(process_name)
+    return tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Disable tracing in the current process and return its tracer"""
+    global _tracer  # pylint: disable=global-statement
+    tracer = active_tracer()
+    _tracer = None
+    return tracer
+
+
+@contextlib.contextmanager
+def span(name: str, cat: str = "xeda", **args: Any):
+    """Record the execution of the block as a span, if tracing is enabled"""
+    tracer = active_tracer()
+    if tracer is None:
+        yield
+        return
+    start = time.monotonic_ns()
+    try:
+        yield
+    finally:
+        tracer.add_span(name, cat, start, time.monotonic_ns(), args)
+
+
+class PhaseTimer:
+    """Wall-clock time (in seconds) of the phases of an execution, in the order they were entered.
+    Repeated phases are accumulated. Each phase is also recorded as a span, if tracing is enabled.
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.monotonic()
+        self.phases: Dict[str, Any] = {}
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_time
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(self.phases.get(name, 0.0) + seconds, 6)
+
+    @contextlib.contextmanager
+    def phase(self, name: str, cat: str = "xeda", **args: Any):
+        start = time.monotonic()
+        try:
+            with span(name, cat, **args):
+                yield
+        finally:
+            self.add(name, time.monotonic() - start)
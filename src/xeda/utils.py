@@ -6,24 +6,28 @@ import hashlib
 import importlib
 import json
 import logging
+import mmap
 import os
 import re
+import shutil
 import sys
 import time
 import unittest
 from collections import defaultdict
-from contextlib import AbstractContextManager
+from contextlib import AbstractContextManager, contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
-from functools import cached_property, reduce
+from functools import cached_property, lru_cache, reduce
 from pathlib import Path
 from types import TracebackType
 from typing import (
     Any,
     Dict,
     Iterable,
+    Iterator,
     List,
     Mapping,
+    NamedTuple,
     Optional,
     OrderedDict,
     Tuple,
@@ -54,8 +58,14 @@ __all__ = [
     # utility functions
     "load_class",
     "dump_json",
+    "cache_dir",
+    "CacheEntry",
+    "load_cache_file",
+    "save_cache_file",
     "toml_loads",
     "parse_xml",
+    "XmlTableRow",
+    "iter_xml_table_rows",
     "try_convert_to_primitives",
     "try_convert",
     # list/container utils
@@ -76,11 +86,15 @@ __all__ = [
     "XedaException",
     "ToolException",
     "NonZeroExitCode",
+    "ResourceLimitExceeded",
     "ExecutableNotFound",
     # etc
     "expand_env_vars",
+    "compile_pattern",
+    "scan_patterns",
     "parse_patterns",
     "parse_patterns_in_file",
+    "parse_step_metrics",
     "semantic_hash",
 ]
 
@@ -186,6 +200,103 @@ def dump_json(data: object, path: Path, backup: bool = True, indent: int = 4) ->
         )
 
 
+def cache_dir(*subdirs: str) -> Path:
+    """Directory for data that persists across runs (e.g., runtime history, build caches):
+    $XEDA_CACHE_DIR, or 'xeda' under $XDG_CACHE_HOME (default: ~/.cache).
+    Created if it does not exist."""
+    root = os.environ.get("XEDA_CACHE_DIR")
+    if root:
+        path = Path(root)
+    else:
+        path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "xeda"
+    path = path.joinpath(*subdirs)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class CacheEntry:
+    """A directory under `root` (e.g., a cache_dir) named by the hash of `key`.
+    The entry is replaced atomically, so concurrent runs never see a partially written entry."""
+
+    _name_re = re.compile(r"^[0-9a-f]{32}$")
+
+    def __init__(self, key: Any, root: Path) -> None:
+        self.path = root / semantic_hash(key)[:32]
+
+    @contextmanager
+    def replace(self) -> Iterator[Path]:
+        """An empty directory to write the new content of the entry to, which then replaces the
+        entry. The entry is left unchanged if an exception is raised."""
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        old = self.path.with_name(f"{self.path.name}.{os.getpid()}.old")
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            yield tmp
+            if self.path.exists():
+                os.replace(self.path, old)
+            os.replace(tmp, self.path)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+            shutil.rmtree(old, ignore_errors=True)
+
+    def touch(self) -> None:
+        """Mark the entry as recently used (see `prune`)"""
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    @classmethod
+    def prune(cls, root: Path, max_size: int) -> List[Path]:
+        """Remove the least recently used (or updated) entries under `root`, until their total size
+        is at most `max_size` bytes. Returns the removed entries."""
+        entries = []
+        for path in root.iterdir():
+            if path.is_dir() and cls._name_re.match(path.name):
+                try:
+                    size = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+                    entries.append((path.stat().st_mtime, size, path))
+                except OSError:  # e.g., removed by another process
+                    continue
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            log.debug("Removing %s from the cache (%d bytes)", path, size)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed.append(path)
+        return removed
+
+
+def load_cache_file(path: Path, description: str = "cache file") -> Any:
+    """Content of the JSON file at `path` (see `save_cache_file`), or None if it does not exist or
+    is not valid"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        log.debug("Ignoring %s %s: %s", description, path, e)
+    return None
+
+
+def save_cache_file(path: Path, data: Any, description: str = "cache file") -> None:
+    """Write `data` to the JSON file at `path`, which is replaced atomically, so that concurrent
+    runs never read a partially written file. Failures are logged and ignored."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        log.debug("Could not save %s to %s: %s", description, path, e)
+
+
 def unique(lst: List[Any]) -> List[Any]:
     """returns unique elements of the list in their original order (first occurrence)."""
     return list(OrderedDict.fromkeys(lst))
@@ -417,6 +528,56 @@ def parse_xml(
     return etree_to_dict_rec(root)
 
 
+class XmlTableRow(NamedTuple):
+    section: Optional[str]
+    table: Optional[str]
+    header: bool
+    cells: List[str]
+
+
+def iter_xml_table_rows(
+    report_xml: Union[Path, os.PathLike, str],
+    row_tag: str = "tablerow",
+    header_tag: str = "tableheader",
+    cell_tag: str = "tablecell",
+    attribute: str = "contents",
+) -> Iterator[XmlTableRow]:
+    """Stream the rows of tables in an XML report (e.g., Vivado's `report_utilization -format xml`)
+    using ElementTree.iterparse. Only the `attribute` values of the cells are extracted and parsed
+    elements are discarded as soon as each row is complete, so memory does not grow with the size
+    of the report.
+    Raises FileNotFoundError or ElementTree.ParseError.
+    """
+    section: List[Optional[str]] = [None]
+    table: List[Optional[str]] = [None]
+    parents: List[ElementTree.Element] = []
+    for event, elem in ElementTree.iterparse(report_xml, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "section":
+                section.append(elem.get("title"))
+            elif elem.tag == "table":
+                table.append(elem.get("title"))
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == row_tag:
+            headers = [c.get(attribute, "") for c in elem.iterfind(header_tag)]
+            if headers:
+                yield XmlTableRow(section[-1], table[-1], True, headers)
+            cells = [c.get(attribute, "") for c in elem.iterfind(cell_tag)]
+            if cells:
+                yield XmlTableRow(section[-1], table[-1], False, cells)
+        elif elem.tag == "section":
+            section.pop()
+        elif elem.tag == "table":
+            table.pop()
+        else:
+            continue
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
 class Timer:
     def __init__(self, hi_res: bool = False) -> None:
         self.hi_res = hi_res
@@ -703,6 +864,18 @@ class NonZeroExitCode(ToolException):
         return f"Command '{self.command_args}' exited with code {self.exit_code}!"
 
 
+class ResourceLimitExceeded(NonZeroExitCode):
+    def __init__(
+        self, command_args: Any, exit_code: int, resource: str, limit: Any, *args: object
+    ) -> None:
+        super().__init__(command_args, exit_code, *args)
+        self.resource = resource
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return f"Command '{self.command_args}' exceeded its {self.resource} limit ({self.limit}) and exited with code {self.exit_code}!"
+
+
 class ExecutableNotFound(ToolException):
     def __init__(
         self,
@@ -730,29 +903,53 @@ class ExecutableNotFound(ToolException):
         return f"{self.__class__.__name__}: {self.__str__()}"
 
 
-def parse_patterns(
-    content: str,
+@lru_cache(maxsize=512)
+def compile_pattern(pattern: Union[str, bytes], flags: int = 0) -> re.Pattern:
+    """Compile (and cache) a regular expression, keyed by (pattern, flags)"""
+    return re.compile(pattern, flags)
+
+
+def _match_groups(match: re.Match) -> Dict[str, Any]:
+    groups = match.groupdict()
+    if isinstance(match.string, str):
+        return groups
+    return {
+        k: (v.decode(errors="replace") if isinstance(v, bytes) else v) for k, v in groups.items()
+    }
+
+
+def scan_patterns(
+    content: Union[str, bytes, mmap.mmap],
     re_pattern: Union[str, List[str]],
     *other_re_patterns: Union[str, List[str]],
-    flags: re.RegexFlag = re.MULTILINE | re.IGNORECASE,  # re.NOFLAG
+    flags: int = re.MULTILINE | re.IGNORECASE,
     required: bool = False,
     sequential: bool = False,
 ) -> Optional[dict]:
-    results = dict()
-
-    def match_pattern(pat: str, content: str) -> Tuple[bool, str]:
-        match = re.search(pat, content, flags)
+    """Search for (named groups of) patterns in `content`, which can be a str or a bytes-like object
+    (e.g., an mmap of a report file). For bytes-like content, patterns are UTF-8 encoded and matched
+    values are decoded.
+    In `sequential` mode, each pattern is searched for after the end of the previous match. As the
+    content is not sliced, `^` (with MULTILINE) only matches at the start of a line.
+    """
+    results: Dict[str, Any] = {}
+    is_str = isinstance(content, str)
+    pos = 0
+
+    def match_pattern(pat: str) -> bool:
+        nonlocal pos
+        compiled = compile_pattern(pat if is_str else pat.encode(), flags)
+        match = compiled.search(content, pos)  # type: ignore[arg-type]
         if match is None:
-            return False, content
-        match_dict = match.groupdict()
-        for k, v in match_dict.items():
+            return False
+        for k, v in _match_groups(match).items():
             v = try_convert_to_primitives(v)
             results[k] = v
             log.debug("%s: %s", k, v)
         if sequential:
-            content = content[match.span(0)[1] :]
-            log.debug("len(content)=%d", len(content))
-        return True, content
+            pos = match.end()
+            log.debug("pos=%d", pos)
+        return True
 
     for pat in [re_pattern, *other_re_patterns]:
         if not pat:
@@ -761,10 +958,10 @@ def parse_patterns(
         if isinstance(pat, list):
             log.debug("Matching any of: %s", pat)
             for subpat in pat:
-                matched, content = match_pattern(subpat, content)
+                matched = match_pattern(subpat)
         else:
             log.debug("Matching: %s", pat)
-            matched, content = match_pattern(pat, content)
+            matched = match_pattern(pat)
 
         if not matched and required:
             log.error(
@@ -775,6 +972,35 @@ def parse_patterns(
     return results
 
 
+def parse_patterns(
+    content: str,
+    re_pattern: Union[str, List[str]],
+    *other_re_patterns: Union[str, List[str]],
+    flags: re.RegexFlag = re.MULTILINE | re.IGNORECASE,  # re.NOFLAG
+    required: bool = False,
+    sequential: bool = False,
+) -> Optional[dict]:
+    return scan_patterns(
+        content,
+        re_pattern,
+        *other_re_patterns,
+        flags=flags,
+        required=required,
+        sequential=sequential,
+    )
+
+
+@contextmanager
+def mapped_file(path: Union[str, os.PathLike]):
+    """Read-only memory map of a file's content (empty bytes for an empty file)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
 def parse_patterns_in_file(
     reportfile_path: Union[str, os.PathLike],
     re_pattern: Union[str, List[str]],
@@ -783,15 +1009,13 @@ def parse_patterns_in_file(
     required: bool = False,
     sequential: bool = False,
 ) -> Optional[dict]:
-    if not isinstance(reportfile_path, Path):
-        reportfile_path = Path(reportfile_path)
+    """Search for patterns in a report file. The file is memory-mapped rather than read."""
     # TODO fix debug and verbosity levels!
     flags = re.MULTILINE | re.IGNORECASE
     if dotall:
         flags |= re.DOTALL
-    with open(reportfile_path) as rpt_file:
-        content = rpt_file.read()
-        return parse_patterns(
+    with mapped_file(reportfile_path) as content:
+        return scan_patterns(
             content,
             re_pattern,
             *other_re_patterns,
@@ -813,3 +1037,35 @@ def semantic_hash(data: Any) -> str:
 
     r = repr(_sorted_dict_str(data))
     return hashlib.sha3_256(bytes(r, "UTF-8")).hexdigest()
+
+
+def parse_step_metrics(metrics_file: Union[str, os.PathLike]) -> Dict[str, Dict[str, Any]]:
+    """Per-step metrics (e.g., runtime and peak memory) of a tool, recorded as JSON lines with a "step"
+    key, in the order of execution. Repeated steps are suffixed with their count (e.g.,
+    "phys_opt_design_2"). If the records include "wns", `wns_delta` is the change of WNS from the
+    previous step (positive: improved)."""
+    steps: Dict[str, Dict[str, Any]] = {}
+    prev_wns = None
+    try:
+        with open(metrics_file) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return steps
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            log.warning("Invalid line in %s: %s", metrics_file, line.strip())
+            continue
+        step = record.pop("step")
+        name, count = step, 1
+        while name in steps:
+            count += 1
+            name = f"{step}_{count}"
+        wns = record.get("wns")
+        if wns is not None and prev_wns is not None:
+            record["wns_delta"] = round(wns - prev_wns, 6)
+        if wns is not None:
+            prev_wns = wns
+        steps[name] = record
+    return steps
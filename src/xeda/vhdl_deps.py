@@ -0,0 +1,122 @@
+"""Dependencies between the design units of VHDL source files, for incremental analysis"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Set, Union
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "VhdlUnits",
+    "dependency_graph",
+    "dependents",
+    "parse_vhdl_units",
+    "topological_levels",
+    "topological_order",
+]
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r'"[^"\n]*"')
+_PRIMARY_UNIT = re.compile(
+    r"\b(?:entity|package|context|configuration)\s+(\w+)\s+(?:of\s+\w+\s+)?is\b"
+)
+_SECONDARY_UNIT = re.compile(r"\b(?:architecture\s+\w+\s+of|package\s+body)\s+(\w+)\s+is\b")
+_SELECTED_NAME = re.compile(r"\b(?:use|context|entity|configuration|is\s+new)\s+(\w+)\s*\.\s*(\w+)")
+_COMPONENT = re.compile(r"\bcomponent\s+(\w+)")
+
+
+@dataclass
+class VhdlUnits:
+    """Design units declared in a VHDL file and the units of the work library that it uses"""
+
+    provides: Set[str] = field(default_factory=set)
+    depends: Set[str] = field(default_factory=set)
+
+
+def parse_vhdl_units(source: Union[str, Path], work: str = "work") -> VhdlUnits:
+    """Design units of a VHDL file (path) or source code (str). Names are in lowercase.
+    Dependencies are units of the work library referred to by use clauses, context references,
+    entity/configuration instantiations, package instantiations, and component declarations
+    (default binding), as well as the primary units of architectures and package bodies."""
+    text = source.read_text(errors="replace") if isinstance(source, Path) else source
+    text = _STRINGS.sub('""', _COMMENTS.sub("", text)).lower()
+    work_libs = {"work", work.lower()}
+    units = VhdlUnits()
+    units.provides.update(_PRIMARY_UNIT.findall(text))
+    units.depends.update(_SECONDARY_UNIT.findall(text))
+    units.depends.update(unit for lib, unit in _SELECTED_NAME.findall(text) if lib in work_libs)
+    units.depends.update(_COMPONENT.findall(text))
+    units.depends -= units.provides
+    units.depends.discard("all")
+    return units
+
+
+def dependency_graph(files: Mapping[str, VhdlUnits]) -> Dict[str, Set[str]]:
+    """The files that each file depends on, i.e., which declare units that it uses"""
+    declared_in: Dict[str, str] = {}
+    for f, units in files.items():
+        for unit in units.provides:
+            declared_in.setdefault(unit, f)
+    return {
+        f: {declared_in[d] for d in units.depends if d in declared_in} - {f}
+        for f, units in files.items()
+    }
+
+
+def dependents(graph: Mapping[str, Set[str]], changed: Iterable[str]) -> Set[str]:
+    """`changed` files and all the files that (transitively) depend on them"""
+    users: Dict[str, Set[str]] = {f: set() for f in graph}
+    for f, deps in graph.items():
+        for d in deps:
+            users.setdefault(d, set()).add(f)
+    result: Set[str] = set()
+    stack = list(changed)
+    while stack:
+        f = stack.pop()
+        if f not in result:
+            result.add(f)
+            stack.extend(users.get(f, ()))
+    return result
+
+
+def topological_order(graph: Mapping[str, Set[str]], nodes: Sequence[str]) -> List[str]:
+    """`nodes` in an order where each node follows the nodes it depends on, which is otherwise as
+    close to their original order as possible. Dependency cycles are broken arbitrarily."""
+    index = {n: i for i, n in enumerate(nodes)}
+    order: List[str] = []
+    visited: Set[str] = set()
+
+    def visit(node: str) -> None:
+        visited.add(node)
+        for dep in sorted(graph.get(node, set()) & index.keys(), key=index.__getitem__):
+            if dep not in visited:
+                visit(dep)
+        order.append(node)
+
+    for node in nodes:
+        if node not in visited:
+            visit(node)
+    return order
+
+
+def topological_levels(graph: Mapping[str, Set[str]], nodes: Sequence[str]) -> List[List[str]]:
+    """Group `nodes` into levels, where the nodes of each level only depend on nodes of previous
+    levels (or nodes not in `nodes`). Nodes keep their order within each level. Nodes in a
+    dependency cycle are placed in the last level, in their original order."""
+    remaining = list(nodes)
+    done: Set[str] = set()
+    levels: List[List[str]] = []
+    while remaining:
+        pending = set(remaining)
+        level = [n for n in remaining if not (graph.get(n, set()) & pending)]
+        if not level:
+            log.warning("Circular dependencies between: %s", ", ".join(remaining))
+            level = remaining
+        levels.append(level)
+        done.update(level)
+        remaining = [n for n in remaining if n not in done]
+    return levels
@@ -1,11 +1,38 @@
+import json
+import sys
 from pathlib import Path
 from typing import Any, Dict
 
-from xeda import Cocotb
+from xeda import Cocotb, Design
+from xeda.cocotb import TestResults as CocotbTestResults
+from xeda.cocotb import balance_shards, discover_tests, merge_results_xml
+from xeda.flow import SimFlow
+from xeda.flow_runner import DefaultRunner
+from xeda.tool import Tool
 from xeda.utils import WorkingDirectory
 
 TESTS_DIR = Path(__file__).parent.absolute()
 RESOURCES_DIR = TESTS_DIR / "resources"
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+# writes a results file for the tests in $TESTCASE, each taking (len(name) / 10) seconds.
+# test_sqrt fails with the random seed 2.
+FAKE_SIM = """
+import os
+tests = os.environ.get("TESTCASE", "test_sqrt_corners,test_sqrt").split(",")
+seed = os.environ.get("COCOTB_RANDOM_SEED", "1")
+failure = "<failure />" if seed == "2" else ""
+cases = "".join(
+    f'<testcase name="{t}" classname="tb_sqrt" time="{len(t) / 10}" sim_time_ns="10.0">'
+    + (failure if t == "test_sqrt" else "") + "</testcase>"
+    for t in tests
+)
+with open(os.environ["COCOTB_RESULTS_FILE"], "w") as f:
+    f.write(
+        '<testsuites name="results"><testsuite name="all">'
+        f'<property name="random_seed" value="{seed}" />{cases}</testsuite></testsuites>'
+    )
+"""
 
 
 def test_cocotb_version():
@@ -35,6 +62,88 @@ def test_cocotb_parse_xml():
         assert results["success"] is False
 
 
+def test_balance_shards():
+    tests = ["a", "b", "c", "d", "e"]
+    times = {"a": 10.0, "b": 1.0, "c": 6.0, "d": 3.0}  # e: unknown, assumed 5.0
+    assert balance_shards(tests, times, 2) == [["a", "d"], ["b", "c", "e"]]
+    assert balance_shards(tests, {}, 3) == [["a", "d"], ["b", "e"], ["c"]]
+    assert balance_shards(tests[:2], times, 4) == [["a"], ["b"]]
+    assert balance_shards([], times, 4) == []
+
+
+def test_discover_and_merge(tmp_path: Path):
+    assert discover_tests(EXAMPLES_DIR / "vhdl" / "sqrt" / "tb_sqrt.py") == [
+        "test_sqrt_corners",
+        "test_sqrt",
+    ]
+    merged = tmp_path / "results.xml"
+    merge_results_xml([RESOURCES_DIR / "cocotb" / "results.xml"] * 2, merged)
+    results = CocotbTestResults.parse_results(merged)
+    assert results.tests == 2 and results.failures == 2 and len(results.test_suites) == 2
+
+
+class FakeSim(SimFlow):
+    cocotb_sim_name = "fake"
+
+    def run(self) -> None:
+        assert self.cocotb
+        fake_sim = self.run_path / "fake_sim.py"
+        fake_sim.write_text(FAKE_SIM)
+        self.run_sim(
+            Tool(executable=sys.executable),  # type: ignore
+            fake_sim,
+            env=self.cocotb.env(self.design),
+        )
+
+    def parse_reports(self) -> bool:
+        assert self.cocotb
+        return self.cocotb.add_results(self.results)
+
+
+def test_sharded_tests(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    flow = runner.run(FakeSim, design, flow_settings={"cocotb": {"shards": 2}})
+    assert flow is not None and flow.succeeded
+    assert flow.results["cocotb.tests"] == 2
+    shards = flow.results["cocotb.shards"]
+    assert [s["tests"] for s in shards] == [["test_sqrt_corners"], ["test_sqrt"]]
+    assert all(s["success"] and s["time"] > 0 for s in shards)
+    with open(tmp_path / "cache" / "cocotb" / "sqrt__tb_sqrt.json") as f:
+        assert json.load(f) == {"test_sqrt_corners": 1.7, "test_sqrt": 0.9}
+
+
+def test_seeds(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    settings = {"seeds": [1, 2, 3], "cocotb": {"shards": 2}}
+    flow = runner.run(FakeSim, design, flow_settings=settings)
+    assert flow is not None and not flow.succeeded
+    assert flow.results["cocotb.tests"] == 6 and flow.results["cocotb.failures"] == 1
+    seeds = flow.results["cocotb.seeds"]
+    assert [(s["seed"], s["success"], s["tests"]) for s in seeds] == [
+        (1, True, 2),
+        (2, False, 2),
+        (3, True, 2),
+    ]
+    assert seeds[0]["ratio_time"] == 20.0 / 2.6
+    assert len(flow.results["cocotb.shards"]) == 6
+    assert flow.results["cocotb.failing_seeds"] == [2]
+    with open(flow.run_path / FakeSim.failing_seeds_file) as f:
+        assert json.load(f) == [2]
+    assert {ts.random_seed for ts in flow.cocotb.results.test_suites} == {1, 2, 3}
+
+    flow = runner.run(FakeSim, design, flow_settings={"seeds": 2})
+    assert flow is not None and len(flow.results["cocotb.seeds"]) == 2
+
+    flow = runner.run(FakeSim, design, flow_settings={"seeds": [3, 1, 3]})
+    assert flow is not None and flow.succeeded
+    assert [s["seed"] for s in flow.results["cocotb.seeds"]] == [3, 1]
+    assert flow.results["cocotb.tests"] == 4
+
+
 if __name__ == "__main__":
     test_cocotb_version()
     test_cocotb_parse_xml()
@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from xeda.cli import cli
+from xeda.flow import Flow
+from xeda.flow_runner import DefaultRunner, ResultsDB
+from xeda.flow_runner.compare import MetricRule, compare_runs, load_rules, load_runs
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+
+
+def add_run(xeda_run_dir: Path, name: str, tag: str, timestamp: str, **results):
+    run_path = xeda_run_dir / name
+    run_path.mkdir(parents=True)
+    results = dict(design="aes", flow="vivado_synth", success=True, timestamp=timestamp, **results)
+    with open(run_path / "results.json", "w") as f:
+        json.dump(results, f)
+    with open(run_path / "settings.json", "w") as f:
+        json.dump({"xeda_version": "0.6", "tag": tag}, f)
+    return run_path
+
+
+def test_metric_rule():
+    fmax = MetricRule("Fmax", higher_is_better=True, rel=0.02)
+    assert fmax.is_regression(100.0, 97.0) and not fmax.is_regression(100.0, 99.0)
+    assert fmax.is_improvement(100.0, 103.0)
+    runtime = MetricRule("runtime", rel=0.1, abs=5.0)
+    assert not runtime.is_regression(10.0, 14.0)  # within the absolute threshold
+    assert runtime.is_regression(100.0, 112.0)
+    rules = load_rules(thresholds={"Fmax": 0.05, "latency": 0.0})
+    assert rules[0].pattern == "latency"
+    assert next(r for r in rules if r.pattern == "Fmax").rel == 0.05
+
+
+def test_compare_runs(tmp_path: Path):
+    xeda_run_dir = tmp_path / "xeda_run"
+    base = add_run(
+        xeda_run_dir, "base", "v1", "2024-01-01", Fmax=200.0, lut=1000, runtime=100.0, wns=0.1
+    )
+    add_run(
+        xeda_run_dir, "cand_old", "v2", "2024-01-02", Fmax=100.0, lut=2000, runtime=100.0, wns=0.1
+    )
+    cand = add_run(
+        xeda_run_dir, "cand", "v2", "2024-01-03", Fmax=180.0, lut=900, runtime=105.0, wns=0.1
+    )
+    diffs = compare_runs(load_runs(base), load_runs(cand), load_rules())
+    status = {d.metric: d.status for d in diffs}
+    assert status == {
+        "Fmax": "regressed",
+        "lut": "improved",
+        "runtime": "unchanged",
+        "wns": "unchanged",
+    }
+    assert next(d for d in diffs if d.metric == "Fmax").change == -0.1
+
+    # select the latest run of each tag from the results database
+    ResultsDB.of_run_dir(xeda_run_dir).index(xeda_run_dir)
+    candidate = load_runs("tag:v2", xeda_run_dir)
+    assert candidate[("aes", "vivado_synth")]["Fmax"] == 180.0
+    assert compare_runs(load_runs("tag:v1", xeda_run_dir), candidate) == diffs
+
+    failed = add_run(tmp_path, "failed", "v3", "2024-01-04", Fmax=250.0)
+    with open(failed / "results.json") as f:
+        results = json.load(f)
+    with open(failed / "results.json", "w") as f:
+        json.dump(dict(results, success=False), f)
+    diffs = compare_runs(load_runs(base), load_runs(failed))
+    assert [(d.metric, d.status) for d in diffs] == [("success", "regressed")]
+
+
+def test_compare_cli(tmp_path: Path):
+    base = add_run(tmp_path, "base", "v1", "2024-01-01", Fmax=200.0, lut=1000)
+    cand = add_run(tmp_path, "cand", "v2", "2024-01-02", Fmax=199.0, lut=1100)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["compare", str(base), str(cand), "--json"])
+    assert result.exit_code == 1
+    diffs = json.loads(result.output)
+    assert [(d["metric"], d["status"]) for d in diffs] == [("lut", "regressed")]
+    result = runner.invoke(cli, ["compare", str(base), str(cand), "--threshold", "lut=20%"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["compare", str(base), str(cand), "--threshold", "lut"])
+    assert result.exit_code == 2
+
+
+class FmaxFlow(Flow):
+    fmax = 100.0  # e.g., depends on the version of the tool
+
+    def run(self) -> None:
+        self.results["Fmax"] = self.fmax
+
+
+def test_tagged_runs(tmp_path: Path, monkeypatch):
+    xeda_run_dir = tmp_path / "xeda_run"
+    design = EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml"
+    run_paths = []
+    for tag, fmax in (("old", 200.0), ("new", 150.0)):
+        monkeypatch.setattr(FmaxFlow, "fmax", fmax)
+        runner = DefaultRunner(xeda_run_dir, run_tag=tag, display_results=False)
+        flow = runner.run(FmaxFlow, design)
+        assert flow is not None and flow.succeeded
+        run_paths.append(flow.run_path)
+    assert run_paths[0] != run_paths[1] and all((p / "results.json").exists() for p in run_paths)
+    old, new = load_runs("tag:old", xeda_run_dir), load_runs("tag:new", xeda_run_dir)
+    assert [r["Fmax"] for r in (*old.values(), *new.values())] == [200.0, 150.0]
+    args = ["compare", "tag:old", "tag:new", "--xeda-run-dir", str(xeda_run_dir), "--json"]
+    result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 1
+    assert [(d["metric"], d["status"]) for d in json.loads(result.output)] == [
+        ("Fmax", "regressed")
+    ]
@@ -0,0 +1,108 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from xeda.flow_runner import ResultsDB
+from xeda.flow_runner.export import (
+    export_records,
+    flatten,
+    infer_schema,
+    iter_dse_records,
+    iter_run_records,
+    run_record,
+)
+
+
+def make_runs(xeda_run_dir: Path, n: int):
+    for i in range(n):
+        run_path = xeda_run_dir / f"design{i % 2}" / f"vivado_synth_{i}"
+        run_path.mkdir(parents=True)
+        results = {
+            "design": f"design{i % 2}",
+            "flow": "vivado_synth",
+            "success": i != 3,
+            "timestamp": f"2024-01-{i + 1:02d}",
+            "Fmax": 100 + i if i % 2 else 100.5 + i,
+            "utilization": {"lut": 1000 + i, "ff": {"total": 2 * i}},
+            "tools": [{"executable": "/opt/Xilinx/bin/vivado", "version": f"2023.{i % 2 + 1}"}],
+            "artifacts": {"bitstream": "top.bit"},
+        }
+        if i == 2:
+            results["cocotb"] = {"failed": 0, "tests": ["t1", "t2"]}
+        with open(run_path / "results.json", "w") as f:
+            json.dump(results, f)
+        with open(run_path / "settings.json", "w") as f:
+            json.dump({"xeda_version": "0.6", "flow_settings": {"clock_period": 5.0 - i}}, f)
+
+
+def test_flatten_and_schema():
+    assert flatten({"a": {"b": 1, "c": {"d": [1, 2]}}, "e": None}) == {
+        "a.b": 1,
+        "a.c.d": "[1, 2]",
+        "e": None,
+    }
+    record = run_record(
+        {"design": "d", "flow": "f", "tools": [{"executable": "/bin/ghdl", "version": "4.1"}]},
+        {"xeda_version": "0.6", "flow_settings": {"stop_time": "1us"}},
+    )
+    assert record["tools.ghdl"] == "4.1" and record["settings.stop_time"] == "1us"
+    schema = infer_schema(
+        [
+            {"i": 1, "f": 1, "s": 1, "b": True, "n": None},
+            {"i": None, "f": 1.5, "s": "x", "b": False, "n": None},
+        ]
+    )
+    assert schema == {"i": "int", "f": "float", "s": "string", "b": "bool", "n": "string"}
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_export_csv(tmp_path: Path, indexed: bool):
+    xeda_run_dir = tmp_path / "xeda_run"
+    make_runs(xeda_run_dir, 5)
+    if indexed:
+        ResultsDB.of_run_dir(xeda_run_dir).index(xeda_run_dir)
+    out = tmp_path / "runs.csv"
+    n = export_records(lambda: iter_run_records(xeda_run_dir, flow="vivado*"), out, chunk_size=2)
+    assert n == 5
+    with open(out) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    rows.sort(key=lambda r: r["timestamp"])
+    assert rows[2]["utilization.ff.total"] == "4"
+    assert rows[2]["cocotb.tests"] == '["t1", "t2"]' and rows[0]["cocotb.tests"] == ""
+    assert [r["tools.vivado"] for r in rows[:2]] == ["2023.1", "2023.2"]
+    assert rows[1]["Fmax"] == "101.0"  # int and float values
+    assert rows[4]["settings.clock_period"] == "1.0"
+    assert "artifacts.bitstream" not in rows[0]
+    assert len(list(iter_run_records(xeda_run_dir, design="design1"))) == 2
+
+
+def test_export_dse_results(tmp_path: Path):
+    dse_json = tmp_path / "fmax_aes_vivado_synth_2024.json"
+    with open(dse_json, "w") as f:
+        json.dump(
+            {
+                "best": {"results": {"design": "aes", "flow": "vivado_synth", "Fmax": 300.0}},
+                "successful_results": [{"Fmax": 250.0, "lut": 900}, {"Fmax": 300.0, "lut": 950}],
+                "design": {"name": "aes"},
+            },
+            f,
+        )
+    records = list(iter_dse_records(dse_json))
+    assert [r["Fmax"] for r in records] == [250.0, 300.0]
+    assert all(r["design"] == "aes" and r["flow"] == "vivado_synth" for r in records)
+
+
+def test_export_parquet(tmp_path: Path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    xeda_run_dir = tmp_path / "xeda_run"
+    make_runs(xeda_run_dir, 5)
+    out = tmp_path / "runs.parquet"
+    assert export_records(lambda: iter_run_records(xeda_run_dir), out, chunk_size=2) == 5
+    table = pq.read_table(out)
+    assert table.num_rows == 5
+    assert str(table.schema.field("Fmax").type) == "double"
+    assert str(table.schema.field("utilization.lut").type) == "int64"
+    assert str(table.schema.field("success").type) == "bool"
@@ -1,8 +1,16 @@
+import os
+import sys
 import tempfile
 from pathlib import Path
 
+from click.testing import CliRunner
+
+from xeda.cli import cli
+from xeda.design import Design, DesignSource
 from xeda.flow_runner import DefaultRunner
 from xeda.flows import GhdlSim
+from xeda.flows.ghdl.backends import BackendHistory, GhdlInstallation, parse_time_ns
+from xeda.flows.ghdl.library_cache import LibraryCache
 
 TESTS_DIR = Path(__file__).parent.absolute()
 EXAMPLES_DIR = TESTS_DIR.parent / "examples"
@@ -32,5 +40,125 @@ def test_yosys_synth_py() -> None:
             assert results_json.exists()
 
 
+def test_library_cache(tmp_path: Path) -> None:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    for name in ("pkg", "a", "top"):
+        (src_dir / f"{name}.vhd").write_text(f"-- {name}\n")
+
+    def sources():
+        return [DesignSource(src_dir / f"{name}.vhd") for name in ("pkg", "a", "top")]
+
+    key = dict(ghdl={"version": "4.1.0"}, flags=["--std=08"], sources=["pkg", "a", "top"])
+    cache = LibraryCache(key, root=tmp_path / "cache")
+    work = tmp_path / "work"
+    work.mkdir()
+    assert cache.restore(work, sources()) == 0
+    (work / "work-obj08.cf").write_text("v 4")
+    (work / "pkg.o").write_text("o")
+    (work / "e~top.o").write_text("elaborated")
+    (work / "other.txt").write_text("x")
+    cache.save(work, sources())
+
+    work2 = tmp_path / "work2"
+    work2.mkdir()
+    assert cache.restore(work2, sources()) == 3
+    assert sorted(p.name for p in work2.iterdir()) == ["pkg.o", "work-obj08.cf"]
+    (src_dir / "a.vhd").write_text("-- modified\n")
+    assert LibraryCache(key, root=tmp_path / "cache").restore(work2, sources()) == 1
+    key["flags"] = ["--std=93"]
+    assert LibraryCache(key, root=tmp_path / "cache").restore(work2, sources()) == 0
+
+
+def test_backend_history(tmp_path: Path) -> None:
+    assert parse_time_ns("100us") == 1e5 and parse_time_ns("2 ms") == 2e6
+    assert parse_time_ns(50) == 50.0 and parse_time_ns("5 parsecs") is None
+    history = BackendHistory(dict(design="adder"), root=tmp_path)
+    mcode = BackendHistory.candidate(GhdlInstallation(), ["-O2"])
+    llvm = BackendHistory.candidate(GhdlInstallation(docker="ghdl/ghdl:llvm"), ["-O3"])
+    assert llvm == "docker:ghdl/ghdl:llvm -O3"
+    history.record(mcode, "mcode", elaboration=1.0, simulation=10.0, sim_time_ns=1000.0)
+    history.record(llvm, "llvm", elaboration=5.0, simulation=2.0, sim_time_ns=1000.0)
+    history.record(llvm, "llvm", elaboration=7.0, simulation=2.0, sim_time_ns=1000.0)
+    history = BackendHistory(dict(design="adder"), root=tmp_path)
+    assert history.expected_time(llvm, None) == 8.0
+    assert history.best([mcode, llvm], None) == llvm
+    assert history.best([mcode, llvm], 10.0) == mcode  # short simulation
+    assert history.best([mcode, "ghdl -O0"], None) == mcode
+    assert history.best(["ghdl -O0"], None) is None
+
+
+# logs the executable and command to $GHDL_LOG
+FAKE_GHDL = """
+import os, sys
+args = sys.argv[1:]
+backend = "llvm" if "llvm" in sys.argv[0] else "mcode"
+if args == ["--version"]:
+    print(f"GHDL 4.1.0 (tarball) [Dunoon edition]\\n Compiled with GNAT\\n {backend} code generator")
+    sys.exit(0)
+if args and args[0] == "analyze":
+    open("work-obj08.cf", "w").close()
+with open(os.environ["GHDL_LOG"], "a") as f:
+    print(backend, *args[:1], *(a for a in args if a.startswith("-O")), file=f)
+"""
+
+
+def test_auto_backend(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("ghdl", "ghdl-llvm"):
+        ghdl = bin_dir / name
+        ghdl.write_text(f"#!{sys.executable}\n{FAKE_GHDL}")
+        ghdl.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    log_file = tmp_path / "ghdl.log"
+    monkeypatch.setenv("GHDL_LOG", str(log_file))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "adder.vhd").write_text("entity adder is end;")
+    (src / "tb.vhd").write_text("entity tb is end;")
+    design_file = src / "adder.toml"
+    design_file.write_text(
+        'name = "adder"\n[rtl]\nsources = ["adder.vhd"]\ntop = "adder"\n'
+        '[tb]\nsources = ["tb.vhd"]\ntop = "tb"\n'
+    )
+    args = ["ghdl-benchmark", str(design_file), "--xeda-run-dir", str(tmp_path / "xeda_run")]
+    args += ["--installation", "ghdl", "--installation", "ghdl-llvm", "--opt-level", "-O3"]
+    result = CliRunner().invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    assert "mcode" in result.output and "llvm" in result.output
+    history = BackendHistory.of_design(Design.from_toml(design_file))
+    assert sorted(history.candidates) == ["ghdl -O3", "ghdl-llvm -O3"]
+    assert [history.candidates[c]["backend"] for c in sorted(history.candidates)] == [
+        "mcode",
+        "llvm",
+    ]
+    best = history.best(sorted(history.candidates), None)
+
+    log_file.unlink()
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    settings = dict(
+        installations=[dict(executable="ghdl-llvm")],
+        auto_backend=True,
+        auto_optimization_levels=["-O3"],
+    )
+    flow = runner.run(GhdlSim, design_file, flow_settings=settings)
+    assert flow is not None and flow.succeeded
+    assert flow.results["ghdl_backend"] == ("llvm" if best == "ghdl-llvm -O3" else "mcode")
+    assert "make -O3" in log_file.read_text()
+    history = BackendHistory.of_design(Design.from_toml(design_file))
+    assert len(history.candidates[best]["runs"]) == 2
+
+    # recording is opt-in without auto_backend
+    flow = runner.run(GhdlSim, design_file, flow_settings=dict(optimization_flags=["-O3"]))
+    assert flow is not None and flow.succeeded
+    assert BackendHistory.of_design(Design.from_toml(design_file)).candidates == history.candidates
+
+    # the history of a modified design starts over
+    (src / "adder.vhd").write_text("entity adder is end; -- modified")
+    assert not BackendHistory.of_design(Design.from_toml(design_file)).candidates
+
+
 if __name__ == "__main__":
     test_yosys_synth_py()
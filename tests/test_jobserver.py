@@ -0,0 +1,94 @@
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from xeda.jobserver import Jobserver, current_tokens
+
+
+def test_jobserver_acquire_release():
+    js = Jobserver(4)
+    try:
+        t1 = js.acquire(3)
+        assert t1.count == 3
+        t2 = js.acquire(3)
+        assert t2.count == 1  # only one token left
+        with pytest.raises(TimeoutError):
+            js.acquire(1, timeout=0.01)
+        t1.release()
+        assert t1.count == 0
+        assert js.available() == 3
+        t2.release()
+        assert js.available() == 4
+    finally:
+        js.close()
+
+
+def test_jobserver_replenish():
+    js = Jobserver(2)
+    try:
+        js.acquire(2).count = 0  # "lose" the tokens
+        assert js.available() == 0
+        js.replenish()
+        assert js.available() == 2
+    finally:
+        js.close()
+
+
+def test_jobserver_pickle():
+    js = Jobserver(2)
+    try:
+        js2 = pickle.loads(pickle.dumps(js))
+        with js2.acquire(2) as tokens:
+            assert tokens.count == 2
+            assert js.available() == 0
+        assert js.available() == 2
+    finally:
+        js.close()
+
+
+def test_current_tokens():
+    js = Jobserver(1)
+    try:
+        assert current_tokens() is None
+        with js.acquire() as tokens, tokens.activate():
+            assert current_tokens() is tokens
+            env, fds = tokens.make_env()
+            assert "--jobserver-auth=" in env["MAKEFLAGS"]
+            assert len(fds) == 2
+        assert current_tokens() is None
+    finally:
+        js.close()
+
+
+@pytest.mark.skipif(shutil.which("make") is None, reason="requires GNU make")
+def test_jobserver_make_client():
+    """make should run its jobs using the tokens of the jobserver"""
+    js = Jobserver(2)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            makefile = Path(tmpdir) / "Makefile"
+            targets = [f"t{i}" for i in range(4)]
+            with open(makefile, "w") as f:
+                f.write(f"all: {' '.join(targets)}\n")
+                for t in targets:
+                    f.write(f"{t}:\n\t@{sys.executable} -c 'print(\"{t}\")'\n")
+            with js.acquire() as tokens:
+                env, fds = tokens.make_env()
+                out = subprocess.run(
+                    ["make", "-C", tmpdir],
+                    env={**os.environ, **env},
+                    pass_fds=fds,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+            assert all(t in out for t in targets)
+            assert js.available() == 2
+    finally:
+        js.close()
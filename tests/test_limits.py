@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from xeda import Design, Flow
+from xeda.flow_runner.dse.dse_runner import Dse, FlowOutcome, Optimizer
+from xeda.limits import ResourceLimits, parse_size
+from xeda.proc_utils import run_process
+from xeda.utils import ResourceLimitExceeded
+
+
+def test_parse_size():
+    assert parse_size(None) is None
+    assert parse_size(1000) == 1000
+    assert parse_size("512") == 512
+    assert parse_size("4k") == 4 * 1024
+    assert parse_size("16G") == 16 * 1024**3
+    assert parse_size("1.5 GiB") == 3 * 1024**3 // 2
+    assert parse_size("256MB") == 256 * 1024**2
+    with pytest.raises(ValueError):
+        parse_size("16 gallons")
+
+
+def test_limits_model():
+    limits = ResourceLimits(memory="2G")
+    assert limits.memory == 2 * 1024**3
+    assert limits.is_set
+    assert limits.docker_args() == [f"--memory={2 * 1024**3}"]
+    assert not ResourceLimits().is_set
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires POSIX rlimits")
+def test_open_files_limit():
+    script = "import resource; print(resource.getrlimit(resource.RLIMIT_NOFILE)[0])"
+    with ResourceLimits(open_files=64).activate() as violations:
+        out = run_process(sys.executable, ["-c", script], stdout=True)
+    assert out == "64"
+    assert not violations
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires POSIX rlimits")
+def test_cpu_time_limit():
+    with ResourceLimits(cpu_time=1).activate() as violations:
+        with pytest.raises(ResourceLimitExceeded) as e:
+            run_process(sys.executable, ["-c", "while True: pass"])
+    assert e.value.resource == "cpu_time"
+    assert len(violations) == 1
+    assert violations[0]["resource"] == "cpu_time"
+    assert violations[0]["confirmed"]
+
+
+class BusyFlow(Flow):
+    def run(self) -> None:
+        run_process(sys.executable, ["-c", "while True: pass"])
+
+
+class RepeatOptimizer(Optimizer):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.num_batches = 0
+        self.outcomes: List[FlowOutcome] = []
+
+    def next_batch(self) -> List[Dict[str, Any]]:
+        self.num_batches += 1
+        return [{"cpu_time_limit": 1}]
+
+    def process_outcome(self, outcome: FlowOutcome, idx: int) -> bool:
+        self.outcomes.append(outcome)
+        return False
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires POSIX rlimits")
+def test_dse_limits_single_worker(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    design = Path(__file__).parent.parent / "examples" / "vhdl" / "sqrt" / "sqrt.toml"
+    dse = Dse(
+        RepeatOptimizer,
+        xeda_run_dir=tmp_path / "xeda_run",
+        max_workers=1,
+        max_failed_iters=1,
+        max_runtime_minutes=1,
+        variations={},
+        jobs=0,
+    )
+    dse.run_flow(BusyFlow, Design.from_toml(design))
+    optimizer = dse.optimizer
+    assert isinstance(optimizer, RepeatOptimizer)
+    # the setting is not retried with a single worker and the failures are counted
+    assert [o.results.get("resource_limit_exceeded") is not None for o in optimizer.outcomes] == [
+        True
+    ]
+    assert optimizer.num_batches == 2
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from xeda.flows.nextpnr import NextpnrLogParser, nextpnr_max_frequency, parse_nextpnr_logfile
+
+RESOURCES_DIR = Path(__file__).parent.absolute() / "resources"
+
+
+def test_parse_nextpnr_logfile():
+    data = parse_nextpnr_logfile(RESOURCES_DIR / "nextpnr" / "nextpnr.log")
+    util = data["_device_utilization"]
+    assert util["SLICE_LUTX"] == {"used": 412, "available": 63400, "percentage": 0.0}
+    assert util["DSP48E1"]["used"] == 4
+    assert [c["max_freq"] for c in data["_clocks"]] == [185.29, 152.44]
+    assert nextpnr_max_frequency(data) == 185.29
+    (crit_path,) = data["_critical_path_reports"]
+    assert crit_path["clock_name"] == "clk$BUFG_O"
+    assert [p["net"] for p in crit_path["paths"]] == ["core.acc[3]", "core.sum_next[7]"]
+    assert crit_path["logic_delay"] == 0.7
+    assert crit_path["routing_delay"] == 2.1
+
+
+def test_nextpnr_log_parser_unterminated_section():
+    for header in ["Info: Device utilisation:", "Info: DEVICE UTILIZATION:"]:
+        parser = NextpnrLogParser()
+        for line in [
+            header,
+            "Info: 	  SLICE_LUTX:   12/63400     0%",
+        ]:
+            parser.feed(line)
+        assert parser.finish()["_device_utilization"]["SLICE_LUTX"]["used"] == 12
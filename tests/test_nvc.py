@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
+import os
+import sys
 import tempfile
 from pathlib import Path
 
+from xeda import Design
 from xeda.flow_runner import DefaultRunner
 from xeda.flows import Nvc
+from xeda.flows.nvc.library_cache import LibraryCache
 
 TESTS_DIR = Path(__file__).parent.absolute()
 EXAMPLES_DIR = TESTS_DIR.parent / "examples"
@@ -31,5 +35,75 @@ def test_yosys_synth_py() -> None:
             assert results_json.exists()
 
 
+# logs the files analyzed by each command to $NVC_LOG
+FAKE_NVC = """
+import os, sys
+args = sys.argv[1:]
+if args == ["--version"]:
+    print("nvc 1.13.0")
+    sys.exit(0)
+if "-a" in args:
+    os.makedirs("work", exist_ok=True)
+    with open(os.environ["NVC_LOG"], "a") as f:
+        print(" ".join(os.path.basename(a) for a in args if a.endswith(".vhd")), file=f)
+"""
+
+
+def test_incremental_analysis(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    nvc = bin_dir / "nvc"
+    nvc.write_text(f"#!{sys.executable}\n{FAKE_NVC}")
+    nvc.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    log_file = tmp_path / "nvc.log"
+    monkeypatch.setenv("NVC_LOG", str(log_file))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "pkg.vhd").write_text("package pkg is end package;")
+    (src / "adder.vhd").write_text("use work.pkg.all; entity adder is end;")
+    (src / "mux.vhd").write_text("entity mux is end;")
+    (src / "tb.vhd").write_text("entity tb is end; architecture a of tb is begin end;")
+
+    def run(**settings) -> list:
+        design = Design(
+            name="adder",
+            rtl={"sources": ["pkg.vhd", "adder.vhd", "mux.vhd"], "top": "adder"},
+            tb={"sources": ["tb.vhd"], "top": "tb"},
+            design_root=src,
+        )
+        runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+        log_file.unlink(missing_ok=True)
+        flow = runner.run(Nvc, design, flow_settings=settings)
+        assert flow is not None and flow.succeeded
+        return log_file.read_text().splitlines() if log_file.exists() else []
+
+    assert run() == ["pkg.vhd adder.vhd mux.vhd tb.vhd"]
+    (entry,) = (tmp_path / "cache" / "nvc").iterdir()
+    saved = entry.stat().st_ino
+    assert run() == []
+    assert entry.stat().st_ino == saved  # nothing analyzed, nothing saved
+    (src / "pkg.vhd").write_text("package pkg is constant C : integer := 1; end package;")
+    assert run() == ["pkg.vhd adder.vhd"]
+    (src / "pkg.vhd").write_text("package pkg is end package;")
+    (src / "tb.vhd").write_text("entity tb is end; architecture b of tb is begin end;")
+    assert sorted(run(analysis_jobs=2)) == ["adder.vhd", "pkg.vhd", "tb.vhd"]
+
+
+def test_library_cache_timestamps(tmp_path: Path) -> None:
+    lib_dir = tmp_path / "work"
+    lib_dir.mkdir()
+    (lib_dir / "WORK.ADDER").write_text("unit")
+    os.utime(lib_dir / "WORK.ADDER", (1000, 1000))
+    cache = LibraryCache(dict(design="adder"), root=tmp_path / "cache")
+    cache.save(lib_dir, {"adder.vhd": "hash"})
+    source = tmp_path / "adder.vhd"
+    source.write_text("entity adder is end;")  # unchanged content, but newer than the unit
+    restored = tmp_path / "restored" / "work"
+    assert cache.restore(restored) == {"adder.vhd": "hash"}
+    assert (restored / "WORK.ADDER").stat().st_mtime >= source.stat().st_mtime
+
+
 if __name__ == "__main__":
     test_yosys_synth_py()
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from xeda.proc_utils import EventLoopBridge, run_process, run_process_async
+from xeda.utils import NonZeroExitCode, WorkingDirectory
+
+
+def test_run_process_async_capture():
+    out = asyncio.run(run_process_async(sys.executable, ["-c", "print('hello')"], stdout=True))
+    assert out == "hello"
+
+
+def test_run_process_async_tagged(capsys):
+    asyncio.run(
+        run_process_async(sys.executable, ["-c", "print('a'); print('b')"], tag="design0:flow")
+    )
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == ["[design0:flow] a", "[design0:flow] b"]
+
+
+def test_run_process_async_nonzero_exit():
+    with pytest.raises(NonZeroExitCode) as e:
+        asyncio.run(run_process_async(sys.executable, ["-c", "import sys; sys.exit(3)"]))
+    assert e.value.exit_code == 3
+
+
+def test_bridged_threads_keep_their_cwd():
+    """concurrent bridged threads should each see (and run processes in) their own working directory"""
+
+    def worker(run_dir: Path):
+        cwds = []
+        with WorkingDirectory(run_dir):
+            for _ in range(3):
+                out = run_process(
+                    sys.executable, ["-c", "import os; print(os.getcwd())"], stdout=True
+                )
+                cwds.append((out, os.getcwd()))
+        return cwds
+
+    async def main(dirs):
+        loop = asyncio.get_running_loop()
+
+        async def launch(d):
+            bridge = EventLoopBridge(loop, tag=d.name)
+
+            def target():
+                with bridge.attached():
+                    return worker(d)
+
+            return await asyncio.to_thread(target)
+
+        return await asyncio.gather(*(launch(d) for d in dirs))
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirs = [Path(tmpdir).resolve() / f"run{i}" for i in range(4)]
+        for d in dirs:
+            d.mkdir()
+        results = asyncio.run(main(dirs))
+        assert os.getcwd() == cwd
+        for d, cwds in zip(dirs, results):
+            for proc_cwd, thread_cwd in cwds:
+                assert proc_cwd == str(d)
+                assert thread_cwd == str(d)
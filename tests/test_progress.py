@@ -0,0 +1,77 @@
+import json
+import sys
+
+from xeda.proc_utils import run_process
+from xeda.progress import ProgressMonitor, RuntimeHistory, active_monitor
+
+STAGES = [
+    ("synth", r"^Command: synth_design\b"),
+    ("place", r"^Command: place_design\b"),
+    ("route", r"^Command: route_design\b"),
+]
+
+
+def test_stage_events(tmp_path, monkeypatch):
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    events = []
+    events_file = tmp_path / "progress.jsonl"
+    monitor = ProgressMonitor(
+        "vivado_synth",
+        "top",
+        STAGES,
+        callbacks=[events.append],
+        events_file=events_file,
+        history=RuntimeHistory("vivado_synth", "top"),
+    )
+    with monitor.activate():
+        assert active_monitor() is monitor
+        for line in [
+            "Command: synth_design -top top",
+            "Command: opt_design",
+            "Command: synth_design -top top",
+            "Command: route_design",
+            "Command: place_design",  # stages only advance
+        ]:
+            monitor.feed(line)
+    assert active_monitor() is None
+    monitor.finish(success=True)
+
+    assert [e["event"] for e in events] == ["start", "stage", "stage", "end"]
+    assert [e.get("stage") for e in events[1:3]] == ["synth", "route"]
+    assert events[2]["stage_index"] == 2 and events[2]["num_stages"] == 3
+    assert all(e["eta"] is None for e in events[:-1])  # no history
+    assert events[-1]["eta"] == 0.0
+    assert events[-1]["success"]
+    with open(events_file) as f:
+        assert [json.loads(line) for line in f] == events
+
+    history = RuntimeHistory("vivado_synth", "top")
+    assert len(history.runs) == 1
+    assert set(history.runs[0]["stages"]) == {"synth", "route"}
+
+
+def test_eta_from_history(tmp_path):
+    history = RuntimeHistory("openroad", "top", root=tmp_path)
+    history.record(100.0, {"floorplan": 10.0, "cts": 60.0})
+    history.record(140.0, {"floorplan": 10.0, "cts": 80.0})
+    history = RuntimeHistory("openroad", "top", root=tmp_path)
+    assert history.total == 120.0
+    assert history.remaining(None, 20.0) == 100.0
+    # started cts at the average time: as much as the average remaining time
+    assert history.remaining("cts", 70.0) == 50.0
+    # twice as slow as the previous runs
+    assert history.remaining("cts", 140.0) == 100.0
+    assert history.remaining("unknown", 130.0) == 0.0
+
+
+def test_run_process_feeds_monitor(tmp_path):
+    events = []
+    monitor = ProgressMonitor("test", "top", STAGES, callbacks=[events.append])
+    script = "print('Command: synth_design'); print('some output'); print('Command: place_design')"
+    with monitor.activate():
+        run_process(sys.executable, ["-c", script], stdout=tmp_path / "stdout.log")
+        # captured output is not monitored
+        out = run_process(sys.executable, ["-c", "print('Command: route_design')"], stdout=True)
+    assert out == "Command: route_design"
+    assert [e["stage"] for e in events if e["event"] == "stage"] == ["synth", "place"]
+    assert (tmp_path / "stdout.log").read_text().splitlines()[1] == "some output"
@@ -0,0 +1,92 @@
+import json
+import os
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from xeda import Design
+from xeda.cli import cli
+from xeda.flow import FPGA
+from xeda.flow_runner import DefaultRunner, ResultsDB
+from xeda.flows import Quartus
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+def add_run(db: ResultsDB, run_path: Path, **results):
+    run_path.mkdir(parents=True)
+    results = {"flow": "vivado_synth", "success": True, **results}
+    with open(run_path / "results.json", "w") as f:
+        json.dump(results, f)
+    db.upsert(run_path, results, dict(xeda_version="0.1"))
+
+
+def test_query(tmp_path: Path):
+    db = ResultsDB.of_run_dir(tmp_path)
+    vivado = {"executable": "vivado", "version": "2023.2"}
+    add_run(db, tmp_path / "a", design="aes", Fmax=250.0, timestamp="1", tools=[vivado])
+    add_run(db, tmp_path / "b", design="aes", Fmax=310.5, timestamp="2", _private=1)
+    add_run(db, tmp_path / "c", design="sha3", Fmax=None, timestamp="3", lut=1000)
+    add_run(db, tmp_path / "d", design="aes_fast", success=False, timestamp="4", tools=[vivado])
+
+    assert [r["design"] for r in db.query()] == ["aes_fast", "sha3", "aes", "aes"]
+    assert [r["run_path"] for r in db.query(design="aes", order_by="Fmax")] == [
+        str(tmp_path / "b"),
+        str(tmp_path / "a"),
+    ]
+    best = db.query(order_by="Fmax", descending=False, limit=1)
+    assert len(best) == 1 and best[0]["results"]["Fmax"] == 250.0
+    assert [r["design"] for r in db.query(design="aes*", success=False)] == ["aes_fast"]
+    assert len(db.query(tool="vivado", tool_version="2023.*")) == 2
+    assert not db.query(tool="vivado", tool_version="2022.*")
+    assert not db.query(order_by="_private")
+
+    record = db.get(tmp_path / "c", up_to_date=True)
+    assert record is not None and record["settings"] == {"xeda_version": "0.1"}
+    (tmp_path / "c" / "results.json").write_text("{}")
+    os.utime(tmp_path / "c" / "results.json", (0, 0))
+    assert db.get(tmp_path / "c", up_to_date=True) is None
+    db.remove(tmp_path / "d")
+    assert db.get(tmp_path / "d") is None
+
+    # re-index: "c" has no flow in its results.json, "d" is found again
+    assert db.index(tmp_path) == 3
+    assert {r["design"] for r in db.query()} == {"aes", "aes_fast"}
+
+
+def test_runner_indexes_results(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("PATH", str(TESTS_DIR / "fake_tools") + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(fpga=FPGA("10CL016YU256C6G"), clock_period=6, dockerized=False)
+    xeda_run_dir = tmp_path / "xeda_run"
+    runner = DefaultRunner(xeda_run_dir, display_results=False)
+    flow = runner.run(Quartus, design, flow_settings=settings)
+    assert flow is not None and flow.succeeded
+
+    db = ResultsDB.of_run_dir(xeda_run_dir)
+    record = db.get(flow.run_path, up_to_date=True)
+    assert record is not None
+    assert record["design"] == design.name and record["flow"] == "quartus" and record["success"]
+    assert record["settings"]["flowrun_hash"] == flow.flow_hash
+    assert [r["run_path"] for r in db.query(design="sqrt", flow="quartus")] == [str(flow.run_path)]
+
+    runner = DefaultRunner(xeda_run_dir, display_results=False, skip_if_previous_run_exists=True)
+    flow2 = runner.run(Quartus, design, flow_settings=settings)
+    assert flow2 is not None and flow2.succeeded
+    assert flow2.results.timestamp == flow.results.timestamp
+
+    result = CliRunner().invoke(
+        cli, ["results", "query", "--xeda-run-dir", str(xeda_run_dir), "--flow", "quart*", "--json"]
+    )
+    assert result.exit_code == 0, result.output
+    assert [r["run_path"] for r in json.loads(result.output)] == [str(flow.run_path)]
+
+    runner = DefaultRunner(xeda_run_dir, display_results=False, run_tag="v2")
+    tagged = runner.run(Quartus, design, flow_settings=settings)
+    assert tagged is not None and tagged.succeeded
+    args = ["results", "query", "--xeda-run-dir", str(xeda_run_dir), "--json"]
+    result = CliRunner().invoke(cli, [*args, "--tag", "v2"])
+    assert result.exit_code == 0, result.output
+    assert [r["run_path"] for r in json.loads(result.output)] == [str(tagged.run_path)]
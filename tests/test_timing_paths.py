@@ -0,0 +1,61 @@
+import math
+from pathlib import Path
+
+import pytest
+
+from xeda.timing_paths import TimingPaths, parse_dc_timing_paths, parse_vivado_timing_paths
+
+RESOURCES_DIR = Path(__file__).parent.absolute() / "resources" / "timing_paths"
+
+
+def test_vivado_timing_paths():
+    paths = parse_vivado_timing_paths(RESOURCES_DIR / "vivado_timing.rpt")
+    assert len(paths) == 3
+    assert list(paths["delay_type"]) == ["max", "max", "min"]
+    assert paths.row(0) == dict(
+        slack=-0.412,
+        requirement=5.0,
+        data_path_delay=5.327,
+        logic_delay=2.104,
+        route_delay=3.223,
+        logic_levels=6,
+        startpoint="u_core/acc_reg[3]/C",
+        endpoint="u_core/sum_reg[7]/D",
+        clock="clock",
+        path_group="clock",
+        delay_type="max",
+    )
+    worst = paths.worst_endpoints(n=5)
+    # only the worst path of each endpoint
+    assert [w["slack"] for w in worst["clock"]] == [-0.412]
+    edges, counts = paths.slack_histogram(bins=4)
+    assert len(edges) == 5 and sum(counts) == 2
+
+
+def test_dc_timing_paths():
+    paths = parse_dc_timing_paths(RESOURCES_DIR / "dc_timing.max.rpt")
+    assert len(paths) == 2
+    reg2reg = paths.row(0)
+    assert reg2reg["startpoint"] == "u_core/a_reg[0]"
+    assert reg2reg["endpoint"] == "u_core/b_reg[1]"
+    assert reg2reg["clock"] == "clk"
+    assert reg2reg["slack"] == 0.813
+    assert reg2reg["requirement"] == 1.0
+    assert reg2reg["logic_levels"] == 2
+    assert reg2reg["route_delay"] == pytest.approx(0.01)
+    assert reg2reg["data_path_delay"] == pytest.approx(0.147)
+    io = paths.row(1)
+    assert io["startpoint"] == "in_a[3]" and io["endpoint"] == "out_y"
+    assert io["slack"] == -0.2 and io["logic_levels"] == 1
+
+
+def test_timing_paths_save_load(tmp_path: Path):
+    paths = parse_vivado_timing_paths(RESOURCES_DIR / "vivado_timing.rpt")
+    paths.append("a", "b", "clk2", "clk2", "max", math.inf)
+    loaded = TimingPaths.load(paths.save(tmp_path / "timing_paths.npz"))
+    assert len(loaded) == len(paths)
+    for i in range(len(paths)):
+        a, b = paths.row(i), loaded.row(i)
+        assert a.keys() == b.keys()
+        for k in a:
+            assert a[k] == b[k] or (math.isnan(a[k]) and math.isnan(b[k]))
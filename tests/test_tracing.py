@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from xeda import Design
+from xeda.flow import FPGA, Flow
+from xeda.flow_runner import DefaultRunner
+from xeda.flows import Quartus
+from xeda.tracing import PhaseTimer, active_tracer, span, start_tracing, stop_tracing
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+def in_thread():
+    with span("in thread"):
+        pass
+
+
+def test_spans(tmp_path):
+    with span("not recorded"):
+        pass
+    assert active_tracer() is None
+    tracer = start_tracing("test")
+    try:
+        assert start_tracing() is tracer
+        with span("outer", x=1, path=tmp_path):
+            with span("inner", "tool"):
+                pass
+        thread = threading.Thread(target=in_thread, name="worker")
+        thread.start()
+        thread.join()
+    finally:
+        assert stop_tracing() is tracer
+    assert active_tracer() is None
+    tracer.save(tmp_path / "trace.json")
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert set(spans) == {"outer", "inner", "in thread"}
+    outer, inner = spans["outer"], spans["inner"]
+    assert outer["args"] == {"x": 1, "path": str(tmp_path)}
+    assert inner["cat"] == "tool"
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert spans["in thread"]["tid"] != outer["tid"]
+    thread_names = {e["tid"]: e["args"]["name"] for e in events if e["name"] == "thread_name"}
+    assert thread_names[spans["in thread"]["tid"]] == "worker"
+    assert any(e["name"] == "process_name" and e["args"]["name"] == "test" for e in events)
+
+
+def test_flow_trace(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(TESTS_DIR / "fake_tools") + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(fpga=FPGA("10CL016YU256C6G"), clock_period=6, dockerized=False)
+    trace = tmp_path / "trace.json"
+    runner = DefaultRunner(tmp_path / "xeda_run", profile_trace=trace, display_results=False)
+    flow = runner.run(Quartus, design, flow_settings=settings)
+    assert flow is not None and flow.succeeded
+    assert active_tracer() is None
+    with open(trace) as f:
+        events = json.load(f)["traceEvents"]
+    names = {e["name"] for e in events if e["ph"] == "X"}
+    assert {"quartus", "hash", "init", "run", "parse_reports", "dump_results"} <= names
+    assert "copy_from_template" in names
+    tools = [e for e in events if e.get("cat") == "tool"]
+    assert tools and all(e["name"] == "quartus_sh" for e in tools)
+    assert all(e["pid"] == os.getpid() for e in events)
+
+
+class LeafFlow(Flow):
+    def run(self) -> None:
+        pass
+
+
+class ParentFlow(Flow):
+    def init(self) -> None:
+        self.add_dependency(LeafFlow, LeafFlow.Settings())
+
+    def run(self) -> None:
+        pass
+
+
+class TwoLeavesFlow(Flow):
+    def init(self) -> None:
+        self.add_dependency(LeafFlow, LeafFlow.Settings())
+        self.add_dependency(LeafFlow, LeafFlow.Settings(verbose=1))
+
+    def run(self) -> None:
+        pass
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.phase("a"):
+        pass
+    timer.add("b", 0.5)
+    timer.add("a", 1.0)
+    assert list(timer.phases) == ["a", "b"]
+    assert 1.0 <= timer.phases["a"] < 1.5 and timer.phases["b"] == 0.5
+
+
+def test_flow_timing(tmp_path):
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    flow = runner.run(ParentFlow, EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    assert flow is not None and flow.succeeded
+    timing = flow.results.timing
+    assert list(timing) == [
+        "load_design",
+        "validation",
+        "hash",
+        "cache_lookup",
+        "setup",
+        "init",
+        "dependencies",
+        "run",
+        "parse_reports",
+        "dump_results",
+        "index_results",
+        "total",
+    ]
+    deps = timing["dependencies"]
+    assert set(deps) == {"total", "leaf_flow"}
+    assert "load_design" not in deps["leaf_flow"] and "run" in deps["leaf_flow"]
+    assert deps["leaf_flow"]["total"] <= deps["total"]
+    assert (
+        sum(v for k, v in timing.items() if k not in ("total", "dependencies")) + deps["total"]
+        <= timing["total"] + timing["load_design"]
+    )
+    with open(flow.run_path / "results.json") as f:
+        assert "timing" in json.load(f)
+
+    flow = runner.run(TwoLeavesFlow, EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    assert flow is not None and flow.succeeded
+    assert set(flow.results.timing["dependencies"]) == {"total", "leaf_flow", "leaf_flow#2"}
@@ -0,0 +1,98 @@
+import os
+from pathlib import Path
+
+from xeda.utils import (
+    CacheEntry,
+    compile_pattern,
+    load_cache_file,
+    parse_patterns,
+    parse_patterns_in_file,
+    parse_step_metrics,
+    save_cache_file,
+)
+
+REPORT = """\
+Slack (MET) :   1.250ns
+Data Path Delay:   2.000ns
+Slack (MET) :   0.500ns
+Data Path Delay:   3.125ns
+Timing constraints are met.
+"""
+
+
+def test_parse_patterns_in_file(tmp_path: Path):
+    rpt = tmp_path / "timing.rpt"
+    rpt.write_text(REPORT)
+    slack = r"Slack \(MET\)\s*:\s*(?P<slack>\S+)ns"
+    delay = r"Data Path Delay:\s*(?P<delay>\S+)ns"
+    assert parse_patterns_in_file(rpt, slack, delay) == {"slack": 1.25, "delay": 2.0}
+    assert parse_patterns_in_file(rpt, slack, delay, slack, delay, sequential=True) == {
+        "slack": 0.5,
+        "delay": 3.125,
+    }
+    # same results as parsing the content as str
+    assert parse_patterns(REPORT, slack, slack, sequential=True) == {"slack": 0.5}
+    assert parse_patterns_in_file(rpt, slack, r"(?P<missing>not there)", required=True) is None
+    assert compile_pattern(slack, 0) is compile_pattern(slack, 0)
+
+
+def test_parse_patterns_in_empty_file(tmp_path: Path):
+    rpt = tmp_path / "empty.rpt"
+    rpt.touch()
+    assert parse_patterns_in_file(rpt, r"(?P<x>\d+)") == {}
+
+
+OPENROAD_STEP_METRICS = """\
+{"step": "floorplan", "start": 1000, "end": 3500, "elapsed": 2.5, "cpu_time": 2.41, "peak_memory": 210.5}
+{"step": "global_place", "start": 3500, "end": 13500, "elapsed": 10.0, "cpu_time": 38.2, "peak_memory": 402.0}
+not json
+{"step": "global_place", "start": 13500, "end": 14500, "elapsed": 1.0, "cpu_time": null, "peak_memory": null}
+"""
+
+
+def test_parse_step_metrics(tmp_path: Path):
+    metrics_file = tmp_path / "step_metrics.jsonl"
+    assert parse_step_metrics(metrics_file) == {}
+    metrics_file.write_text(OPENROAD_STEP_METRICS)
+    steps = parse_step_metrics(metrics_file)
+    assert list(steps) == ["floorplan", "global_place", "global_place_2"]
+    assert steps["global_place"] == {
+        "start": 3500,
+        "end": 13500,
+        "elapsed": 10.0,
+        "cpu_time": 38.2,
+        "peak_memory": 402.0,
+    }
+    assert steps["global_place_2"]["cpu_time"] is None
+    assert all("wns_delta" not in s for s in steps.values())
+
+
+def test_cache_entry(tmp_path: Path):
+    entries = [CacheEntry(dict(key=i), tmp_path) for i in range(3)]
+    for i, entry in enumerate(entries):
+        with entry.replace() as tmp:
+            (tmp / "data").write_bytes(b"x" * 100)
+        os.utime(entry.path, (1000 + i, 1000 + i))
+    assert CacheEntry(dict(key=0), tmp_path).path == entries[0].path
+    try:
+        with entries[0].replace() as tmp:
+            (tmp / "data").write_bytes(b"partial")
+            raise OSError("failed")
+    except OSError:
+        pass
+    assert (entries[0].path / "data").read_bytes() == b"x" * 100
+    (tmp_path / "other").mkdir()  # not an entry
+    entries[0].touch()  # most recently used
+    assert CacheEntry.prune(tmp_path, 250) == [entries[1].path]
+    assert CacheEntry.prune(tmp_path, 100) == [entries[2].path]
+    assert entries[0].path.exists() and (tmp_path / "other").exists()
+
+
+def test_cache_file(tmp_path: Path):
+    path = tmp_path / "cache" / "history.json"
+    assert load_cache_file(path) is None
+    save_cache_file(path, dict(runs=[1, 2]))
+    assert load_cache_file(path) == dict(runs=[1, 2])
+    assert [p.name for p in path.parent.iterdir()] == ["history.json"]
+    path.write_text("{")  # e.g., truncated
+    assert load_cache_file(path) is None
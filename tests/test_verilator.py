@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
+import os
+import sys
 import tempfile
 from pathlib import Path
 
+from xeda import Design
 from xeda.flow_runner import DefaultRunner
 from xeda.flows import Verilator
+from xeda.flows.verilator.autotune import ThreadsTuning
+from xeda.flows.verilator.hierarchy import select_hier_blocks
 
 TESTS_DIR = Path(__file__).parent.absolute()
 EXAMPLES_DIR = TESTS_DIR.parent / "examples"
@@ -20,7 +25,9 @@ def test_yosys_synth_py() -> None:
         print("Xeda run dir: ", run_dir)
         for design in design_paths:
             xeda_runner = DefaultRunner(run_dir, debug=debug)
-            flow = xeda_runner.run(Verilator, design, flow_overrides=dict(debug=debug, verbose=debug))
+            flow = xeda_runner.run(
+                Verilator, design, flow_overrides=dict(debug=debug, verbose=debug)
+            )
             assert flow is not None, "run_flow returned None"
             settings_json = flow.run_path / "settings.json"
             results_json = flow.run_path / "results.json"
@@ -30,5 +37,256 @@ def test_yosys_synth_py() -> None:
             assert results_json.exists()
 
 
+# builds a model which does nothing, and logs each build to $VERILATOR_LOG
+FAKE_VERILATOR = """
+import os, sys
+args = sys.argv[1:]
+if args == ["--version"]:
+    print("Verilator 5.020 2024-01-01 rev v5.020")
+    sys.exit(0)
+mdir = args[args.index("-Mdir") + 1]
+os.makedirs(mdir, exist_ok=True)
+builds = os.path.join(mdir, "builds")  # number of builds in this directory
+with open(builds, "a") as f:
+    print(len(args), file=f)
+model = os.path.join(mdir, args[args.index("-o") + 1])
+with open(model, "w") as f:
+    print(MODEL, file=f)
+os.chmod(model, 0o755)
+# input files, including the files included by the sources (relative to the source)
+deps = [a for a in args if a.endswith((".sv", ".v"))]
+for src in list(deps):
+    for line in open(src):
+        if line.startswith("`include"):
+            deps.append(os.path.join(os.path.dirname(src), line.split('"')[1]))
+if "--no-MMD" not in args:
+    with open(os.path.join(mdir, "Vtop__ver.d"), "w") as f:
+        print(model, ":", " ".join(deps), file=f)
+with open(os.environ["VERILATOR_LOG"], "a") as f:
+    print(os.environ.get("OBJCACHE", ""), file=f)
+if "VERILATOR_ARGS_LOG" in os.environ:
+    with open(os.environ["VERILATOR_ARGS_LOG"], "a") as f:
+        print(" ".join(args), file=f)
+"""
+
+# prints its arguments, fails with +fail, and writes the thread profile if asked to
+FAKE_MODEL = """#!/bin/sh
+echo "$@"
+for a in "$@"; do
+  case "$a" in
+    +fail) exit 1;;
+    +verilator+prof+vlt+file+*) echo profile > "${a#+verilator+prof+vlt+file+}";;
+  esac
+done
+"""
+
+
+def test_build_cache(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    verilator = bin_dir / "verilator"
+    verilator.write_text(f"#!{sys.executable}\nMODEL = {FAKE_MODEL!r}\n{FAKE_VERILATOR}")
+    verilator.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("OBJCACHE", raising=False)
+    log_file = tmp_path / "verilator.log"
+    monkeypatch.setenv("VERILATOR_LOG", str(log_file))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "top.sv").write_text("module top; endmodule")
+
+    def run(**settings) -> list:
+        design = Design(name="top", rtl={"sources": ["top.sv"], "top": "top"}, design_root=src)
+        runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+        log_file.unlink(missing_ok=True)
+        flow = runner.run(Verilator, design, flow_settings=settings)
+        assert flow is not None and flow.succeeded
+        assert (flow.run_path / "sim_build" / "top").exists()
+        return log_file.read_text().splitlines() if log_file.exists() else []
+
+    assert run() == [""]  # ccache is not in PATH
+    assert run() == []
+    assert run(threads=2) == [""]
+    assert run(build_cache=False) == [""]
+    (src / "top.sv").write_text("module top; wire w; endmodule")
+    ccache = bin_dir / "ccache"
+    ccache.write_text("#!/bin/sh\n")
+    ccache.chmod(0o755)
+    assert run() == ["ccache"]
+    assert run(ccache=False) == []
+    ccache.unlink()
+
+    # included files are tracked
+    (src / "defs.svh").write_text("`define W 1")
+    (src / "top.sv").write_text('`include "defs.svh"\nmodule top; endmodule')
+    assert run() == [""]
+    assert run() == []
+    (src / "defs.svh").write_text("`define W 2")
+    assert run() == [""]
+    assert run() == []
+    inc = src / "inc"
+    (inc / "sub").mkdir(parents=True)
+    (inc / "sub" / "pkg.svh").write_text("`define P 1")
+    assert run(include_dirs=[str(inc)]) == [""]
+    assert run(include_dirs=[str(inc)]) == []
+    (inc / "sub" / "pkg.svh").write_text("`define P 2")
+    assert run(include_dirs=[str(inc)]) == [""]
+
+    cache = tmp_path / "cache" / "verilator" / "builds"
+    assert len(list(cache.iterdir())) > 1
+    (src / "top.sv").write_text("module top; wire v; endmodule")
+    assert run(build_cache_max_size=0) == [""]
+    assert list(cache.iterdir()) == []
+
+
+def test_sim_runs(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    verilator = bin_dir / "verilator"
+    verilator.write_text(f"#!{sys.executable}\nMODEL = {FAKE_MODEL!r}\n{FAKE_VERILATOR}")
+    verilator.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    log_file = tmp_path / "verilator.log"
+    monkeypatch.setenv("VERILATOR_LOG", str(log_file))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "top.sv").write_text("module top; endmodule")
+    design = Design(name="top", rtl={"sources": ["top.sv"], "top": "top"}, design_root=src)
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    runs = [dict(name="a", args=["+a"]), dict(args=["+b"], seed=3), dict(args=["+c"])]
+    flow = runner.run(Verilator, design, flow_settings=dict(runs=runs, nthreads=2))
+    assert flow is not None and flow.succeeded
+    assert len(log_file.read_text().splitlines()) == 1  # built once
+    assert [r["name"] for r in flow.results["runs"]] == ["a", "run1", "run2"]
+    assert all(r["success"] for r in flow.results["runs"])
+    assert "+b +verilator+seed+3" in (flow.run_path / "run1.log").read_text()
+
+    flow = runner.run(Verilator, design, flow_settings=dict(runs=runs[:1], waveform="dump.vcd"))
+    assert flow is not None and flow.succeeded
+    assert flow.settings.model_args == []  # the trace arguments are not added to the settings
+    assert (flow.run_path / "a.log").read_text().split()[:2] == ["--trace", "--trace-file"]
+
+    runs.append(dict(name="bad", args=["+fail"]))
+    flow = runner.run(Verilator, design, flow_settings=dict(runs=runs))
+    assert flow is not None and not flow.succeeded
+    assert [r["name"] for r in flow.results["runs"] if not r["success"]] == ["bad"]
+
+
+def test_pgo(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    verilator = bin_dir / "verilator"
+    verilator.write_text(f"#!{sys.executable}\nMODEL = {FAKE_MODEL!r}\n{FAKE_VERILATOR}")
+    verilator.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VERILATOR_LOG", str(tmp_path / "verilator.log"))
+    args_log = tmp_path / "args.log"
+    monkeypatch.setenv("VERILATOR_ARGS_LOG", str(args_log))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "top.sv").write_text("module top; endmodule")
+    design = Design(name="top", rtl={"sources": ["top.sv"], "top": "top"}, design_root=src)
+    settings = dict(pgo=True, threads=4, pgo_training=dict(args=["+short"]))
+    for i in range(2):
+        runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+        flow = runner.run(Verilator, design, flow_settings=settings)
+        assert flow is not None and flow.succeeded
+        pgo_dir = flow.run_path / "sim_build" / "pgo"
+        assert (pgo_dir / "profile.vlt").exists()
+        training_log = flow.run_path / "pgo_training.log"
+        assert "+short" in training_log.read_text() if i == 0 else not training_log.exists()
+    instrumented, optimized = args_log.read_text().splitlines()  # second run: cached model
+    assert "--prof-pgo" in instrumented and f"-fprofile-generate={pgo_dir}" in instrumented
+    assert str(pgo_dir / "profile.vlt") in optimized and "--prof-pgo" not in optimized
+    assert f"-fprofile-use={pgo_dir} -fprofile-correction" in optimized
+
+
+def test_autotune_threads(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    verilator = bin_dir / "verilator"
+    verilator.write_text(f"#!{sys.executable}\nMODEL = {FAKE_MODEL!r}\n{FAKE_VERILATOR}")
+    verilator.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    log_file = tmp_path / "verilator.log"
+    monkeypatch.setenv("VERILATOR_LOG", str(log_file))
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "top.sv").write_text("module top; endmodule")
+    design = Design(name="top", rtl={"sources": ["top.sv"], "top": "top"}, design_root=src)
+    settings = dict(threads="auto", autotune_threads=[1, 2, 4, 16])
+    runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+    flow = runner.run(Verilator, design, flow_settings=settings)
+    assert flow is not None and flow.succeeded
+    assert sorted(flow.results["threads_benchmarks"]) == [1, 2, 4]
+    threads = flow.results["threads"]
+    assert threads in (1, 2, 4)
+    assert len(log_file.read_text().splitlines()) == 3  # one build for each candidate
+
+    log_file.unlink()
+    flow = runner.run(Verilator, design, flow_settings=settings)
+    assert flow is not None and flow.succeeded
+    assert flow.results["threads"] == threads and "threads_benchmarks" not in flow.results
+    assert not log_file.exists()  # tuned model from the build cache
+
+    tuning = ThreadsTuning(dict(design="top"), root=tmp_path)
+    assert tuning.threads is None
+    assert tuning.update({1: dict(time=2.0), 2: dict(time=1.0), 4: dict(time=1.5)}) == 2
+    assert ThreadsTuning(dict(design="top"), root=tmp_path).threads == 2
+    assert tuning.update({1: dict(time=2.0, ratio_time=10.0), 2: dict(time=1.0)}) == 1
+
+
+def test_select_hier_blocks() -> None:
+    stat = {
+        "modules": {
+            "\\soc": {"num_cells": 10, "cells": {"\\core": 2, "$paramod\\mem\\W=8": 1, "$add": 7}},
+            "\\core": {"num_cells": 7, "cells": {"\\alu": 1, "$mul": 6}},
+            "\\alu": {"num_cells": 3000, "cells": {"$add": 3000}},
+            "$paramod\\mem\\W=8": {"num_cells": 5000, "cells": {"$dff": 5000}},
+        }
+    }
+    # core: 3006 cells x 2, alu: 3000 cells x 2 (in core), mem: 5000 cells x 1
+    assert select_hier_blocks(stat, "soc", min_cells=3000) == ["core", "alu", "mem"]
+    assert select_hier_blocks(stat, None, min_cells=3000, max_blocks=1) == ["core"]
+    assert select_hier_blocks(stat, "soc", min_cells=4000) == ["mem"]
+
+
+def test_hier_blocks(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    verilator = bin_dir / "verilator"
+    verilator.write_text(f"#!{sys.executable}\nMODEL = {FAKE_MODEL!r}\n{FAKE_VERILATOR}")
+    verilator.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("XEDA_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VERILATOR_LOG", str(tmp_path / "verilator.log"))
+    args_log = tmp_path / "args.log"
+    monkeypatch.setenv("VERILATOR_ARGS_LOG", str(args_log))
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "core.sv").write_text("module core; endmodule")
+    (src / "top.sv").write_text("module top; core c0(); core c1(); endmodule")
+    sources = ["core.sv", "top.sv"]
+    settings = dict(hier_blocks=["core"])
+    for i in range(2):
+        design = Design(name="top", rtl={"sources": sources, "top": "top"}, design_root=src)
+        runner = DefaultRunner(tmp_path / "xeda_run", display_results=False)
+        flow = runner.run(Verilator, design, flow_settings=settings)
+        assert flow is not None and flow.succeeded
+        assert (flow.run_path / "hier_blocks.vlt").read_text().splitlines() == [
+            "`verilator_config",
+            'hier_block -module "core"',
+        ]
+        # the second build starts from the first one
+        assert len((flow.run_path / "sim_build" / "builds").read_text().splitlines()) == i + 1
+        (src / "top.sv").write_text("module top; core c0(); endmodule")
+    assert all("--hierarchical" in args.split() for args in args_log.read_text().splitlines())
+
+
 if __name__ == "__main__":
     test_yosys_synth_py()
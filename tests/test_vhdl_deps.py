@@ -0,0 +1,74 @@
+from xeda.vhdl_deps import (
+    dependency_graph,
+    dependents,
+    parse_vhdl_units,
+    topological_levels,
+    topological_order,
+)
+
+PKG = """
+library ieee;
+use ieee.std_logic_1164.all;
+package my_pkg is  -- entity commented is
+    constant C : string := "entity in_string is";
+end package;
+package body my_pkg is
+end package body;
+"""
+
+ADDER = """
+use work.my_pkg.all;
+entity adder is
+end entity adder;
+architecture rtl of adder is
+    component half_adder is end component;
+begin
+end architecture;
+"""
+
+HALF_ADDER = """
+/* package old_pkg is
+*/
+entity half_adder is end;
+architecture rtl of half_adder is begin end;
+"""
+
+TB = """
+library mylib;
+context mylib.ctx;
+entity tb is end;
+architecture sim of tb is
+begin
+    uut: entity mylib.Adder(rtl);
+end architecture;
+"""
+
+
+def test_parse_vhdl_units():
+    pkg = parse_vhdl_units(PKG)
+    assert pkg.provides == {"my_pkg"} and pkg.depends == set()
+    adder = parse_vhdl_units(ADDER)
+    assert adder.provides == {"adder"} and adder.depends == {"my_pkg", "half_adder"}
+    assert parse_vhdl_units(HALF_ADDER).provides == {"half_adder"}
+    tb = parse_vhdl_units(TB, work="MyLib")
+    assert tb.provides == {"tb"} and tb.depends == {"ctx", "adder"}
+    assert parse_vhdl_units(TB).depends == set()
+
+
+def test_dependency_levels():
+    units = {
+        f: parse_vhdl_units(text, work="mylib")
+        for f, text in [("tb", TB), ("adder", ADDER), ("pkg", PKG), ("half", HALF_ADDER)]
+    }
+    graph = dependency_graph(units)
+    assert graph == {"tb": {"adder"}, "adder": {"pkg", "half"}, "pkg": set(), "half": set()}
+    assert topological_levels(graph, list(units)) == [["pkg", "half"], ["adder"], ["tb"]]
+    assert topological_order(graph, list(units)) == ["pkg", "half", "adder", "tb"]
+    assert topological_order(graph, ["pkg", "half", "adder"]) == ["pkg", "half", "adder"]
+    assert dependents(graph, ["half"]) == {"half", "adder", "tb"}
+    assert dependents(graph, ["tb"]) == {"tb"}
+    assert topological_levels(graph, ["tb", "pkg"]) == [["tb", "pkg"]]
+    assert topological_levels({"a": {"b"}, "b": {"a"}, "c": set()}, ["a", "b", "c"]) == [
+        ["c"],
+        ["a", "b"],
+    ]
@@ -7,7 +7,9 @@ from xeda import Design
 from xeda.flow import FPGA
 from xeda.flow_runner import DefaultRunner
 from xeda.flows import VivadoSynth
+from xeda.flows.vivado import Vivado
 from xeda.flows.vivado.vivado_synth import parse_hier_util, vivado_synth_generics
+from xeda.utils import parse_step_metrics
 
 TESTS_DIR = Path(__file__).parent.absolute()
 RESOURCES_DIR = TESTS_DIR / "resources"
@@ -63,6 +65,34 @@ def test_parse_hier_util() -> None:
     assert d
 
 
+def test_iterparse_xml_report() -> None:
+    report = RESOURCES_DIR / "vivado_synth" / "hierarchical_utilization.xml"
+    d = Vivado.parse_xml_report(report)
+    assert d
+    table = d["Utilization by Hierarchy"]
+    assert table["half_duplex_dut"]["Module"] == "(top)"
+    assert Vivado.parse_xml_report(RESOURCES_DIR / "vivado_synth" / "missing.xml") is None
+
+
+def test_parse_step_metrics() -> None:
+    steps = parse_step_metrics(RESOURCES_DIR / "vivado_synth" / "step_metrics.jsonl")
+    assert list(steps) == [
+        "synth_design",
+        "place_design",
+        "phys_opt_design",
+        "phys_opt_design_2",
+        "route_design",
+    ]
+    assert steps["synth_design"]["elapsed"] == 42.5
+    assert steps["route_design"]["peak_memory"] == 3120.75
+    assert "wns_delta" not in steps["synth_design"]
+    assert steps["place_design"]["wns_delta"] == 0.204
+    assert steps["phys_opt_design"]["wns_delta"] == 0.0  # did not help
+    assert "wns_delta" not in steps["phys_opt_design_2"]
+    assert steps["route_design"]["wns_delta"] == 0.239
+    assert parse_step_metrics(RESOURCES_DIR / "vivado_synth" / "missing.jsonl") == {}
+
+
 if __name__ == "__main__":
     # test_vivado_synth_py()
     test_parse_hier_util()